@@ -0,0 +1,138 @@
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import FDataBase
+
+SCALES = {'1k': 1_000, '10k': 10_000, '100k': 100_000, '1m': 1_000_000}
+
+TOPICS = ['Python', 'Go', 'Java', 'AI', 'ML', 'Data Science', 'DevOps', 'Kubernetes', 'Frontend', 'Кибербезопасность',
+          'Облачные технологии', 'Big Data', 'Mobile', 'QA', 'Product management']
+KINDS = ['митап', 'конференция', 'хакатон', 'форум', 'вебинар', 'семинар', 'воркшоп', 'meetup']
+CITIES = ['Санкт-Петербург', 'СПб', 'Москва', 'Онлайн', 'Казань', 'Новосибирск']
+POSITIONS = ['Стажер', 'Junior разработчик', 'Middle разработчик', 'Senior разработчик', 'Тимлид', 'Менеджер проектов',
+             'Руководитель отдела', 'Head of Data', 'Директор по развитию', 'Аналитик']
+DEPARTMENTS = ['Разработка', 'Аналитика', 'Маркетинг', 'HR', 'Инфраструктура', 'Продукт']
+MONTHS = ['января', 'февраля', 'марта', 'апреля', 'мая', 'июня', 'июля', 'августа', 'сентября', 'октября', 'ноября', 'декабря']
+BATCH = 10_000
+
+def _dt(value: datetime) -> str:
+    return value.strftime('%Y-%m-%d %H:%M:%S')
+
+def _batches(rows, size: int = BATCH):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch: yield batch
+
+def _users(rng: random.Random, count: int, anchor: datetime):
+    for i in range(count):
+        registered = anchor - timedelta(days=rng.randint(0, 720), minutes=rng.randint(0, 1440))
+        yield (
+            100_000 + i, f"user{i}", f"Сотрудник {i}", f"user{i}@example.com", f"+7900{i:07d}",
+            rng.choice(DEPARTMENTS), rng.choice(POSITIONS),
+            'approved' if rng.random() < 0.85 else rng.choice(('pending', 'rejected')),
+            _dt(registered), _dt(registered + timedelta(days=rng.randint(0, 30)))
+        )
+
+def _events(rng: random.Random, count: int, anchor: datetime):
+    for i in range(count):
+        topic, kind = rng.choice(TOPICS), rng.choice(KINDS)
+        start = anchor + timedelta(days=rng.randint(-180, 365), hours=rng.choice((10, 12, 15, 18, 19)))
+        score = rng.randint(0, 100)
+        priority = 'high' if score >= 80 else rng.choice(('medium', 'low'))
+        source = 'partner' if rng.random() < 0.1 else ('manual' if rng.random() < 0.05 else 'parser')
+        status = rng.choices(('approved', 'new', 'pending', 'rejected'), weights=(60, 20, 10, 10))[0]
+        analysis = {'title': f"{topic} {kind}", 'score': score, 'priority': priority, 'key_themes': [topic]}
+        yield (
+            f"{topic} {kind} #{i}",
+            f"{kind.capitalize()} по теме {topic}: доклады, нетворкинг, разбор кейсов. Регистрация открыта, участие бесплатное.",
+            rng.choice(CITIES), f"{start.day} {MONTHS[start.month - 1]} {start.year}", f"https://events.example.com/{i}",
+            json.dumps(analysis, ensure_ascii=False), score, priority, rng.randint(1, 5), _dt(start), status, source,
+            _dt(start - timedelta(days=rng.randint(7, 90)))
+        )
+
+def _registrations(rng: random.Random, count: int, users: int, events: int):
+    seen = set()
+    while len(seen) < count:
+        pair = (rng.randint(1, users), rng.randint(1, events))
+        if pair in seen: continue
+        seen.add(pair)
+        yield pair + (rng.choices(('pending', 'approved', 'rejected'), weights=(30, 60, 10))[0],)
+
+def generate(path: str, events: int, seed: int = 42, anchor: date = None, users: int = None, registrations: int = None) -> dict:
+    anchor = datetime.combine(anchor or date.today(), datetime.min.time())
+    users = users or max(200, events // 10)
+    registrations = min(registrations or events * 2, users * events // 2)
+    rng = random.Random(seed)
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix): os.remove(path + suffix)
+    conn = sqlite3.connect(path)
+    db = FDataBase(conn)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    started = time.perf_counter()
+
+    with conn:
+        for batch in _batches(_users(rng, users, anchor)):
+            conn.executemany(
+                "INSERT INTO users (telegram_id, username, full_name, email, phone, department, position, status, registered_at, last_activity) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch
+            )
+        for batch in _batches(_events(rng, events, anchor)):
+            conn.executemany(
+                "INSERT INTO events (title, description, location, date_str, url, analysis, score, priority, required_rank, event_datetime, status, source, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch
+            )
+        for batch in _batches(_registrations(rng, registrations, users, events)):
+            conn.executemany("INSERT INTO user_events (user_id, event_id, status) VALUES (?, ?, ?)", batch)
+        conn.executemany(
+            "INSERT INTO admins (telegram_id, username, role, notification_day, notification_time) VALUES (?, ?, ?, ?, ?)",
+            [(1 + i, f"admin{i}", ('TechSupport', 'GreatAdmin', 'Manager')[i % 3],
+              ('every_day', 'mon', 'fri', 'every_month')[i % 4], f"{9 + i % 8:02d}:00") for i in range(10)]
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO sources (name, url, base_url) VALUES (?, ?, ?)",
+            [(f"Source {i}", f"https://source{i}.example.com/events", f"https://source{i}.example.com") for i in range(20)]
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS bench_meta (key TEXT PRIMARY KEY, value TEXT)")
+        meta = {'events': events, 'users': users, 'registrations': registrations, 'seed': seed, 'anchor': anchor.date().isoformat()}
+        conn.executemany("INSERT OR REPLACE INTO bench_meta VALUES (?, ?)", [(k, str(v)) for k, v in meta.items()])
+
+    db.sync_search_index()
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    meta['seconds'] = round(time.perf_counter() - started, 2)
+    return meta
+
+def read_meta(path: str) -> dict:
+    if not os.path.exists(path): return {}
+    conn = sqlite3.connect(path)
+    try:
+        return dict(conn.execute("SELECT key, value FROM bench_meta").fetchall())
+    except sqlite3.Error:
+        return {}
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate a deterministic FDataBase dataset")
+    parser.add_argument('path')
+    parser.add_argument('--scale', choices=SCALES, default='1k')
+    parser.add_argument('--events', type=int, help="overrides --scale")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--anchor', type=date.fromisoformat, help="date the dataset is centred on (default: today)")
+    args = parser.parse_args()
+    print(json.dumps(generate(args.path, args.events or SCALES[args.scale], args.seed, args.anchor), ensure_ascii=False))
@@ -0,0 +1,84 @@
+import argparse
+import os
+import sqlite3
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import dates
+
+SAMPLE_CORPUS = [
+    "12.03.2025 18:00", "01.04.2025 10:00", "28.11.2025 19:30", "05.06.2025", "15.09.2025 09:00",
+    "12 марта", "3 апреля", "21 мая 2025", "15 ноября 2025 г., 19:00", "25 декабря в 19.30",
+    "25 декабря в 10.05", "10.00 12 марта",
+    "12–14 апреля 2025", "1-2 июня", "30 сентября — 2 октября 2025", "Онлайн, 30 ноября",
+    "2025-03-12", "2025-10-01T18:30:00", "2025-12-05 11:00",
+    "Не указана", "не указана", "TBA",
+    "завтра в 18:00", "в следующую пятницу", "March 12, 2025", "12 Mar 2025 18:00",
+]
+
+def load_corpus(path: str) -> list:
+    if path and os.path.exists(path):
+        conn = sqlite3.connect(path)
+        try:
+            rows = [row[0] for row in conn.execute("SELECT date_str FROM events WHERE date_str IS NOT NULL AND date_str != ''")]
+        finally:
+            conn.close()
+        if rows: return rows
+    return SAMPLE_CORPUS
+
+def time_per_call(func, corpus: list, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for text in corpus:
+            func(text)
+    return (time.perf_counter() - started) / (rounds * len(corpus)) * 1e6
+
+def import_ms(module: str) -> float:
+    return float(subprocess.run(
+        [sys.executable, '-c', f"import time; t = time.perf_counter(); import {module}; print((time.perf_counter() - t) * 1000)"],
+        capture_output=True, text=True
+    ).stdout or 0)
+
+def main(args: argparse.Namespace):
+    corpus = load_corpus(args.db)
+    print(f"Corpus: {len(corpus)} date strings ({len(set(corpus))} unique)")
+
+    fallback_import = import_ms('dateparser')
+    dates._fallback('1 января')
+
+    fallbacks = []
+    original = dates._fallback
+    dates._fallback = lambda text: fallbacks.append(text) or original(text)
+    dates._parse.cache_clear()
+    cold = time_per_call(dates.parse_event_date, corpus, 1)
+    dates._fallback = original
+    warm = time_per_call(dates.parse_event_date, corpus, args.rounds)
+
+    dates._parse.cache_clear()
+    fast_only = [text for text in corpus if text.strip().lower() not in {f.strip().lower() for f in fallbacks}]
+    fast = time_per_call(dates.parse_event_date, fast_only, 1) if fast_only else 0.0
+
+    print(f"  fast path hits   {len(corpus) - len(fallbacks)}/{len(corpus)}")
+    print(f"  fast path only   {fast:10.1f} µs/date (cold cache)")
+    print(f"  shared parser    {cold:10.1f} µs/date (cold cache, incl. fallbacks; dateparser import {fallback_import:.0f} ms not counted)")
+    print(f"  shared parser    {warm:10.1f} µs/date (memoized)")
+
+    if args.baseline:
+        import dateparser
+        baseline = time_per_call(
+            lambda text: dateparser.parse(text, languages=['ru', 'en'], settings={'PREFER_DATES_FROM': 'future'}),
+            corpus, 1
+        )
+        print(f"  dateparser       {baseline:10.1f} µs/date (import {fallback_import:.0f} ms)")
+    if fallbacks:
+        print("  fallbacks: " + ", ".join(sorted(set(fallbacks))[:10]))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure per-date parse cost on event date strings")
+    parser.add_argument('--db', default='sber_events.db', help="read date_str values from this database if it exists")
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--no-baseline', dest='baseline', action='store_false')
+    main(parser.parse_args())
@@ -0,0 +1,264 @@
+import argparse
+import inspect
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import FDataBase
+from benchmarks.datagen import SCALES, generate, read_meta
+
+DATA_DIR = os.path.join(tempfile.gettempdir(), 'confiq_bench')
+
+# Infrastructure helpers that are not query paths.
+NOT_BENCHMARKED = {'new_record_caches', 'new_query_stats', 'cache_stats', 'query_stats', 'page_cursor'}
+
+def dataset(scale: str, seed: int, events: int = None) -> str:
+    events = events or SCALES[scale]
+    path = os.path.join(DATA_DIR, f"events_{events}_{seed}.db")
+    meta = read_meta(path)
+    if meta.get('events') != str(events) or meta.get('seed') != str(seed):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        print(f"Generating {events} events (seed {seed})...", file=sys.stderr)
+        generate(path, events, seed)
+    return path
+
+def sample_ids(conn: sqlite3.Connection) -> dict:
+    one = lambda query: conn.execute(query).fetchone()[0]
+    column = lambda query: [row[0] for row in conn.execute(query).fetchall()]
+    return {
+        'telegram_id': one("SELECT telegram_id FROM users WHERE status = 'approved' AND position LIKE '%Senior%' LIMIT 1"),
+        'user_ids': column("SELECT id FROM users WHERE status = 'approved' ORDER BY id LIMIT 200"),
+        'pending_users': column("SELECT id FROM users WHERE status = 'pending' ORDER BY id LIMIT 200"),
+        'event_id': one("SELECT event_id FROM user_events GROUP BY event_id ORDER BY COUNT(*) DESC LIMIT 1"),
+        'pending_events': column("SELECT DISTINCT event_id FROM user_events WHERE status = 'pending' ORDER BY event_id LIMIT 200"),
+        'pending_pairs': [tuple(row) for row in conn.execute(
+            "SELECT user_id, event_id FROM user_events WHERE status = 'pending' ORDER BY id LIMIT 400").fetchall()],
+        'event_ids': column("SELECT id FROM events ORDER BY id LIMIT 200"),
+        'urls': column("SELECT url FROM events ORDER BY id LIMIT 100"),
+        'feed_token': None,
+    }
+
+def read_calls(db: FDataBase, ids: dict) -> list:
+    tid, uid, eid = ids['telegram_id'], ids['user_ids'][0], ids['event_id']
+    cursor_row = (db.get_all_events_paginated(0, 1) or [{}])[0]
+    cursor = db.page_cursor('all_events', cursor_row) if cursor_row else None
+    return [
+        ('get_active_sources', lambda: db.get_active_sources()),
+        ('get_user', lambda: db.get_user(tid)),
+        ('get_user_by_id', lambda: db.get_user_by_id(uid)),
+        ('get_user_manager', lambda: db.get_user_manager(tid)),
+        ('get_feed_state', lambda: db.get_feed_state(ids['feed_token'] or 'missing')),
+        ('get_event_by_id', lambda: db.get_event_by_id(eid)),
+        ('check_event_exists_by_url', lambda: db.check_event_exists_by_url(ids['urls'][0])),
+        ('get_existing_event_urls', lambda: db.get_existing_event_urls(ids['urls'])),
+        ('get_events_paginated', lambda: db.get_events_paginated(tid, 0, 1)),
+        ('get_events_paginated[page=50]', lambda: db.get_events_paginated(tid, 50, 1)),
+        ('get_events_paginated[partner]', lambda: db.get_events_paginated(tid, 0, 1, 'partner')),
+        ('get_high_priority_events_paginated', lambda: db.get_high_priority_events_paginated(tid, 0, 1)),
+        ('get_total_priority_events', lambda: db.get_total_priority_events(tid)),
+        ('get_partner_events_paginated', lambda: db.get_partner_events_paginated(tid, 0, 1)),
+        ('get_total_partner_events', lambda: db.get_total_partner_events(tid)),
+        ('get_user_events_paginated', lambda: db.get_user_events_paginated(tid, 0, 1)),
+        ('get_total_user_events', lambda: db.get_total_user_events(tid)),
+        ('get_partner_events', lambda: db.get_partner_events(tid)),
+        ('get_all_events_for_export', lambda: db.get_all_events_for_export()),
+        ('get_admin', lambda: db.get_admin(1)),
+        ('get_admins_by_notification', lambda: db.get_admins_by_notification('mon', '10:00')),
+        ('get_notification_schedule', lambda: db.get_notification_schedule()),
+        ('get_admins_by_time', lambda: db.get_admins_by_time('09:00')),
+        ('get_pending_events_paginated', lambda: db.get_pending_events_paginated(0, 1)),
+        ('get_total_pending_events_count', lambda: db.get_total_pending_events_count()),
+        ('get_all_events_paginated', lambda: db.get_all_events_paginated(0, 1)),
+        ('get_all_events_paginated[cursor]', lambda: db.get_all_events_paginated(0, 1, cursor=cursor)),
+        ('get_total_events_count', lambda: db.get_total_events_count()),
+        ('search_all_events_by_keywords', lambda: db.search_all_events_by_keywords(['python', 'конференция'])),
+        ('get_ics_artifact', lambda: db.get_ics_artifact(eid, 1)),
+        ('get_outbox_document', lambda: db.get_outbox_document('missing')),
+        ('get_user_events', lambda: db.get_user_events(uid)),
+        ('get_pending_registrations', lambda: db.get_pending_registrations()),
+        ('get_pending_registrations_count', lambda: db.get_pending_registrations_count()),
+        ('get_events_with_pending_registrations', lambda: db.get_events_with_pending_registrations(0, 1)),
+        ('get_total_events_with_pending_regs', lambda: db.get_total_events_with_pending_regs()),
+        ('get_event_registrations', lambda: db.get_event_registrations(eid)),
+        ('get_pending_registrations_for_event', lambda: db.get_pending_registrations_for_event(eid)),
+        ('get_pending_users', lambda: db.get_pending_users()),
+        ('get_pending_users_paginated', lambda: db.get_pending_users_paginated(0, 1)),
+        ('get_total_pending_users_count', lambda: db.get_total_pending_users_count()),
+        ('get_all_admins', lambda: db.get_all_admins()),
+        ('get_stats', lambda: db.get_stats()),
+        ('get_upcoming_events', lambda: db.get_upcoming_events(tid)),
+        ('get_high_priority_events', lambda: db.get_high_priority_events(tid)),
+        ('search_events_by_keywords', lambda: db.search_events_by_keywords(tid, ['python', 'ai'])),
+        ('get_user_stats', lambda: db.get_user_stats(uid)),
+        ('get_all_approved_users', lambda: db.get_all_approved_users()),
+        ('get_total_approved_events', lambda: db.get_total_approved_events('main')),
+        ('search_events_with_filters', lambda: db.search_events_with_filters(tid, ['python'], 'month', 'high')),
+        ('search_admin_events_with_filters', lambda: db.search_admin_events_with_filters(['python'], 'approved', 'parser')),
+        ('get_cache_invalidations', lambda: db.get_cache_invalidations(0)),
+        ('get_last_invalidation_id', lambda: db.get_last_invalidation_id()),
+    ]
+
+def write_calls(db: FDataBase, ids: dict) -> list:
+    counter = iter(range(10 ** 9))
+    rotate = lambda values: values[next(counter) % len(values)] if values else None
+    event = {
+        'title': 'Bench meetup', 'description': 'Python и AI', 'location': 'СПб', 'date_str': '1 марта',
+        'analysis': '{}', 'score': 50, 'priority': 'medium', 'required_rank': 1,
+        'event_datetime': '2030-03-01 18:00:00', 'status': 'new', 'source': 'parser'
+    }
+    outbox = lambda: [{'chat_id': ids['telegram_id'], 'kind': 'text', 'payload': {'text': 'bench'}}]
+    return [
+        ('add_source', lambda: db.add_source('Bench', f"https://bench.example.com/{next(counter)}", 'https://bench.example.com')),
+        ('update_source_profile', lambda: db.update_source_profile(1, {'item_selector': 'article.card'})),
+        ('save_crawl_states', lambda: db.save_crawl_states([{'source_id': 1, 'content_hash': str(next(counter)), 'item_urls': ['a']}])),
+        ('delete_source', lambda: db.delete_source(10 ** 6)),
+        ('add_user', lambda: db.add_user(10 ** 9 + next(counter), 'bench', 'Bench User')),
+        ('update_user_profile', lambda: db.update_user_profile(telegram_id=ids['telegram_id'], department='Разработка')),
+        ('update_user_activity', lambda: db.update_user_activity(ids['telegram_id'])),
+        ('update_users_activity_bulk', lambda: db.update_users_activity_bulk([(uid, '2030-01-01 00:00:00') for uid in ids['user_ids'][:50]])),
+        ('ensure_feed_token', lambda: ids.update(feed_token=db.ensure_feed_token(ids['telegram_id']))),
+        ('add_new_event', lambda: db.add_new_event(url=f"https://bench.example.com/e/{next(counter)}", **event)),
+        ('add_new_events_bulk', lambda: db.add_new_events_bulk([
+            {**event, 'url': f"https://bench.example.com/b/{next(counter)}"} for _ in range(100)])),
+        ('sync_search_index', lambda: db.sync_search_index()),
+        ('update_event', lambda: db.update_event(rotate(ids['event_ids']), score=60)),
+        ('update_status', lambda: db.update_status(rotate(ids['event_ids']), 'approved')),
+        ('save_ics_artifact', lambda: db.save_ics_artifact(ids['event_id'], 1, 'bench.ics', b'BEGIN:VCALENDAR')),
+        ('set_ics_file_id', lambda: db.set_ics_file_id(ids['event_id'], 1, 'file-id')),
+        ('add_user_event', lambda: db.add_user_event(rotate(ids['user_ids']), rotate(ids['event_ids']))),
+        ('remove_user_event', lambda: db.remove_user_event(rotate(ids['user_ids']), rotate(ids['event_ids']))),
+        ('approve_registration', lambda: db.approve_registration(*rotate(ids['pending_pairs']))),
+        ('reject_registration', lambda: db.reject_registration(*rotate(ids['pending_pairs']))),
+        ('approve_all_event_registrations', lambda: db.approve_all_event_registrations(rotate(ids['pending_events']))),
+        ('reject_all_event_registrations', lambda: db.reject_all_event_registrations(rotate(ids['pending_events']))),
+        ('approve_user', lambda: db.approve_user(rotate(ids['pending_users']))),
+        ('reject_user', lambda: db.reject_user(rotate(ids['pending_users']))),
+        ('force_approve_user', lambda: db.force_approve_user(ids['telegram_id'])),
+        ('add_admin', lambda: db.add_admin(500, 'bench', 'Manager')),
+        ('update_admin_role', lambda: db.update_admin_role(500, 'TechSupport')),
+        ('update_admin_notification', lambda: db.update_admin_notification(500, 'mon', '10:00')),
+        ('remove_admin', lambda: db.remove_admin(500)),
+        ('enqueue_messages', lambda: db.enqueue_messages(outbox())),
+        ('enqueue_messages[document]', lambda: db.enqueue_messages([
+            {**item, 'kind': 'document', 'document': b'BEGIN:VCALENDAR', 'chat_id': uid}
+            for item in outbox() for uid in ids['user_ids'][:50]])),
+        ('set_outbox_document_file_id', lambda: db.set_outbox_document_file_id('missing', 'file-id')),
+        ('claim_outbox', lambda: db.claim_outbox(50)),
+        ('mark_outbox_sent', lambda: db.mark_outbox_sent([1, 2, 3])),
+        ('mark_outbox_retry', lambda: db.mark_outbox_retry(4, 1.0, 'bench')),
+        ('mark_outbox_failed', lambda: db.mark_outbox_failed(5, 'bench')),
+        ('reset_outbox', lambda: db.reset_outbox()),
+        ('try_acquire_lease', lambda: db.try_acquire_lease('bench', 'owner', 30)),
+        ('release_lease', lambda: db.release_lease('bench', 'owner')),
+        ('prune_cache_invalidations', lambda: db.prune_cache_invalidations()),
+        ('delete_event', lambda: db.delete_event(rotate(ids['event_ids']))),
+    ]
+
+def measure(db: FDataBase, func, rounds: int, warm: bool) -> dict:
+    timings, rows = [], None
+    for _ in range(rounds):
+        if not warm:
+            db._count_cache.clear()
+            for cache in db._records.values(): cache.clear()
+        started = time.perf_counter()
+        result = func()
+        timings.append((time.perf_counter() - started) * 1000)
+        rows = len(result) if isinstance(result, (list, set, dict)) else rows
+    timings.sort()
+    return {
+        'median_ms': round(statistics.median(timings), 4),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 4),
+        'min_ms': round(timings[0], 4),
+        'rounds': rounds,
+        'rows': rows
+    }
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def compare(results: dict, baseline_path: str, threshold: float, min_delta_ms: float) -> int:
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    regressions = 0
+    for name, result in results.items():
+        before = baseline.get(name)
+        if not before or before['median_ms'] <= 0: continue
+        ratio = result['median_ms'] / before['median_ms']
+        if ratio > 1 + threshold and result['median_ms'] - before['median_ms'] > min_delta_ms:
+            regressions += 1
+            print(f"  ⚠️ {name}: {before['median_ms']:.3f} → {result['median_ms']:.3f} ms ({ratio:.2f}x)", file=sys.stderr)
+    return regressions
+
+def main(args: argparse.Namespace) -> int:
+    source = dataset(args.scale, args.seed, args.events)
+    workdir = tempfile.mkdtemp(prefix='db_bench_')
+    path = os.path.join(workdir, 'bench.db')
+    shutil.copy(source, path)
+
+    try:
+        conn = sqlite3.connect(path, check_same_thread=False)
+        db = FDataBase(conn)
+        ids = sample_ids(conn)
+        results = {}
+        for group, calls in (('read', read_calls(db, ids)), ('write', write_calls(db, ids))):
+            for name, func in calls:
+                if args.filter and args.filter not in name: continue
+                results[name] = {'kind': group, **measure(db, func, args.rounds, args.warm)}
+                if not args.quiet:
+                    r = results[name]
+                    print(f"{name:<42} {r['median_ms']:10.3f} ms  p95 {r['p95_ms']:10.3f} ms", file=sys.stderr)
+        conn.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    public = {name for name, _ in inspect.getmembers(FDataBase, callable) if not name.startswith('_')}
+    covered = {name.split('[')[0] for name in results}
+    missing = sorted(public - covered - NOT_BENCHMARKED) if not args.filter else []
+    if missing:
+        print(f"Not benchmarked: {', '.join(missing)}", file=sys.stderr)
+
+    report = {
+        'meta': {
+            **read_meta(source), 'commit': git_commit(), 'rounds': args.rounds, 'warm_caches': args.warm,
+            'python': platform.python_version(), 'sqlite': sqlite3.sqlite_version
+        },
+        'results': results
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold, args.min_delta_ms) else 0
+    return 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Time FDataBase methods against a synthetic dataset")
+    parser.add_argument('--scale', choices=SCALES, default='1k')
+    parser.add_argument('--events', type=int, help="overrides --scale")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--warm', action='store_true', help="keep record and count caches between rounds")
+    parser.add_argument('--filter', help="only run methods whose name contains this")
+    parser.add_argument('--json', help="write the report here instead of stdout")
+    parser.add_argument('--compare', help="baseline report to compare medians against")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed slowdown before a method counts as a regression")
+    parser.add_argument('--min-delta-ms', type=float, default=0.1, help="ignore slowdowns smaller than this in absolute terms")
+    parser.add_argument('--quiet', action='store_true')
+    sys.exit(main(parser.parse_args()))
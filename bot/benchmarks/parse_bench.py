@@ -0,0 +1,72 @@
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.extraction_profile import suggest_profile
+from services.parser_service import ParserService
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+SOURCE = {'name': 'fixture', 'url': 'https://example.com/events/', 'base_url': 'https://example.com'}
+
+def run_engine(parser: ParserService, engine: str, content: bytes, keywords: list, rounds: int) -> dict:
+    parser.engine = 'lxml' if engine == 'profile' else engine
+    parse = parser._parse_page
+    if engine == 'profile':
+        source = {**SOURCE, 'id': 0, **(suggest_profile(parser._make_tree(content, 'utf-8')) or {})}
+        parse = lambda content, charset, _, keywords: parser._parse_source_page(content, charset, source, keywords)[0]
+
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        events = parse(content, 'utf-8', SOURCE, keywords)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    parse(content, 'utf-8', SOURCE, keywords)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'median_ms': statistics.median(timings) * 1000,
+        'peak_kb': peak / 1024,
+        'urls': [e['url'] for e in events]
+    }
+
+def main(args: argparse.Namespace):
+    paths = []
+    for path in args.paths or [FIXTURES]:
+        paths.extend(sorted(glob.glob(os.path.join(path, '*.html'))) if os.path.isdir(path) else [path])
+    if not paths:
+        print("No fixture pages found")
+        return 1
+
+    parser = ParserService()
+    engines = ['html.parser', 'lxml', 'profile'] if parser.engine == 'lxml' else ['html.parser']
+    mismatches = 0
+    for path in paths:
+        with open(path, 'rb') as f:
+            content = f.read()
+        results = {engine: run_engine(parser, engine, content, args.keywords, args.rounds) for engine in engines}
+        print(f"{os.path.basename(path)} ({len(content) / 1024:.0f} KB)")
+        for engine, result in results.items():
+            print(f"  {engine:<12} {result['median_ms']:8.2f} ms   py-heap peak {result['peak_kb']:9.0f} KB   {len(result['urls'])} events")
+        if 'lxml' in results:
+            base, fast = results['html.parser'], results['lxml']
+            print(f"  speedup {base['median_ms'] / fast['median_ms']:.1f}x, py-heap {base['peak_kb'] / fast['peak_kb']:.1f}x")
+            if base['urls'] != fast['urls']:
+                mismatches += 1
+                print("  ⚠️ engines returned different events")
+    return 1 if mismatches else 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compare HTML parsing engines on saved listing pages")
+    parser.add_argument('paths', nargs='*', help="HTML files or directories (default: benchmarks/fixtures)")
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--keywords', nargs='*', default=[])
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import FDataBase
+
+# Unfiltered listings that are expected to read the whole table.
+ALLOWED_SCANS = {
+    'get_all_admins': {'admins'},
+    'get_notification_schedule': {'admins'},
+}
+
+def seed(conn: sqlite3.Connection):
+    conn.executemany(
+        "INSERT INTO users (telegram_id, username, full_name, position, status, registered_at) VALUES (?, ?, ?, ?, ?, ?)",
+        [(1000 + i, f"user{i}", f"User {i}", "Разработчик", 'approved' if i % 3 else 'pending',
+          f"2024-{1 + i % 12:02d}-{1 + i % 28:02d} 12:00:00") for i in range(300)]
+    )
+    conn.executemany(
+        "INSERT INTO events (title, description, url, score, priority, required_rank, event_datetime, status, source, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(f"Event {i}", "Python meetup", f"https://example.com/{i}", i % 100, ('high', 'medium', 'low')[i % 3], 1 + i % 5,
+          f"2025-{1 + i % 12:02d}-{1 + i % 28:02d} 18:00:00", ('approved', 'new', 'pending', 'rejected')[i % 4],
+          'partner' if i % 7 == 0 else 'parser', f"2024-{1 + i % 12:02d}-{1 + i % 28:02d} 12:00:00") for i in range(2000)]
+    )
+    conn.executemany(
+        "INSERT OR IGNORE INTO user_events (user_id, event_id, status) VALUES (?, ?, ?)",
+        [(1 + i % 300, 1 + (i * 7) % 2000, 'pending' if i % 2 else 'approved') for i in range(3000)]
+    )
+    conn.executemany(
+        "INSERT INTO admins (telegram_id, username, role, notification_day, notification_time) VALUES (?, ?, ?, ?, ?)",
+        [(1, 'owner', 'GreatAdmin', 'every_day', '09:00'), (2, 'manager', 'Manager', 'mon', '10:00')]
+    )
+    conn.commit()
+
+def paged(db: FDataBase) -> list:
+    return [
+        ('feed', 'get_events_paginated', lambda c, b: db.get_events_paginated(1001, 0, 20, cursor=c, backward=b)),
+        ('priority', 'get_high_priority_events_paginated', lambda c, b: db.get_high_priority_events_paginated(1001, 0, 20, cursor=c, backward=b)),
+        ('partner', 'get_partner_events_paginated', lambda c, b: db.get_partner_events_paginated(1001, 0, 20, cursor=c, backward=b)),
+        ('my_events', 'get_user_events_paginated', lambda c, b: db.get_user_events_paginated(1001, 0, 20, cursor=c, backward=b)),
+        ('all_events', 'get_all_events_paginated', lambda c, b: db.get_all_events_paginated(0, 20, cursor=c, backward=b)),
+        ('pending_events', 'get_pending_events_paginated', lambda c, b: db.get_pending_events_paginated(0, 20, cursor=c, backward=b)),
+        ('pending_users', 'get_pending_users_paginated', lambda c, b: db.get_pending_users_paginated(0, 20, cursor=c, backward=b)),
+        ('pending_regs', 'get_events_with_pending_registrations', lambda c, b: db.get_events_with_pending_registrations(0, 20, cursor=c, backward=b)),
+    ]
+
+def cursor_calls(db: FDataBase) -> list:
+    # Keyset pages: the (key, id) < (?, ?) predicates must stay on an index in both directions.
+    result = []
+    for kind, name, fetch in paged(db):
+        rows = fetch(None, False)
+        if not rows: raise RuntimeError(f"No seed rows for {kind} cursor")
+        cursor = db.page_cursor(kind, rows[-1])
+        result.append((f"{name}_cursor", lambda fetch=fetch, cursor=cursor: fetch(cursor, False)))
+        result.append((f"{name}_cursor_backward", lambda fetch=fetch, cursor=cursor: fetch(cursor, True)))
+    return result
+
+def calls(db: FDataBase) -> list:
+    return cursor_calls(db) + [
+        ('get_active_sources', lambda: db.get_active_sources()),
+        ('get_user', lambda: db.get_user(1001)),
+        ('get_user_by_id', lambda: db.get_user_by_id(1)),
+        ('get_user_manager', lambda: db.get_user_manager(1001)),
+        ('get_event_by_id', lambda: db.get_event_by_id(1)),
+        ('check_event_exists_by_url', lambda: db.check_event_exists_by_url("https://example.com/5")),
+        ('get_existing_event_urls', lambda: db.get_existing_event_urls(["https://example.com/5", "https://example.com/6"])),
+        ('get_events_paginated', lambda: db.get_events_paginated(1001, 0, 1)),
+        ('get_events_paginated_partner', lambda: db.get_events_paginated(1001, 0, 1, 'partner')),
+        ('get_high_priority_events_paginated', lambda: db.get_high_priority_events_paginated(1001, 0, 1)),
+        ('get_total_priority_events', lambda: db.get_total_priority_events(1001)),
+        ('get_partner_events_paginated', lambda: db.get_partner_events_paginated(1001, 0, 1)),
+        ('get_total_partner_events', lambda: db.get_total_partner_events(1001)),
+        ('get_user_events_paginated', lambda: db.get_user_events_paginated(1001, 0, 1)),
+        ('get_total_user_events', lambda: db.get_total_user_events(1001)),
+        ('get_partner_events', lambda: db.get_partner_events(1001)),
+        ('get_all_events_for_export', lambda: db.get_all_events_for_export()),
+        ('get_admin', lambda: db.get_admin(1)),
+        ('get_admins_by_notification', lambda: db.get_admins_by_notification('mon', '10:00')),
+        ('get_notification_schedule', lambda: db.get_notification_schedule()),
+        ('get_admins_by_time', lambda: db.get_admins_by_time('09:00')),
+        ('get_pending_events_paginated', lambda: db.get_pending_events_paginated(0, 1)),
+        ('get_total_pending_events_count', lambda: db.get_total_pending_events_count()),
+        ('get_all_events_paginated', lambda: db.get_all_events_paginated(0, 1)),
+        ('get_total_events_count', lambda: db.get_total_events_count()),
+        ('search_all_events_by_keywords', lambda: db.search_all_events_by_keywords(['python'])),
+        ('get_user_events', lambda: db.get_user_events(1)),
+        ('get_pending_registrations', lambda: db.get_pending_registrations()),
+        ('get_pending_registrations_count', lambda: db.get_pending_registrations_count()),
+        ('get_events_with_pending_registrations', lambda: db.get_events_with_pending_registrations(0, 1)),
+        ('get_total_events_with_pending_regs', lambda: db.get_total_events_with_pending_regs()),
+        ('get_event_registrations', lambda: db.get_event_registrations(8)),
+        ('get_pending_users', lambda: db.get_pending_users()),
+        ('get_pending_users_paginated', lambda: db.get_pending_users_paginated(0, 1)),
+        ('get_total_pending_users_count', lambda: db.get_total_pending_users_count()),
+        ('get_all_admins', lambda: db.get_all_admins()),
+        ('get_stats', lambda: db.get_stats()),
+        ('get_upcoming_events', lambda: db.get_upcoming_events(1001)),
+        ('get_high_priority_events', lambda: db.get_high_priority_events(1001)),
+        ('search_events_by_keywords', lambda: db.search_events_by_keywords(1001, ['python'])),
+        ('get_user_stats', lambda: db.get_user_stats(1)),
+        ('get_all_approved_users', lambda: db.get_all_approved_users()),
+        ('get_total_approved_events', lambda: db.get_total_approved_events('main')),
+        ('search_events_with_filters', lambda: db.search_events_with_filters(1001, ['python'], 'week', 'high')),
+        ('search_admin_events_with_filters', lambda: db.search_admin_events_with_filters(['python'], 'approved', 'parser')),
+        ('get_pending_registrations_for_event', lambda: db.get_pending_registrations_for_event(8)),
+        ('update_status', lambda: db.update_status(1, 'approved')),
+        ('approve_registration', lambda: db.approve_registration(1, 8)),
+        ('approve_all_event_registrations', lambda: db.approve_all_event_registrations(15)),
+        ('reject_all_event_registrations', lambda: db.reject_all_event_registrations(22)),
+        ('update_user_activity', lambda: db.update_user_activity(1001)),
+        ('claim_outbox', lambda: db.claim_outbox(10)),
+    ]
+
+def full_scans(conn: sqlite3.Connection, sql: str) -> set:
+    tables = set()
+    for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall():
+        detail = row[3]
+        if detail.startswith('SCAN ') and 'INDEX' not in detail:
+            tables.add(detail.split()[1])
+    return tables
+
+def main() -> int:
+    conn = sqlite3.connect(':memory:')
+    db = FDataBase(conn)
+    seed(conn)
+
+    failures = []
+    statements = []
+    conn.set_trace_callback(statements.append)
+    for name, call in calls(db):
+        statements.clear()
+        call()
+        conn.set_trace_callback(None)
+        queries = [s for s in statements if s.lstrip().split(None, 1)[0].upper() in ('SELECT', 'UPDATE', 'DELETE')]
+        allowed = ALLOWED_SCANS.get(name, set())
+        for sql in queries:
+            scanned = full_scans(conn, sql) - allowed
+            if scanned:
+                failures.append((name, sorted(scanned), " ".join(sql.split())))
+        status = "FAIL" if any(f[0] == name for f in failures) else "ok"
+        print(f"{status:4} {name} ({len(queries)} queries)")
+        conn.set_trace_callback(statements.append)
+
+    conn.set_trace_callback(None)
+    for name, tables, sql in failures:
+        print(f"\n{name}: full scan of {', '.join(tables)}\n  {sql}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
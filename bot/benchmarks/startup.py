@@ -0,0 +1,79 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must stay off the startup path; they load on first parser, LLM or date use.
+LAZY_MODULES = ('gigachat', 'bs4', 'dateparser', 'requests')
+
+IMPORT_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+READY_RE = re.compile(r'ready to poll in (\d+) ms')
+
+def run_once(workdir: str) -> dict:
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', os.path.join(BOT_DIR, 'main.py'), '--check-startup', '--token', '123456:STARTUP'],
+        cwd=workdir, capture_output=True, text=True, timeout=120
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+
+    imports = []
+    ready_ms = None
+    for line in result.stderr.splitlines():
+        match = IMPORT_RE.match(line)
+        if match:
+            imports.append((match.group(4), int(match.group(2)) / 1000, (len(match.group(3)) - 1) // 2))
+            continue
+        ready = READY_RE.search(line)
+        if ready: ready_ms = int(ready.group(1))
+
+    return {
+        'returncode': result.returncode,
+        'wall_ms': round(wall_ms),
+        'ready_ms': ready_ms,
+        'import_ms': round(sum(ms for _, ms, depth in imports if depth == 0)),
+        'top_imports': sorted(((name, round(ms, 1)) for name, ms, depth in imports if depth <= 1), key=lambda x: -x[1])[:15],
+        'lazy_violations': sorted({name for name, _, _ in imports if name.split('.')[0] in LAZY_MODULES})
+    }
+
+def main(args: argparse.Namespace) -> int:
+    runs = []
+    with tempfile.TemporaryDirectory(prefix='startup_') as workdir:
+        for i in range(args.runs):
+            runs.append(run_once(workdir))
+            first_boot = " (first boot, runs migrations)" if i == 0 else ""
+            run = runs[-1]
+            print(f"run {i + 1}: time-to-first-poll {run['ready_ms']} ms, process {run['wall_ms']} ms, imports {run['import_ms']} ms{first_boot}")
+
+    last = runs[-1]
+    print("\nSlowest imports (cumulative ms):")
+    for name, ms in last['top_imports']:
+        print(f"  {ms:9.1f}  {name}")
+
+    failed = any(run['returncode'] != 0 or run['ready_ms'] is None for run in runs)
+    if failed:
+        print("\n❌ startup check did not reach polling")
+    if last['lazy_violations']:
+        failed = True
+        print(f"\n❌ imported before first poll: {', '.join(last['lazy_violations'])}")
+    if args.budget_ms and last['ready_ms'] is not None and last['ready_ms'] > args.budget_ms:
+        failed = True
+        print(f"\n❌ time-to-first-poll {last['ready_ms']} ms exceeds budget {args.budget_ms} ms")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(runs, f, indent=2, ensure_ascii=False)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Measure bot cold start with python -X importtime")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--budget-ms', type=int, help="fail if warm time-to-first-poll exceeds this")
+    parser.add_argument('--json')
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services import gigachat_service
+from services.gigachat_service import GigaChatService
+
+TOKEN_TTL = 1800
+SDK_BUFFER = 60
+
+class FakeClock:
+    def __init__(self, stop_after: int):
+        self.now = 1_700_000_000.0
+        self.sleeps = 0
+        self.stop_after = stop_after
+
+    def time(self) -> float:
+        return self.now
+
+    async def sleep(self, delay: float):
+        self.sleeps += 1
+        if self.sleeps > self.stop_after: raise asyncio.CancelledError
+        self.now += delay
+
+class StubClient:
+    """Caches its token like the SDK: it re-authenticates only within SDK_BUFFER of expiry."""
+    def __init__(self, clock: FakeClock):
+        self.clock = clock
+        self.auth_times = []
+        self._access_token = None
+
+    def _reset_token(self):
+        self._access_token = None
+
+    async def aget_token(self):
+        now = self.clock.time()
+        if self._access_token is None or self._access_token.expires_at <= (now + SDK_BUFFER) * 1000:
+            self.auth_times.append(now)
+            self._access_token = SimpleNamespace(access_token=f"token-{len(self.auth_times)}", expires_at=(now + TOKEN_TTL) * 1000)
+        return self._access_token
+
+def main() -> int:
+    clock = FakeClock(stop_after=4)
+    gigachat_service.time = SimpleNamespace(time=clock.time)
+    gigachat_service.asyncio = SimpleNamespace(sleep=clock.sleep, to_thread=asyncio.to_thread)
+
+    service = GigaChatService()
+    client = service._client = StubClient(clock)
+    try:
+        asyncio.run(service._token_refresher())
+    except asyncio.CancelledError:
+        pass
+
+    failures = []
+    if len(client.auth_times) < 3:
+        failures.append(f"expected at least 3 token requests, got {len(client.auth_times)}")
+    for previous, current in zip(client.auth_times, client.auth_times[1:]):
+        expected = previous + TOKEN_TTL - service.token_refresh_margin + 1
+        status = "ok" if current == expected else "FAIL"
+        print(f"{status:4} refresh {current - previous:.0f} s after previous token (expected {expected - previous:.0f} s, margin {service.token_refresh_margin} s)")
+        if current != expected:
+            failures.append(f"token refreshed at +{current - previous:.0f} s instead of +{expected - previous:.0f} s")
+
+    for failure in failures:
+        print(f"\n{failure}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from aiohttp import ClientSession, web
+
+BOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOKEN = "123456:LOADTEST"
+BOT_USER = {'id': 123456, 'is_bot': True, 'first_name': 'LoadTest', 'username': 'loadtest_bot'}
+
+class StubTelegramApi:
+    def __init__(self):
+        self.sent = 0
+        self._message_id = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        if method == 'getMe':
+            return web.json_response({'ok': True, 'result': BOT_USER})
+        if method in ('sendMessage', 'sendDocument'):
+            data = await request.post()
+            self.sent += 1
+            self._message_id += 1
+            chat_id = int(data.get('chat_id', 0))
+            return web.json_response({'ok': True, 'result': {
+                'message_id': self._message_id,
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'from': BOT_USER,
+                'text': data.get('text', '')
+            }})
+        return web.json_response({'ok': True, 'result': True})
+
+    async def start(self, port: int) -> web.AppRunner:
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self.handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', port).start()
+        return runner
+
+def make_update(update_id: int, user_id: int) -> dict:
+    user = {'id': user_id, 'is_bot': False, 'first_name': f'User{user_id}', 'username': f'user{user_id}'}
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': user_id, 'type': 'private', 'first_name': user['first_name']},
+            'from': user,
+            'text': '/start',
+            'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}]
+        }
+    }
+
+async def wait_ready(session: ClientSession, url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            async with session.post(url, json={'update_id': 0}) as response:
+                if response.status < 500: return
+        except OSError:
+            pass
+        await asyncio.sleep(0.25)
+    raise RuntimeError("webhook workers did not come up")
+
+async def replay(url: str, updates: list, concurrency: int, session: ClientSession) -> int:
+    queue = asyncio.Queue()
+    for update in updates:
+        queue.put_nowait(update)
+    errors = 0
+
+    async def sender():
+        nonlocal errors
+        while not queue.empty():
+            update = queue.get_nowait()
+            try:
+                async with session.post(url, json=update) as response:
+                    if response.status != 200: errors += 1
+            except OSError:
+                errors += 1
+
+    await asyncio.gather(*(sender() for _ in range(concurrency)))
+    return errors
+
+async def measure(workers: int, args: argparse.Namespace, stub: StubTelegramApi) -> dict:
+    port = args.port + workers
+    workdir = tempfile.mkdtemp(prefix=f'webhook_load_{workers}_')
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(BOT_DIR, 'main.py'), '--mode', 'webhook', '--workers', str(workers),
+         '--host', '127.0.0.1', '--port', str(port), '--token', TOKEN,
+         '--api-server', f'http://127.0.0.1:{args.api_port}', '--no-set-webhook'],
+        cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+    )
+    url = f'http://127.0.0.1:{port}/webhook'
+    rng = random.Random(workers)
+    updates = [make_update(i + 1, rng.randint(10_000, 10_000 + args.users)) for i in range(args.updates)]
+
+    try:
+        async with ClientSession() as session:
+            await wait_ready(session, url)
+            await asyncio.sleep(1)
+            baseline = stub.sent
+            started = time.perf_counter()
+            errors = await replay(url, updates, args.concurrency, session)
+            deadline = time.monotonic() + args.timeout
+            while stub.sent - baseline < args.updates and time.monotonic() < deadline:
+                await asyncio.sleep(0.05)
+            elapsed = time.perf_counter() - started
+    finally:
+        os.killpg(process.pid, signal.SIGINT)
+        try:
+            process.wait(timeout=20)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+
+    handled = stub.sent - baseline
+    return {
+        'workers': workers,
+        'updates': args.updates,
+        'handled': handled,
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'updates_per_sec': round(handled / elapsed, 1) if elapsed else 0.0
+    }
+
+async def main(args: argparse.Namespace):
+    stub = StubTelegramApi()
+    runner = await stub.start(args.api_port)
+    results = []
+    try:
+        for workers in args.workers:
+            result = await measure(workers, args, stub)
+            results.append(result)
+            print(f"{result['workers']:>3} workers: {result['handled']}/{result['updates']} updates "
+                  f"in {result['seconds']:.2f}s -> {result['updates_per_sec']:.1f} updates/sec "
+                  f"({result['errors']} errors)")
+    finally:
+        await runner.cleanup()
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay synthetic updates against webhook workers")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--updates', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--port', type=int, default=18440)
+    parser.add_argument('--api-port', type=int, default=18081)
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--json')
+    asyncio.run(main(parser.parse_args()))
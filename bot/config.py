@@ -4,6 +4,82 @@ BOT_CONFIG = {
     'admin_ids': [your_id],
 }
 
+PARSER_CONFIG = {
+    'timeout': 20,
+    'max_connections': 20,
+    'per_host_limit': 1,
+    'per_host_delay': 1.5,
+    'max_items': 10,
+    'max_listing_pages': 3,
+    'max_depth': 1,
+    'max_pages_per_source': 20,
+    'max_bytes_per_source': 4 * 1024 * 1024,
+}
+
+GIGACHAT_CONFIG = {
+    'max_connections': 8,
+    'token_refresh_margin': 120,
+    'warmup_delay': 30,
+}
+
+DATABASE_CONFIG = {
+    'write_flush_interval': 15,
+    'record_cache_size': 2048,
+    'record_cache_ttl': 300,
+    'query_stats': True,
+    'query_stats_window': 1000,
+    'slow_query_ms': 100,
+    'slow_query_log': 'slow_queries.log',
+}
+
+ANALYSIS_CACHE_CONFIG = {
+    'path': 'analysis_cache.db',
+    'ttl': 14 * 24 * 3600,
+    'max_entries': 20000,
+}
+
+BROADCAST_CONFIG = {
+    'workers': 4,
+    'global_rate': 25,
+    'per_chat_interval': 1.0,
+    'batch_size': 50,
+    'poll_interval': 5,
+    'max_attempts': 5,
+}
+
+FEED_CONFIG = {
+    'enabled': True,
+    'host': '0.0.0.0',
+    'port': 8080,
+    'public_url': 'http://localhost:8080',
+    'max_age': 300,
+}
+
+FSM_CONFIG = {
+    'path': 'fsm_storage.db',
+    'ttl': 2 * 24 * 3600,
+}
+
+WEBHOOK_CONFIG = {
+    'mode': 'polling',
+    'url': '',
+    'path': '/webhook',
+    'secret': '',
+    'host': '0.0.0.0',
+    'port': 8443,
+    'workers': 1,
+    'lease_ttl': 30,
+}
+
+ANALYSIS_CONFIG = {
+    'concurrency': 4,
+    'rate_per_minute': 60,
+    'batch_size': 5,
+    'batch_text_limit': 600,
+    'max_retries': 3,
+    'retry_backoff': 1.0,
+}
+
 EVENT_CRITERIA = {
     'target_audience': [
         'IT-специалисты',
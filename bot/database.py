@@ -1,87 +1,145 @@
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import secrets
 import sqlite3
-from typing import List, Dict, Union
-from datetime import datetime, timedelta
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Union
+from datetime import datetime, timedelta, timezone
+
+from utils.cache import MISSING, TTLCache
+from utils.query_stats import InstrumentedCursor, QueryStats
+from utils.stemmer import stem_text, stem_tokens
+
+try:
+    from config import DATABASE_CONFIG
+except ImportError:
+    DATABASE_CONFIG = {}
+
+logger = logging.getLogger(__name__)
+
+FTS_WEIGHTS = "10.0, 4.0, 2.0, 6.0"
+COUNT_CACHE_TTL = 30
+
+READ_PREFIXES = ('get_', 'check_', 'search_')
 
 class FDataBase:
-    def __init__(self, db: sqlite3.Connection):
+    def __init__(self, db: sqlite3.Connection, init_schema: bool = True, count_cache: dict = None, record_caches: dict = None,
+                 publish_invalidations: bool = False, query_stats: QueryStats = None):
         self.__db = db
         self.__db.row_factory = sqlite3.Row
-        self.__cur = self.__db.cursor()
-        self._init_tables()
+        self.__db.create_function("ru_stem", 1, stem_text, deterministic=True)
+        self._query_stats = self.new_query_stats() if query_stats is None else query_stats
+        self.__cur = InstrumentedCursor(self.__db.cursor(), self._query_stats) if self._query_stats else self.__db.cursor()
+        self._count_cache = {} if count_cache is None else count_cache
+        self._records = self.new_record_caches() if record_caches is None else record_caches
+        self._publish_invalidations = publish_invalidations
+        if init_schema: self._init_tables()
+        self.__cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'events_fts'")
+        self._fts_enabled = bool(self.__cur.fetchone())
+        if init_schema: self.sync_search_index()
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            telegram_id INTEGER UNIQUE NOT NULL,
+            username TEXT,
+            full_name TEXT,
+            email TEXT,
+            phone TEXT,
+            department TEXT,
+            position TEXT,
+            status TEXT DEFAULT 'pending',
+            registered_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            last_activity DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            location TEXT,
+            date_str TEXT,
+            url TEXT,
+            analysis TEXT,
+            score INTEGER DEFAULT 0,
+            priority TEXT DEFAULT 'medium',
+            required_rank INTEGER DEFAULT 1,
+            event_datetime DATETIME,
+            status TEXT DEFAULT 'new',
+            source TEXT DEFAULT 'parser', 
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS user_events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            event_id INTEGER NOT NULL,
+            status TEXT DEFAULT 'pending',
+            registration_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users (id),
+            FOREIGN KEY (event_id) REFERENCES events (id),
+            UNIQUE(user_id, event_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS admins (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            telegram_id INTEGER UNIQUE NOT NULL,
+            username TEXT,
+            role TEXT DEFAULT 'Manager',
+            is_active BOOLEAN DEFAULT 1,
+            notification_day TEXT,
+            notification_time TEXT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS sources (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT,
+            url TEXT UNIQUE NOT NULL,
+            base_url TEXT,
+            is_active BOOLEAN DEFAULT 1
+        )
+        """,
+    )
+
+    PROFILE_COLUMNS = ('item_selector', 'title_selector', 'date_selector', 'link_selector', 'next_selector')
+
+    INDEXES = (
+        "CREATE INDEX IF NOT EXISTS idx_events_feed ON events(status, priority DESC, score DESC, event_datetime, required_rank, source)",
+        "CREATE INDEX IF NOT EXISTS idx_events_source ON events(source, status, event_datetime, required_rank)",
+        "CREATE INDEX IF NOT EXISTS idx_events_status_datetime ON events(status, event_datetime, required_rank)",
+        "CREATE INDEX IF NOT EXISTS idx_events_status_created ON events(status, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_events_created ON events(created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_user_events_event ON user_events(event_id, status, user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_user_events_status ON user_events(status, event_id)",
+        "CREATE INDEX IF NOT EXISTS idx_users_status_registered ON users(status, registered_at)",
+        "CREATE INDEX IF NOT EXISTS idx_users_status_name ON users(status, full_name)",
+        "CREATE INDEX IF NOT EXISTS idx_admins_notification ON admins(notification_time, is_active)",
+        "CREATE INDEX IF NOT EXISTS idx_admins_role ON admins(role, is_active)",
+        "CREATE INDEX IF NOT EXISTS idx_sources_active ON sources(is_active)",
+    )
 
     def _init_tables(self):
         try:
-            sql_script = """
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                telegram_id INTEGER UNIQUE NOT NULL,
-                username TEXT,
-                full_name TEXT,
-                email TEXT,
-                phone TEXT,
-                department TEXT,
-                position TEXT,
-                status TEXT DEFAULT 'pending',
-                registered_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-                last_activity DATETIME DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                description TEXT,
-                location TEXT,
-                date_str TEXT,
-                url TEXT,
-                analysis TEXT,
-                score INTEGER DEFAULT 0,
-                priority TEXT DEFAULT 'medium',
-                required_rank INTEGER DEFAULT 1,
-                event_datetime DATETIME,
-                status TEXT DEFAULT 'new',
-                source TEXT DEFAULT 'parser', 
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            );
+            self.__cur.execute("PRAGMA user_version")
+            version = self.__cur.fetchone()[0]
+            if version >= len(self._migrations()): return
+            self._migrate()
 
-            CREATE TABLE IF NOT EXISTS user_events (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id INTEGER NOT NULL,
-                event_id INTEGER NOT NULL,
-                status TEXT DEFAULT 'pending',
-                registration_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (user_id) REFERENCES users (id),
-                FOREIGN KEY (event_id) REFERENCES events (id),
-                UNIQUE(user_id, event_id)
-            );
-
-            CREATE TABLE IF NOT EXISTS admins (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                telegram_id INTEGER UNIQUE NOT NULL,
-                username TEXT,
-                role TEXT DEFAULT 'Manager',
-                is_active BOOLEAN DEFAULT 1,
-                notification_day TEXT,
-                notification_time TEXT,
-                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-            );
-
-            CREATE TABLE IF NOT EXISTS sources (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT,
-                url TEXT UNIQUE NOT NULL,
-                base_url TEXT,
-                is_active BOOLEAN DEFAULT 1
-            );
-            """
-            self.__cur.executescript(sql_script)
-            
-            try:
-                self.__cur.execute("ALTER TABLE admins ADD COLUMN notification_day TEXT")
-                self.__cur.execute("ALTER TABLE admins ADD COLUMN notification_time TEXT")
-            except: pass
-            
             self.__cur.execute("SELECT COUNT(*) FROM sources")
-            if self.__cur.fetchone()[0] == 0:
+            if version == 0 and self.__cur.fetchone()[0] == 0:
                 base_sources = [
                     ("IT Event Hub", "https://it-event-hub.ru/", "https://it-event-hub.ru/"),
                     ("Tproger", "https://tproger.ru/events/", "https://tproger.ru"),
@@ -91,7 +149,490 @@ class FDataBase:
 
             self.__db.commit()
         except Exception as e:
-            print(f"Database initialization error: {e}")
+            logger.error(f"Database initialization error: {e}")
+
+    def _migrations(self) -> list:
+        return [
+            self._migration_base_schema,
+            self._migration_admin_notifications,
+            self._migration_indexes,
+            self._migration_events_fts,
+            self._migration_unique_event_url,
+            self._migration_outbox,
+            self._migration_ics_artifacts,
+            self._migration_calendar_feed,
+            self._migration_coordination,
+            self._migration_source_crawl_state,
+            self._migration_source_profiles,
+            self._migration_outbox_documents,
+            self._migration_fts_pending,
+        ]
+
+    def _migrate(self):
+        self.__cur.execute("PRAGMA user_version")
+        version = self.__cur.fetchone()[0]
+        for number, migration in enumerate(self._migrations(), start=1):
+            if number <= version: continue
+            self.__db.commit()
+            self.__cur.execute("BEGIN")
+            try:
+                migration()
+                self.__cur.execute(f"PRAGMA user_version = {number}")
+                self.__cur.execute("COMMIT")
+            except Exception:
+                self.__cur.execute("ROLLBACK")
+                raise
+
+    def _table_columns(self, table: str) -> set:
+        self.__cur.execute(f"PRAGMA table_info({table})")
+        return {row[1] for row in self.__cur.fetchall()}
+
+    def _migration_base_schema(self):
+        for statement in self.SCHEMA:
+            self.__cur.execute(statement)
+
+    def _migration_admin_notifications(self):
+        columns = self._table_columns('admins')
+        for column in ('notification_day', 'notification_time'):
+            if column not in columns:
+                self.__cur.execute(f"ALTER TABLE admins ADD COLUMN {column} TEXT")
+        if 'source' not in self._table_columns('events'):
+            self.__cur.execute("ALTER TABLE events ADD COLUMN source TEXT DEFAULT 'parser'")
+
+    def _migration_indexes(self):
+        for statement in self.INDEXES:
+            self.__cur.execute(statement)
+
+    def _migration_events_fts(self):
+        try:
+            self.__cur.execute("CREATE VIRTUAL TABLE IF NOT EXISTS events_fts USING fts5(title, description, location, themes, tokenize = 'unicode61')")
+        except sqlite3.OperationalError as e:
+            logger.warning(f"FTS5 is not available, keyword search falls back to LIKE: {e}")
+            return
+
+        fts_values = """
+            ru_stem(new.title), ru_stem(new.description), ru_stem(new.location),
+            ru_stem(CASE WHEN json_valid(new.analysis) THEN json_extract(new.analysis, '$.key_themes') END)
+        """
+        self.__cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS events_fts_ai AFTER INSERT ON events BEGIN
+                INSERT INTO events_fts (rowid, title, description, location, themes) VALUES (new.id, {fts_values});
+            END
+        """)
+        self.__cur.execute("""
+            CREATE TRIGGER IF NOT EXISTS events_fts_ad AFTER DELETE ON events BEGIN
+                DELETE FROM events_fts WHERE rowid = old.id;
+            END
+        """)
+        self.__cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS events_fts_au AFTER UPDATE OF title, description, location, analysis ON events BEGIN
+                DELETE FROM events_fts WHERE rowid = old.id;
+                INSERT INTO events_fts (rowid, title, description, location, themes) VALUES (new.id, {fts_values});
+            END
+        """)
+        self.__cur.execute("""
+            INSERT INTO events_fts (rowid, title, description, location, themes)
+            SELECT id, ru_stem(title), ru_stem(description), ru_stem(location),
+                   ru_stem(CASE WHEN json_valid(analysis) THEN json_extract(analysis, '$.key_themes') END)
+            FROM events
+        """)
+
+    def _migration_unique_event_url(self):
+        self.__cur.execute("""
+            CREATE TEMP TABLE event_url_duplicates AS
+            SELECT e.id AS duplicate_id, k.keep_id
+            FROM events e
+            JOIN (SELECT url, MIN(id) AS keep_id FROM events WHERE url != '' GROUP BY url HAVING COUNT(*) > 1) k ON k.url = e.url
+            WHERE e.id != k.keep_id
+        """)
+        self.__cur.execute("""
+            UPDATE OR IGNORE user_events
+            SET event_id = (SELECT keep_id FROM event_url_duplicates WHERE duplicate_id = user_events.event_id)
+            WHERE event_id IN (SELECT duplicate_id FROM event_url_duplicates)
+        """)
+        self.__cur.execute("DELETE FROM user_events WHERE event_id IN (SELECT duplicate_id FROM event_url_duplicates)")
+        moved = self.__cur.rowcount
+        self.__cur.execute("DELETE FROM events WHERE id IN (SELECT duplicate_id FROM event_url_duplicates)")
+        removed = self.__cur.rowcount
+        self.__cur.execute("DROP TABLE event_url_duplicates")
+        if removed > 0:
+            logger.info(f"🧹 Removed {removed} duplicate events by URL ({moved} registrations were already on the kept event)")
+        self.__cur.execute("DROP INDEX IF EXISTS idx_events_url")
+        self.__cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_events_url ON events(url) WHERE url != ''")
+
+    def _migration_outbox(self):
+        self.__cur.execute("""
+            CREATE TABLE IF NOT EXISTS outbox (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                chat_id INTEGER NOT NULL,
+                kind TEXT NOT NULL DEFAULT 'message',
+                payload TEXT NOT NULL,
+                document BLOB,
+                dedupe_key TEXT,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER DEFAULT 0,
+                next_attempt_at REAL DEFAULT 0,
+                last_error TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self.__cur.execute("CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox(status, next_attempt_at)")
+        self.__cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_outbox_dedupe ON outbox(dedupe_key) WHERE status IN ('pending', 'sending')")
+
+    def _migration_ics_artifacts(self):
+        if 'version' not in self._table_columns('events'):
+            self.__cur.execute("ALTER TABLE events ADD COLUMN version INTEGER DEFAULT 1")
+        self.__cur.execute("""
+            CREATE TABLE IF NOT EXISTS ics_artifacts (
+                event_id INTEGER PRIMARY KEY,
+                version INTEGER NOT NULL,
+                file_name TEXT NOT NULL,
+                content BLOB NOT NULL,
+                file_id TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+
+    def _migration_calendar_feed(self):
+        columns = self._table_columns('users')
+        for column, ddl in (('feed_token', 'TEXT'), ('feed_version', 'INTEGER DEFAULT 0'), ('feed_updated_at', 'DATETIME')):
+            if column not in columns:
+                self.__cur.execute(f"ALTER TABLE users ADD COLUMN {column} {ddl}")
+        self.__cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_users_feed_token ON users(feed_token) WHERE feed_token IS NOT NULL")
+
+        touch = "UPDATE users SET feed_version = COALESCE(feed_version, 0) + 1, feed_updated_at = CURRENT_TIMESTAMP WHERE"
+        self.__cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS user_events_feed_ai AFTER INSERT ON user_events BEGIN
+                {touch} id = new.user_id;
+            END
+        """)
+        self.__cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS user_events_feed_ad AFTER DELETE ON user_events BEGIN
+                {touch} id = old.user_id;
+            END
+        """)
+        self.__cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS user_events_feed_au AFTER UPDATE OF status ON user_events BEGIN
+                {touch} id = new.user_id;
+            END
+        """)
+        self.__cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS events_feed_au AFTER UPDATE OF title, description, location, date_str, event_datetime, url, version ON events BEGIN
+                {touch} id IN (SELECT user_id FROM user_events WHERE event_id = new.id);
+            END
+        """)
+        self.__cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS events_feed_ad AFTER DELETE ON events BEGIN
+                {touch} id IN (SELECT user_id FROM user_events WHERE event_id = old.id);
+            END
+        """)
+
+    def _migration_coordination(self):
+        self.__cur.execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                name TEXT PRIMARY KEY,
+                owner TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        self.__cur.execute("""
+            CREATE TABLE IF NOT EXISTS cache_invalidations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                cache TEXT NOT NULL,
+                key TEXT,
+                created_at REAL NOT NULL
+            )
+        """)
+
+    def _migration_source_crawl_state(self):
+        self.__cur.execute("""
+            CREATE TABLE IF NOT EXISTS source_crawl_state (
+                source_id INTEGER PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                signature TEXT,
+                item_urls TEXT,
+                checked_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                changed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (source_id) REFERENCES sources (id) ON DELETE CASCADE
+            )
+        """)
+
+    def _migration_source_profiles(self):
+        columns = self._table_columns('sources')
+        for column in self.PROFILE_COLUMNS + ('profile_updated_at',):
+            if column not in columns:
+                self.__cur.execute(f"ALTER TABLE sources ADD COLUMN {column} TEXT")
+
+    def _migration_outbox_documents(self):
+        self.__cur.execute("""
+            CREATE TABLE IF NOT EXISTS outbox_documents (
+                key TEXT PRIMARY KEY,
+                content BLOB NOT NULL,
+                file_id TEXT,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        if 'document_key' not in self._table_columns('outbox'):
+            self.__cur.execute("ALTER TABLE outbox ADD COLUMN document_key TEXT")
+
+    def _migration_fts_pending(self):
+        self.__cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'events_fts'")
+        if not self.__cur.fetchone(): return
+        self.__cur.execute("CREATE TABLE IF NOT EXISTS events_fts_pending (event_id INTEGER PRIMARY KEY)")
+        self.__cur.execute("DROP TRIGGER IF EXISTS events_fts_ai")
+        self.__cur.execute("DROP TRIGGER IF EXISTS events_fts_au")
+        self.__cur.execute("""
+            CREATE TRIGGER events_fts_ai AFTER INSERT ON events BEGIN
+                INSERT OR IGNORE INTO events_fts_pending (event_id) VALUES (new.id);
+            END
+        """)
+        self.__cur.execute("""
+            CREATE TRIGGER events_fts_au AFTER UPDATE OF title, description, location, analysis ON events BEGIN
+                INSERT OR IGNORE INTO events_fts_pending (event_id) VALUES (new.id);
+            END
+        """)
+
+    @staticmethod
+    def _fts_row(row) -> tuple:
+        try:
+            themes = json.loads(row['analysis']).get('key_themes') if row['analysis'] else None
+        except (ValueError, TypeError, AttributeError):
+            themes = None
+        if isinstance(themes, list): themes = " ".join(str(theme) for theme in themes)
+        return row['id'], stem_text(row['title']), stem_text(row['description']), stem_text(row['location']), stem_text(themes)
+
+    def _index_pending_events(self) -> int:
+        if not self._fts_enabled: return 0
+        self.__cur.execute("""
+            SELECT e.id, e.title, e.description, e.location, e.analysis
+            FROM events_fts_pending p JOIN events e ON e.id = p.event_id
+        """)
+        rows = [self._fts_row(row) for row in self.__cur.fetchall()]
+        self.__cur.execute("DELETE FROM events_fts WHERE rowid IN (SELECT event_id FROM events_fts_pending)")
+        if rows:
+            self.__cur.executemany("INSERT INTO events_fts (rowid, title, description, location, themes) VALUES (?, ?, ?, ?, ?)", rows)
+        self.__cur.execute("DELETE FROM events_fts_pending")
+        return len(rows)
+
+    def sync_search_index(self) -> int:
+        try:
+            indexed = self._index_pending_events()
+            self.__db.commit()
+            return indexed
+        except Exception as e:
+            self.__db.rollback()
+            logger.error(f"Error syncing search index: {e}")
+            return 0
+
+    def _fts_match(self, keywords: List[str]) -> Union[str, None]:
+        groups = []
+        for keyword in keywords:
+            terms = [f'"{t}"*' if len(t) >= 3 else f'"{t}"' for t in stem_tokens(keyword)]
+            if terms: groups.append("(" + " AND ".join(terms) + ")")
+        return " OR ".join(groups) if groups else None
+
+    def _search_events(self, keywords: List[str], conditions: List[str], params: list, order_by: str, limit: int) -> List[Dict]:
+        query = "SELECT e.* FROM events e"
+        where = list(conditions)
+        params = list(params)
+        match = self._fts_match(keywords) if keywords else None
+
+        if match and self._fts_enabled:
+            query = "SELECT e.* FROM events_fts JOIN events e ON e.id = events_fts.rowid"
+            where.insert(0, "events_fts MATCH ?")
+            params.insert(0, match)
+            order_by = f"bm25(events_fts, {FTS_WEIGHTS}), {order_by}"
+        elif keywords:
+            like = []
+            for kw in keywords:
+                like.append("e.title LIKE ? OR e.description LIKE ?")
+                params.extend([f"%{kw}%", f"%{kw}%"])
+            where.append("(" + " OR ".join(like) + ")")
+
+        if where: query += " WHERE " + " AND ".join(where)
+        query += f" ORDER BY {order_by} LIMIT ?"
+        params.append(limit)
+        self.__cur.execute(query, params)
+        return self._dict_factory(self.__cur.fetchall())
+
+    PAGE_KEYS = {
+        'feed': (("priority", True, "priority", "text"), ("score", True, "score", "int"), ("event_datetime", False, "event_datetime", "dt"), ("id", False, "id", "int")),
+        'priority': (("score", True, "score", "int"), ("id", False, "id", "int")),
+        'partner': (("event_datetime", False, "event_datetime", "dt"), ("id", False, "id", "int")),
+        'my_events': (("COALESCE(e.event_datetime, '')", True, "event_datetime", "dt"), ("e.id", False, "id", "int")),
+        'all_events': (("created_at", True, "created_at", "dt"), ("id", False, "id", "int")),
+        'pending_events': (("created_at", False, "created_at", "dt"), ("id", False, "id", "int")),
+        'pending_users': (("registered_at", False, "registered_at", "dt"), ("id", False, "id", "int")),
+        'pending_regs': (("COALESCE(e.event_datetime, '')", False, "event_datetime", "dt"), ("e.id", False, "id", "int")),
+    }
+
+    def _commit(self):
+        self.__db.commit()
+        self._count_cache.clear()
+
+    @staticmethod
+    def new_record_caches() -> Dict[str, TTLCache]:
+        size = DATABASE_CONFIG.get('record_cache_size', 2048)
+        ttl = DATABASE_CONFIG.get('record_cache_ttl', 300)
+        return {name: TTLCache(size, ttl) for name in ('users', 'admins', 'ranks')}
+
+    @staticmethod
+    def new_query_stats() -> Union[QueryStats, None]:
+        if not DATABASE_CONFIG.get('query_stats', True): return None
+        return QueryStats(DATABASE_CONFIG.get('query_stats_window', 1000), DATABASE_CONFIG.get('slow_query_ms', 100))
+
+    def query_stats(self, top: int = None) -> List[Dict]:
+        return self._query_stats.snapshot(top) if self._query_stats else []
+
+    def _cached_record(self, name: str, key, load: Callable):
+        cache = self._records[name]
+        value = cache.get(key)
+        if value is MISSING:
+            generation = cache.generation
+            value = load()
+            cache.set(key, value, generation)
+        return dict(value) if isinstance(value, dict) else value
+
+    def _forget_user(self, telegram_id: int = None):
+        for name in ('users', 'ranks'):
+            if telegram_id is None: self._records[name].clear()
+            else: self._records[name].invalidate(telegram_id)
+        self._publish_invalidation(('users', 'ranks'), telegram_id)
+
+    def _forget_admin(self, telegram_id: int):
+        self._records['admins'].invalidate(telegram_id)
+        self._publish_invalidation(('admins',), telegram_id)
+
+    def _publish_invalidation(self, names: tuple, key):
+        if not self._publish_invalidations: return
+        try:
+            now = time.time()
+            self.__cur.executemany(
+                "INSERT INTO cache_invalidations (cache, key, created_at) VALUES (?, ?, ?)",
+                [(name, None if key is None else str(key), now) for name in names]
+            )
+            self.__db.commit()
+        except Exception as e:
+            logger.error(f"Error publishing cache invalidation: {e}")
+
+    def get_cache_invalidations(self, after_id: int) -> List[Dict]:
+        try:
+            self.__cur.execute("SELECT id, cache, key FROM cache_invalidations WHERE id > ? ORDER BY id", (after_id,))
+            return self._dict_factory(self.__cur.fetchall())
+        except: return []
+
+    def get_last_invalidation_id(self) -> int:
+        try:
+            self.__cur.execute("SELECT COALESCE(MAX(id), 0) FROM cache_invalidations")
+            return self.__cur.fetchone()[0]
+        except: return 0
+
+    def prune_cache_invalidations(self, keep_seconds: int = 600):
+        try:
+            self.__cur.execute("DELETE FROM cache_invalidations WHERE created_at < ?", (time.time() - keep_seconds,))
+            self.__db.commit()
+        except: pass
+
+    def try_acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        try:
+            self.__cur.execute("""
+                INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE leases.owner = excluded.owner OR leases.expires_at < ?
+            """, (name, owner, now + ttl, now))
+            self.__db.commit()
+            self.__cur.execute("SELECT owner FROM leases WHERE name = ?", (name,))
+            res = self.__cur.fetchone()
+            return bool(res) and res[0] == owner
+        except Exception as e:
+            self.__db.rollback()
+            logger.error(f"Lease error: {e}")
+            return False
+
+    def release_lease(self, name: str, owner: str):
+        try:
+            self.__cur.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+            self.__db.commit()
+        except: pass
+
+    def cache_stats(self) -> Dict[str, dict]:
+        return {name: cache.stats() for name, cache in self._records.items()}
+
+    def _fetch_one(self, query: str, params: tuple = ()) -> Union[Dict, None]:
+        self.__cur.execute(query, params)
+        res = self.__cur.fetchone()
+        return dict(res) if res else None
+
+    def _cached_count(self, query: str, params: tuple = ()) -> int:
+        key = (query, params)
+        now = time.monotonic()
+        cached = self._count_cache.get(key)
+        if cached and cached[1] > now: return cached[0]
+        self.__cur.execute(query, params)
+        res = self.__cur.fetchone()
+        value = res[0] if res else 0
+        self._count_cache[key] = (value, now + COUNT_CACHE_TTL)
+        return value
+
+    @classmethod
+    def page_cursor(cls, kind: str, row: Dict) -> str:
+        values = []
+        for _, _, field, value_type in cls.PAGE_KEYS[kind]:
+            value = row.get(field)
+            value = "" if value is None else str(value)
+            if value_type == "dt" and re.fullmatch(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}", value):
+                value = re.sub(r"\D", "", value)
+            values.append(value)
+        return "|".join(values)
+
+    def _decode_cursor(self, kind: str, cursor: str) -> list:
+        keys = self.PAGE_KEYS[kind]
+        parts = cursor.split("|")
+        if len(parts) != len(keys): raise ValueError(f"Bad cursor for {kind}: {cursor}")
+        values = []
+        for (_, _, _, value_type), value in zip(keys, parts):
+            if value_type == "int": value = int(value)
+            elif value_type == "dt" and re.fullmatch(r"\d{14}", value):
+                value = f"{value[:4]}-{value[4:6]}-{value[6:8]} {value[8:10]}:{value[10:12]}:{value[12:]}"
+            values.append(value)
+        return values
+
+    def _paginate(self, kind: str, select: str, where: List[str], params: list, page: int, limit: int,
+                  cursor: str = None, backward: bool = False, group_by: str = "") -> List[Dict]:
+        keys = self.PAGE_KEYS[kind]
+
+        def order(reverse: bool) -> str:
+            return ", ".join(f"{expr} {'DESC' if desc != reverse else 'ASC'}" for expr, desc, _, _ in keys)
+
+        def run(conditions: list, values: list, reverse: bool, offset: int, count: int) -> List[Dict]:
+            query = select
+            if conditions: query += " WHERE " + " AND ".join(conditions)
+            query += f"{group_by} ORDER BY {order(reverse)} LIMIT ? OFFSET ?"
+            self.__cur.execute(query, values + [count, offset])
+            return self._dict_factory(self.__cur.fetchall())
+
+        if cursor:
+            try:
+                bound = self._decode_cursor(kind, cursor)
+            except ValueError:
+                bound = None
+            if bound is not None:
+                rows = []
+                # Rows that tie on a longer key prefix come first, so each branch is a separate index seek.
+                for depth in range(len(keys) - 1, -1, -1):
+                    expr, desc = keys[depth][0], keys[depth][1]
+                    conditions = list(where) + [f"{keys[i][0]} = ?" for i in range(depth)]
+                    conditions.append(f"{expr} {'<' if desc != backward else '>'} ?")
+                    rows.extend(run(conditions, list(params) + bound[:depth + 1], backward, 0, limit - len(rows)))
+                    if len(rows) >= limit: break
+                if rows:
+                    if backward: rows.reverse()
+                    return rows
+
+        return run(list(where), list(params), False, page * limit, limit)
 
     def _dict_factory(self, rows) -> List[Dict]:
         if not rows: return []
@@ -102,7 +643,9 @@ class FDataBase:
                 return [dict(zip(columns, row)) for row in rows]
         except: return []
 
-    def _get_position_rank(self, position: str) -> int:
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _get_position_rank(position: str) -> int:
         if not position: return 1
         pos = position.lower().strip()
         if any(x in pos for x in ['директор', 'гендиректор', 'ceo']): return 5
@@ -112,34 +655,82 @@ class FDataBase:
         return 1
 
     def _get_user_rank(self, telegram_id: int) -> int:
-        user = self.get_user(telegram_id)
-        return self._get_position_rank(user['position']) if user else 1
+        def load():
+            user = self.get_user(telegram_id)
+            return self._get_position_rank(user['position']) if user else 1
+        return self._cached_record('ranks', telegram_id, load)
 
     def get_active_sources(self) -> List[Dict]:
         try:
-            self.__cur.execute("SELECT * FROM sources WHERE is_active = 1")
-            return self._dict_factory(self.__cur.fetchall())
+            self.__cur.execute("""
+                SELECT s.*, c.etag AS crawl_etag, c.last_modified AS crawl_last_modified,
+                       c.content_hash AS crawl_hash, c.signature AS crawl_signature, c.item_urls AS crawl_item_urls
+                FROM sources s
+                LEFT JOIN source_crawl_state c ON c.source_id = s.id
+                WHERE s.is_active = 1
+            """)
+            sources = self._dict_factory(self.__cur.fetchall())
+            for source in sources:
+                source['crawl_item_urls'] = json.loads(source['crawl_item_urls']) if source['crawl_item_urls'] else []
+            return sources
         except: return []
 
+    def save_crawl_states(self, states: List[Dict]) -> int:
+        if not states: return 0
+        try:
+            self.__cur.executemany("""
+                INSERT INTO source_crawl_state (source_id, etag, last_modified, content_hash, signature, item_urls, checked_at, changed_at)
+                VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+                ON CONFLICT(source_id) DO UPDATE SET
+                    etag = excluded.etag,
+                    last_modified = excluded.last_modified,
+                    content_hash = excluded.content_hash,
+                    signature = excluded.signature,
+                    item_urls = excluded.item_urls,
+                    checked_at = excluded.checked_at,
+                    changed_at = CASE WHEN source_crawl_state.content_hash IS excluded.content_hash
+                                      THEN source_crawl_state.changed_at ELSE excluded.changed_at END
+            """, [(
+                state['source_id'], state.get('etag'), state.get('last_modified'), state.get('content_hash'),
+                state.get('signature'), json.dumps(state.get('item_urls') or [], ensure_ascii=False)
+            ) for state in states])
+            self._commit()
+            return len(states)
+        except Exception as e:
+            logger.error(f"Error saving crawl states: {e}")
+            return 0
+
     def add_source(self, name: str, url: str, base_url: str) -> bool:
         try:
             self.__cur.execute("INSERT INTO sources (name, url, base_url) VALUES (?, ?, ?)", (name, url, base_url))
-            self.__db.commit()
+            self._commit()
             return True
         except: return False
 
+    def update_source_profile(self, source_id: int, profile: Dict) -> bool:
+        try:
+            assignments = ", ".join(f"{column} = ?" for column in self.PROFILE_COLUMNS)
+            self.__cur.execute(
+                f"UPDATE sources SET {assignments}, profile_updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+                [(profile or {}).get(column) for column in self.PROFILE_COLUMNS] + [source_id]
+            )
+            self._commit()
+            return self.__cur.rowcount > 0
+        except Exception as e:
+            logger.error(f"Error updating source profile: {e}")
+            return False
+
     def delete_source(self, source_id: int) -> bool:
         try:
+            self.__cur.execute("DELETE FROM source_crawl_state WHERE source_id = ?", (source_id,))
             self.__cur.execute("DELETE FROM sources WHERE id = ?", (source_id,))
-            self.__db.commit()
+            self._commit()
             return True
         except: return False
 
     def get_user(self, telegram_id: int) -> Union[Dict, None]:
         try:
-            self.__cur.execute("SELECT * FROM users WHERE telegram_id = ?", (telegram_id,))
-            res = self.__cur.fetchone()
-            return dict(res) if res else None
+            return self._cached_record('users', telegram_id, lambda: self._fetch_one("SELECT * FROM users WHERE telegram_id = ?", (telegram_id,)))
         except: return None
         
     def get_user_by_id(self, user_id: int) -> Union[Dict, None]:
@@ -152,7 +743,8 @@ class FDataBase:
     def add_user(self, telegram_id: int, username: str, full_name: str = None) -> bool:
         try:
             self.__cur.execute("INSERT OR IGNORE INTO users (telegram_id, username, full_name, status) VALUES (?, ?, ?, 'pending')", (telegram_id, username, full_name))
-            self.__db.commit()
+            self._commit()
+            self._forget_user(telegram_id)
             return True
         except: return False
 
@@ -171,16 +763,46 @@ class FDataBase:
             else:
                 return False
                 
-            self.__db.commit()
+            self._commit()
+            self._forget_user(None if user_id else telegram_id)
             return True
         except: return False
         
     def update_user_activity(self, telegram_id: int):
         try:
             self.__cur.execute("UPDATE users SET last_activity = CURRENT_TIMESTAMP WHERE telegram_id = ?", (telegram_id,))
-            self.__db.commit()
+            self._commit()
         except: pass
 
+    def update_users_activity_bulk(self, activity: List[tuple]):
+        if not activity: return
+        try:
+            self.__cur.executemany("UPDATE users SET last_activity = ? WHERE telegram_id = ?", activity)
+            self.__db.commit()
+        except Exception as e:
+            self.__db.rollback()
+            logger.error(f"Error flushing user activity: {e}")
+
+    def ensure_feed_token(self, telegram_id: int) -> Union[str, None]:
+        try:
+            self.__cur.execute("SELECT feed_token FROM users WHERE telegram_id = ?", (telegram_id,))
+            res = self.__cur.fetchone()
+            if not res: return None
+            if res[0]: return res[0]
+            token = secrets.token_urlsafe(18)
+            self.__cur.execute("UPDATE users SET feed_token = ?, feed_updated_at = COALESCE(feed_updated_at, CURRENT_TIMESTAMP) WHERE telegram_id = ?", (token, telegram_id))
+            self.__db.commit()
+            self._forget_user(telegram_id)
+            return token
+        except Exception as e:
+            logger.error(f"Error creating feed token: {e}")
+            return None
+
+    def get_feed_state(self, token: str) -> Union[Dict, None]:
+        try:
+            return self._fetch_one("SELECT id, feed_version, feed_updated_at FROM users WHERE feed_token = ? AND status = 'approved'", (token,))
+        except: return None
+
     def get_user_manager(self, telegram_id: int) -> Union[Dict, None]:
         try:
             self.__cur.execute("SELECT * FROM admins WHERE role IN ('Manager', 'TechSupport') AND is_active = 1 LIMIT 1")
@@ -194,12 +816,40 @@ class FDataBase:
                 INSERT INTO events (title, description, location, date_str, url, analysis, score, priority, required_rank, event_datetime, status, source)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             """, (title, description, location, date_str, url, analysis, score, priority, required_rank, event_datetime, status, source))
-            self.__db.commit()
+            self._index_pending_events()
+            self._commit()
             return True
         except Exception as e:
-            print(f"Error adding event: {e}")
+            self.__db.rollback()
+            logger.error(f"Error adding event: {e}")
             return False
 
+    EVENT_COLUMNS = ('title', 'description', 'location', 'date_str', 'url', 'analysis', 'score', 'priority', 'required_rank', 'event_datetime', 'status', 'source')
+    EVENT_DEFAULTS = {'url': '', 'score': 0, 'priority': 'medium', 'required_rank': 1, 'status': 'new', 'source': 'parser'}
+
+    def add_new_events_bulk(self, events: List[Dict]) -> List[int]:
+        if not events: return []
+        rows = [tuple(ev.get(col, self.EVENT_DEFAULTS.get(col)) for col in self.EVENT_COLUMNS) for ev in events]
+        placeholders = ", ".join("?" * len(self.EVENT_COLUMNS))
+        try:
+            self.__db.commit()
+            self.__cur.execute("BEGIN IMMEDIATE")
+            self.__cur.execute("SELECT COALESCE(MAX(id), 0) FROM events")
+            last_id = self.__cur.fetchone()[0]
+            self.__cur.executemany(
+                f"INSERT INTO events ({', '.join(self.EVENT_COLUMNS)}) VALUES ({placeholders}) ON CONFLICT(url) WHERE url != '' DO NOTHING",
+                rows
+            )
+            self.__cur.execute("SELECT id FROM events WHERE id > ? ORDER BY id", (last_id,))
+            ids = [row[0] for row in self.__cur.fetchall()]
+            self._index_pending_events()
+            self._commit()
+            return ids
+        except Exception as e:
+            self.__db.rollback()
+            logger.error(f"Error adding events in bulk: {e}")
+            return []
+
     def get_event_by_id(self, event_id: int) -> Union[Dict, None]:
         try:
             self.__cur.execute("SELECT * FROM events WHERE id = ?", (event_id,))
@@ -210,89 +860,83 @@ class FDataBase:
     def check_event_exists_by_url(self, url: str) -> bool:
         if not url: return False
         try:
-            self.__cur.execute("SELECT id FROM events WHERE url = ?", (url,))
+            self.__cur.execute("SELECT id FROM events WHERE url = ? AND url != ''", (url,))
             return bool(self.__cur.fetchone())
         except: return False
 
-    def get_events_paginated(self, telegram_id: int, page: int = 0, limit: int = 1, source: str = None) -> List[Dict]:
+    def get_existing_event_urls(self, urls: List[str]) -> set:
+        urls = list({u for u in urls if u})
+        existing = set()
+        try:
+            for i in range(0, len(urls), 500):
+                chunk = urls[i:i + 500]
+                self.__cur.execute(f"SELECT url FROM events WHERE url != '' AND url IN ({', '.join('?' * len(chunk))})", chunk)
+                existing.update(row[0] for row in self.__cur.fetchall())
+        except Exception as e:
+            logger.error(f"Error checking event urls: {e}")
+        return existing
+
+    def get_events_paginated(self, telegram_id: int, page: int = 0, limit: int = 1, source: str = None, cursor: str = None, backward: bool = False) -> List[Dict]:
         try:
             user_rank = self._get_user_rank(telegram_id)
-            offset = page * limit
-            query = "SELECT * FROM events WHERE status = 'approved' AND required_rank <= ? AND (event_datetime IS NOT NULL)"
-            params = [user_rank]
-            if source == 'partner': query += " AND source = 'partner'"
-            else: query += " AND source != 'partner'"
-            query += " ORDER BY priority DESC, score DESC, event_datetime ASC LIMIT ? OFFSET ?"
-            params.extend([limit, offset])
-            self.__cur.execute(query, params)
-            return self._dict_factory(self.__cur.fetchall())
+            where = ["status = 'approved'", "required_rank <= ?", "event_datetime IS NOT NULL"]
+            if source == 'partner': where.append("source = 'partner'")
+            else: where.append("source != 'partner'")
+            return self._paginate('feed', "SELECT * FROM events", where, [user_rank], page, limit, cursor, backward)
         except Exception as e:
-            print(f"Error in get_events_paginated: {e}")
+            logger.error(f"Error in get_events_paginated: {e}")
             return []
 
-    def get_high_priority_events_paginated(self, telegram_id: int, page: int = 0, limit: int = 1) -> List[Dict]:
+    def get_high_priority_events_paginated(self, telegram_id: int, page: int = 0, limit: int = 1, cursor: str = None, backward: bool = False) -> List[Dict]:
         try:
             user_rank = self._get_user_rank(telegram_id)
-            offset = page * limit
-            self.__cur.execute(
-                "SELECT * FROM events WHERE priority = 'high' AND status = 'approved' AND required_rank <= ? AND event_datetime IS NOT NULL ORDER BY score DESC LIMIT ? OFFSET ?",
-                (user_rank, limit, offset)
-            )
-            return self._dict_factory(self.__cur.fetchall())
+            where = ["priority = 'high'", "status = 'approved'", "required_rank <= ?", "event_datetime IS NOT NULL"]
+            return self._paginate('priority', "SELECT * FROM events", where, [user_rank], page, limit, cursor, backward)
         except Exception as e:
-            print(f"Error in get_high_priority_events_paginated: {e}")
+            logger.error(f"Error in get_high_priority_events_paginated: {e}")
             return []
 
     def get_total_priority_events(self, telegram_id: int) -> int:
         try:
             user_rank = self._get_user_rank(telegram_id)
-            self.__cur.execute(
+            return self._cached_count(
                 "SELECT COUNT(*) FROM events WHERE priority = 'high' AND status = 'approved' AND required_rank <= ? AND event_datetime IS NOT NULL",
                 (user_rank,)
             )
-            res = self.__cur.fetchone()
-            return res[0] if res else 0
         except:
             return 0
 
-    def get_partner_events_paginated(self, telegram_id: int, page: int = 0, limit: int = 1) -> List[Dict]:
+    def get_partner_events_paginated(self, telegram_id: int, page: int = 0, limit: int = 1, cursor: str = None, backward: bool = False) -> List[Dict]:
         try:
             user_rank = self._get_user_rank(telegram_id)
-            offset = page * limit
-            self.__cur.execute(
-                "SELECT * FROM events WHERE source = 'partner' AND status = 'approved' AND required_rank <= ? AND event_datetime IS NOT NULL ORDER BY event_datetime ASC LIMIT ? OFFSET ?",
-                (user_rank, limit, offset)
-            )
-            return self._dict_factory(self.__cur.fetchall())
+            where = ["source = 'partner'", "status = 'approved'", "required_rank <= ?", "event_datetime IS NOT NULL"]
+            return self._paginate('partner', "SELECT * FROM events", where, [user_rank], page, limit, cursor, backward)
         except Exception as e:
-            print(f"Error in get_partner_events_paginated: {e}")
+            logger.error(f"Error in get_partner_events_paginated: {e}")
             return []
 
     def get_total_partner_events(self, telegram_id: int) -> int:
         try:
             user_rank = self._get_user_rank(telegram_id)
-            self.__cur.execute(
+            return self._cached_count(
                 "SELECT COUNT(*) FROM events WHERE source = 'partner' AND status = 'approved' AND required_rank <= ? AND event_datetime IS NOT NULL",
                 (user_rank,)
             )
-            res = self.__cur.fetchone()
-            return res[0] if res else 0
         except:
             return 0
 
-    def get_user_events_paginated(self, telegram_id: int, page: int = 0, limit: int = 1) -> List[Dict]:
+    def get_user_events_paginated(self, telegram_id: int, page: int = 0, limit: int = 1, cursor: str = None, backward: bool = False) -> List[Dict]:
         try:
             user = self.get_user(telegram_id)
             if not user:
                 return []
-            offset = page * limit
-            self.__cur.execute(
-                "SELECT e.*, ue.status, ue.registration_date FROM events e JOIN user_events ue ON e.id = ue.event_id WHERE ue.user_id = ? ORDER BY e.event_datetime DESC LIMIT ? OFFSET ?",
-                (user['id'], limit, offset)
+            return self._paginate(
+                'my_events',
+                "SELECT e.*, ue.status, ue.registration_date FROM events e JOIN user_events ue ON e.id = ue.event_id",
+                ["ue.user_id = ?"], [user['id']], page, limit, cursor, backward
             )
-            return self._dict_factory(self.__cur.fetchall())
         except Exception as e:
-            print(f"Error in get_user_events_paginated: {e}")
+            logger.error(f"Error in get_user_events_paginated: {e}")
             return []
 
     def get_total_user_events(self, telegram_id: int) -> int:
@@ -300,12 +944,7 @@ class FDataBase:
             user = self.get_user(telegram_id)
             if not user:
                 return 0
-            self.__cur.execute(
-                "SELECT COUNT(*) FROM user_events WHERE user_id = ?",
-                (user['id'],)
-            )
-            res = self.__cur.fetchone()
-            return res[0] if res else 0
+            return self._cached_count("SELECT COUNT(*) FROM user_events WHERE user_id = ?", (user['id'],))
         except:
             return 0
 
@@ -325,9 +964,7 @@ class FDataBase:
 
     def get_admin(self, telegram_id: int) -> Union[Dict, None]:
         try:
-            self.__cur.execute("SELECT * FROM admins WHERE telegram_id = ?", (telegram_id,))
-            res = self.__cur.fetchone()
-            return dict(res) if res else None
+            return self._cached_record('admins', telegram_id, lambda: self._fetch_one("SELECT * FROM admins WHERE telegram_id = ?", (telegram_id,)))
         except: return None
         
     def get_admins_by_notification(self, day_of_week: str, time_str: str) -> List[Dict]:
@@ -336,6 +973,12 @@ class FDataBase:
             return self._dict_factory(self.__cur.fetchall())
         except: return []
         
+    def get_notification_schedule(self) -> List[Dict]:
+        try:
+            self.__cur.execute("SELECT telegram_id, role, notification_day, notification_time FROM admins WHERE notification_time IS NOT NULL AND is_active = 1")
+            return self._dict_factory(self.__cur.fetchall())
+        except: return []
+
     def get_admins_by_time(self, time_str: str) -> List[Dict]:
         try:
             self.__cur.execute("SELECT * FROM admins WHERE notification_time = ? AND is_active = 1", (time_str,))
@@ -345,33 +988,31 @@ class FDataBase:
     def update_admin_notification(self, telegram_id: int, day: str, time: str):
         try:
             self.__cur.execute("UPDATE admins SET notification_day = ?, notification_time = ? WHERE telegram_id = ?", (day, time, telegram_id))
-            self.__db.commit()
+            self._commit()
+            self._forget_admin(telegram_id)
         except: pass
 
-    def get_pending_events_paginated(self, page: int = 0, limit: int = 1) -> List[Dict]:
+    def get_pending_events_paginated(self, page: int = 0, limit: int = 1, cursor: str = None, backward: bool = False) -> List[Dict]:
         try:
-            offset = page * limit
-            self.__cur.execute("SELECT * FROM events WHERE status IN ('new', 'pending') ORDER BY created_at ASC LIMIT ? OFFSET ?", (limit, offset))
-            return self._dict_factory(self.__cur.fetchall())
+            return self._paginate('pending_events', "SELECT * FROM events", ["status IN ('new', 'pending')"], [], page, limit, cursor, backward)
         except: return []
 
     def get_total_pending_events_count(self) -> int:
         try:
-            self.__cur.execute("SELECT COUNT(*) FROM events WHERE status IN ('new', 'pending')")
-            res = self.__cur.fetchone()
-            return res[0] if res else 0
+            return self._cached_count("SELECT COUNT(*) FROM events WHERE status IN ('new', 'pending')")
         except: return 0
 
     def update_status(self, event_id: int, status: str):
         try:
             self.__cur.execute("UPDATE events SET status = ? WHERE id = ?", (status, event_id))
-            self.__db.commit()
+            self._commit()
         except: pass
 
     def delete_event(self, event_id: int):
         try:
             self.__cur.execute("DELETE FROM events WHERE id = ?", (event_id,))
-            self.__db.commit()
+            self.__cur.execute("DELETE FROM ics_artifacts WHERE event_id = ?", (event_id,))
+            self._commit()
         except: pass
 
     def update_event(self, event_id: int, **kwargs) -> bool:
@@ -380,49 +1021,61 @@ class FDataBase:
         values = list(kwargs.values())
         values.append(event_id)
         try:
-            self.__cur.execute(f"UPDATE events SET {columns} WHERE id = ?", values)
-            self.__db.commit()
+            self.__cur.execute(f"UPDATE events SET {columns}, version = COALESCE(version, 1) + 1 WHERE id = ?", values)
+            self.__cur.execute("DELETE FROM ics_artifacts WHERE event_id = ?", (event_id,))
+            self._index_pending_events()
+            self._commit()
             return True
         except: return False
         
-    def get_all_events_paginated(self, page: int = 0, limit: int = 1) -> List[Dict]:
+    def get_ics_artifact(self, event_id: int, version: int) -> Union[Dict, None]:
         try:
-            offset = page * limit
-            self.__cur.execute("SELECT * FROM events ORDER BY created_at DESC LIMIT ? OFFSET ?", (limit, offset))
-            return self._dict_factory(self.__cur.fetchall())
+            return self._fetch_one("SELECT * FROM ics_artifacts WHERE event_id = ? AND version = ?", (event_id, version))
+        except: return None
+
+    def save_ics_artifact(self, event_id: int, version: int, file_name: str, content: bytes):
+        try:
+            self.__cur.execute(
+                "INSERT OR REPLACE INTO ics_artifacts (event_id, version, file_name, content) VALUES (?, ?, ?, ?)",
+                (event_id, version, file_name, content)
+            )
+            self.__db.commit()
+        except Exception as e:
+            logger.error(f"Error saving ICS artifact: {e}")
+
+    def set_ics_file_id(self, event_id: int, version: int, file_id: str):
+        try:
+            self.__cur.execute("UPDATE ics_artifacts SET file_id = ? WHERE event_id = ? AND version = ?", (file_id, event_id, version))
+            self.__db.commit()
+        except: pass
+
+    def get_all_events_paginated(self, page: int = 0, limit: int = 1, cursor: str = None, backward: bool = False) -> List[Dict]:
+        try:
+            return self._paginate('all_events', "SELECT * FROM events", [], [], page, limit, cursor, backward)
         except: return []
 
     def get_total_events_count(self) -> int:
         try:
-            self.__cur.execute("SELECT COUNT(*) FROM events")
-            res = self.__cur.fetchone()
-            return res[0] if res else 0
+            return self._cached_count("SELECT COUNT(*) FROM events")
         except: return 0
         
     def search_all_events_by_keywords(self, keywords: List[str], limit: int = 20) -> List[Dict]:
         try:
-            query = "SELECT * FROM events WHERE (1=0"
-            params = []
-            for k in keywords:
-                query += " OR title LIKE ? OR description LIKE ?"
-                params.extend([f"%{k}%", f"%{k}%"])
-            query += ") ORDER BY created_at DESC LIMIT ?"
-            params.append(limit)
-            self.__cur.execute(query, params)
-            return self._dict_factory(self.__cur.fetchall())
+            if not keywords: return []
+            return self._search_events(keywords, [], [], "e.created_at DESC", limit)
         except: return []
     
     def add_user_event(self, user_id: int, event_id: int) -> bool:
         try:
             self.__cur.execute("INSERT INTO user_events (user_id, event_id, status) VALUES (?, ?, 'pending')", (user_id, event_id))
-            self.__db.commit()
+            self._commit()
             return True
         except: return False
 
     def remove_user_event(self, user_id: int, event_id: int) -> bool:
         try:
             self.__cur.execute("DELETE FROM user_events WHERE user_id = ? AND event_id = ?", (user_id, event_id))
-            self.__db.commit()
+            self._commit()
             return True
         except: return False
 
@@ -439,19 +1092,23 @@ class FDataBase:
             return self._dict_factory(self.__cur.fetchall())
         except: return []
 
-    def get_events_with_pending_registrations(self, page: int = 0, limit: int = 1) -> List[Dict]:
+    def get_pending_registrations_count(self) -> int:
         try:
-            offset = page * limit
-            query = "SELECT e.id, e.title, e.date_str, COUNT(ue.user_id) as pending_count FROM events e JOIN user_events ue ON e.id = ue.event_id WHERE ue.status = 'pending' GROUP BY e.id ORDER BY e.event_datetime ASC LIMIT ? OFFSET ?"
-            self.__cur.execute(query, (limit, offset))
-            return self._dict_factory(self.__cur.fetchall())
+            return self._cached_count("SELECT COUNT(*) FROM user_events ue JOIN events e ON ue.event_id = e.id JOIN users u ON ue.user_id = u.id WHERE ue.status = 'pending'")
+        except: return 0
+
+    def get_events_with_pending_registrations(self, page: int = 0, limit: int = 1, cursor: str = None, backward: bool = False) -> List[Dict]:
+        try:
+            return self._paginate(
+                'pending_regs',
+                "SELECT e.id, e.title, e.date_str, e.event_datetime, COUNT(ue.user_id) as pending_count FROM events e JOIN user_events ue ON e.id = ue.event_id",
+                ["ue.status = 'pending'"], [], page, limit, cursor, backward, group_by=" GROUP BY e.id"
+            )
         except: return []
         
     def get_total_events_with_pending_regs(self) -> int:
         try:
-            self.__cur.execute("SELECT COUNT(DISTINCT event_id) FROM user_events WHERE status = 'pending'")
-            res = self.__cur.fetchone()
-            return res[0] if res else 0
+            return self._cached_count("SELECT COUNT(DISTINCT event_id) FROM user_events WHERE status = 'pending'")
         except: return 0
 
     def approve_all_event_registrations(self, event_id: int) -> List[Dict]:
@@ -460,7 +1117,7 @@ class FDataBase:
             self.__cur.execute(query, (event_id,))
             users = self._dict_factory(self.__cur.fetchall())
             self.__cur.execute("UPDATE user_events SET status = 'approved' WHERE event_id = ? AND status = 'pending'", (event_id,))
-            self.__db.commit()
+            self._commit()
             return users
         except: return []
 
@@ -470,21 +1127,21 @@ class FDataBase:
             self.__cur.execute(query, (event_id,))
             users = self._dict_factory(self.__cur.fetchall())
             self.__cur.execute("DELETE FROM user_events WHERE event_id = ? AND status = 'pending'", (event_id,))
-            self.__db.commit()
+            self._commit()
             return users
         except: return []
 
     def approve_registration(self, user_id: int, event_id: int) -> bool:
         try:
             self.__cur.execute("UPDATE user_events SET status = 'approved' WHERE user_id = ? AND event_id = ?", (user_id, event_id))
-            self.__db.commit()
+            self._commit()
             return True
         except: return False
 
     def reject_registration(self, user_id: int, event_id: int) -> bool:
         try:
             self.__cur.execute("DELETE FROM user_events WHERE user_id = ? AND event_id = ?", (user_id, event_id))
-            self.__db.commit()
+            self._commit()
             return True
         except: return False
 
@@ -500,50 +1157,51 @@ class FDataBase:
             return self._dict_factory(self.__cur.fetchall())
         except: return []
 
-    def get_pending_users_paginated(self, page: int = 0, limit: int = 1) -> List[Dict]:
+    def get_pending_users_paginated(self, page: int = 0, limit: int = 1, cursor: str = None, backward: bool = False) -> List[Dict]:
         try:
-            offset = page * limit
-            self.__cur.execute("SELECT * FROM users WHERE status = 'pending' ORDER BY registered_at ASC LIMIT ? OFFSET ?", (limit, offset))
-            return self._dict_factory(self.__cur.fetchall())
+            return self._paginate('pending_users', "SELECT * FROM users", ["status = 'pending'"], [], page, limit, cursor, backward)
         except: return []
 
     def get_total_pending_users_count(self) -> int:
         try:
-            self.__cur.execute("SELECT COUNT(*) FROM users WHERE status = 'pending'")
-            res = self.__cur.fetchone()
-            return res[0] if res else 0
+            return self._cached_count("SELECT COUNT(*) FROM users WHERE status = 'pending'")
         except: return 0
 
     def approve_user(self, user_id: int) -> bool:
         try:
             self.__cur.execute("UPDATE users SET status = 'approved' WHERE id = ?", (user_id,))
-            self.__db.commit()
+            self._commit()
+            self._forget_user()
             return True
         except: return False
 
     def reject_user(self, user_id: int) -> bool:
         try:
             self.__cur.execute("DELETE FROM users WHERE id = ?", (user_id,))
-            self.__db.commit()
+            self._commit()
+            self._forget_user()
             return True
         except: return False
 
     def force_approve_user(self, telegram_id: int):
         try:
             self.__cur.execute("UPDATE users SET status = 'approved' WHERE telegram_id = ?", (telegram_id,))
-            self.__db.commit()
+            self._commit()
+            self._forget_user(telegram_id)
         except: pass
 
     def add_admin(self, telegram_id: int, username: str, role: str):
         try:
             self.__cur.execute("INSERT OR REPLACE INTO admins (telegram_id, username, role, is_active) VALUES (?, ?, ?, 1)", (telegram_id, username, role))
-            self.__db.commit()
+            self._commit()
+            self._forget_admin(telegram_id)
         except: pass
     
     def remove_admin(self, telegram_id: int):
         try:
             self.__cur.execute("DELETE FROM admins WHERE telegram_id = ?", (telegram_id,))
-            self.__db.commit()
+            self._commit()
+            self._forget_admin(telegram_id)
         except: pass
 
     def get_all_admins(self):
@@ -555,7 +1213,8 @@ class FDataBase:
     def update_admin_role(self, telegram_id: int, new_role: str):
         try:
             self.__cur.execute("UPDATE admins SET role = ? WHERE telegram_id = ?", (new_role, telegram_id))
-            self.__db.commit()
+            self._commit()
+            self._forget_admin(telegram_id)
         except: pass
 
     def get_stats(self) -> Dict:
@@ -599,16 +1258,13 @@ class FDataBase:
         
     def search_events_by_keywords(self, telegram_id: int, keywords: List[str], limit: int = 20) -> List[Dict]:
         try:
+            if not keywords: return []
             user_rank = self._get_user_rank(telegram_id)
-            query = "SELECT * FROM events WHERE status = 'approved' AND required_rank <= ? AND event_datetime IS NOT NULL AND (1=0"
-            params = [user_rank]
-            for k in keywords:
-                query += " OR title LIKE ? OR description LIKE ?"
-                params.extend([f"%{k}%", f"%{k}%"])
-            query += ") ORDER BY score DESC LIMIT ?"
-            params.append(limit)
-            self.__cur.execute(query, params)
-            return self._dict_factory(self.__cur.fetchall())
+            return self._search_events(
+                keywords,
+                ["e.status = 'approved'", "e.required_rank <= ?", "e.event_datetime IS NOT NULL"],
+                [user_rank], "e.score DESC", limit
+            )
         except: return []
         
     def get_user_stats(self, user_id: int) -> Dict:
@@ -630,67 +1286,43 @@ class FDataBase:
             query = "SELECT COUNT(*) FROM events WHERE status = 'approved' AND (event_datetime >= datetime('now') OR event_datetime IS NULL)"
             if source_filter == 'main': query += " AND source != 'partner'"
             elif source_filter == 'partner': query += " AND source = 'partner'"
-            self.__cur.execute(query)
-            res = self.__cur.fetchone()
-            return res[0] if res else 0
+            return self._cached_count(query)
         except: return 0
 
     def search_events_with_filters(self, telegram_id: int, keywords: list, date_filter: str = None, priority_filter: str = None) -> List[Dict]:
         try:
             user_rank = self._get_user_rank(telegram_id)
-            query = "SELECT * FROM events WHERE status = 'approved' AND required_rank <= ? AND event_datetime IS NOT NULL"
-            params = [user_rank]
-            
-            if keywords:
-                query += " AND (1=0"
-                for kw in keywords:
-                    query += " OR title LIKE ? OR description LIKE ?"
-                    params.extend([f"%{kw}%", f"%{kw}%"])
-                query += ")"
+            conditions = ["e.status = 'approved'", "e.required_rank <= ?", "e.event_datetime IS NOT NULL"]
             
             if date_filter == "week":
-                query += " AND event_datetime BETWEEN datetime('now') AND datetime('now', '+7 days')"
+                conditions.append("e.event_datetime BETWEEN datetime('now') AND datetime('now', '+7 days')")
             
             if priority_filter == "high":
-                query += " AND priority = 'high'"
+                conditions.append("e.priority = 'high'")
             
-            query += " ORDER BY priority DESC, score DESC, event_datetime ASC LIMIT 50"
-            
-            self.__cur.execute(query, params)
-            return self._dict_factory(self.__cur.fetchall())
+            return self._search_events(keywords, conditions, [user_rank], "e.priority DESC, e.score DESC, e.event_datetime ASC", 50)
         except Exception as e:
-            print(f"Error in search_events_with_filters: {e}")
+            logger.error(f"Error in search_events_with_filters: {e}")
             return []
 
     def search_admin_events_with_filters(self, keywords: list, status_filter: str = None, source_filter: str = None, limit: int = 20) -> List[Dict]:
         try:
-            query = "SELECT * FROM events WHERE 1=1"
+            conditions = []
             params = []
             
-            if keywords:
-                query += " AND (1=0"
-                for kw in keywords:
-                    query += " OR title LIKE ? OR description LIKE ?"
-                    params.extend([f"%{kw}%", f"%{kw}%"])
-                query += ")"
-            
             if status_filter:
                 if status_filter == "approved":
-                    query += " AND status = 'approved'"
+                    conditions.append("e.status = 'approved'")
                 elif status_filter in ["pending", "new"]:
-                    query += " AND (status = 'pending' OR status = 'new')"
+                    conditions.append("e.status IN ('pending', 'new')")
             
             if source_filter:
-                query += " AND source = ?"
+                conditions.append("e.source = ?")
                 params.append(source_filter)
             
-            query += " ORDER BY created_at DESC LIMIT ?"
-            params.append(limit)
-            
-            self.__cur.execute(query, params)
-            return self._dict_factory(self.__cur.fetchall())
+            return self._search_events(keywords, conditions, params, "e.created_at DESC", limit)
         except Exception as e:
-            print(f"Error in search_admin_events_with_filters: {e}")
+            logger.error(f"Error in search_admin_events_with_filters: {e}")
             return []
     def get_pending_registrations_for_event(self, event_id: int) -> List[Dict]:
         try:
@@ -715,4 +1347,226 @@ class FDataBase:
             self.__cur.execute(query, (event_id,))
             return self._dict_factory(self.__cur.fetchall())
         except Exception as e:
-            return []
\ No newline at end of file
+            return []
+
+    def enqueue_messages(self, items: List[Dict]) -> int:
+        if not items: return 0
+        documents, digests, rows = {}, {}, []
+        for item in items:
+            content, key = item.get('document'), None
+            if content is not None:
+                key = digests.get(id(content))
+                if key is None:
+                    key = digests[id(content)] = hashlib.sha1(content).hexdigest()
+                    documents[key] = content
+            rows.append((item['chat_id'], item.get('kind', 'message'), json.dumps(item.get('payload', {}), ensure_ascii=False),
+                         key, item.get('dedupe_key')))
+        try:
+            before = self.__db.total_changes
+            if documents:
+                self.__cur.executemany("INSERT OR IGNORE INTO outbox_documents (key, content) VALUES (?, ?)", list(documents.items()))
+                before = self.__db.total_changes
+            self.__cur.executemany("""
+                INSERT INTO outbox (chat_id, kind, payload, document_key, dedupe_key) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(dedupe_key) WHERE status IN ('pending', 'sending') DO NOTHING
+            """, rows)
+            self.__db.commit()
+            return self.__db.total_changes - before
+        except Exception as e:
+            self.__db.rollback()
+            logger.error(f"Error enqueueing messages: {e}")
+            return 0
+
+    def get_outbox_document(self, key: str) -> Union[Dict, None]:
+        try:
+            return self._fetch_one("SELECT content, file_id FROM outbox_documents WHERE key = ?", (key,))
+        except: return None
+
+    def set_outbox_document_file_id(self, key: str, file_id: str):
+        try:
+            self.__cur.execute("UPDATE outbox_documents SET file_id = ? WHERE key = ?", (file_id, key))
+            self.__db.commit()
+        except: pass
+
+    def claim_outbox(self, limit: int = 50) -> List[Dict]:
+        try:
+            self.__cur.execute("SELECT * FROM outbox WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY next_attempt_at, id LIMIT ?", (time.time(), limit))
+            rows = self._dict_factory(self.__cur.fetchall())
+            if rows:
+                self.__cur.executemany("UPDATE outbox SET status = 'sending', attempts = attempts + 1 WHERE id = ?", [(row['id'],) for row in rows])
+                self.__db.commit()
+            for row in rows:
+                row['payload'] = json.loads(row['payload'])
+            return rows
+        except Exception as e:
+            self.__db.rollback()
+            logger.error(f"Error claiming outbox: {e}")
+            return []
+
+    def mark_outbox_sent(self, ids: List[int]):
+        if not ids: return
+        try:
+            self.__cur.executemany("UPDATE outbox SET status = 'sent', document = NULL, last_error = NULL WHERE id = ?", [(i,) for i in ids])
+            self.__db.commit()
+        except Exception as e:
+            self.__db.rollback()
+            logger.error(f"Error marking outbox: {e}")
+
+    def mark_outbox_retry(self, outbox_id: int, delay: float, error: str, count_attempt: bool = True):
+        try:
+            self.__cur.execute(
+                f"UPDATE outbox SET status = 'pending', next_attempt_at = ?, last_error = ?{'' if count_attempt else ', attempts = attempts - 1'} WHERE id = ?",
+                (time.time() + delay, error, outbox_id)
+            )
+            self.__db.commit()
+        except: pass
+
+    def mark_outbox_failed(self, outbox_id: int, error: str):
+        try:
+            self.__cur.execute("UPDATE outbox SET status = 'failed', document = NULL, last_error = ? WHERE id = ?", (error, outbox_id))
+            self.__db.commit()
+        except: pass
+
+    def reset_outbox(self, keep_days: int = 7):
+        try:
+            self.__cur.execute("UPDATE outbox SET status = 'pending' WHERE status = 'sending'")
+            self.__cur.execute("DELETE FROM outbox WHERE status IN ('sent', 'failed') AND created_at < datetime('now', ?)", (f"-{keep_days} days",))
+            self.__cur.execute("DELETE FROM outbox_documents WHERE key NOT IN (SELECT document_key FROM outbox WHERE document_key IS NOT NULL)")
+            self.__db.commit()
+        except Exception as e:
+            logger.error(f"Error resetting outbox: {e}")
+
+class AsyncFDataBase:
+    def __init__(self, path: str, readers: int = None, shared_cache: bool = False):
+        self.path = path
+        self.shared_cache = shared_cache
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._count_cache = {}
+        self._record_caches = FDataBase.new_record_caches()
+        self._query_stats = FDataBase.new_query_stats()
+        self._pending_activity = {}
+        self._flush_interval = DATABASE_CONFIG.get('write_flush_interval', 15)
+        self._flusher = None
+        self._invalidation_poller = None
+        self._invalidation_listeners = {}
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._readers = ThreadPoolExecutor(max_workers=readers or min(8, (os.cpu_count() or 1) + 2), thread_name_prefix="db-reader")
+        self._writer.submit(self._thread_db, False).result()
+
+    def _connect(self, read_only: bool) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=30000")
+        if read_only: conn.execute("PRAGMA query_only=ON")
+        with self._connections_lock:
+            self._connections.append(conn)
+        return conn
+
+    def _thread_db(self, read_only: bool) -> FDataBase:
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = self._local.db = FDataBase(self._connect(read_only), init_schema=not read_only,
+                                             count_cache=self._count_cache, record_caches=self._record_caches,
+                                             publish_invalidations=self.shared_cache, query_stats=self._query_stats)
+        return db
+
+    def _call(self, read_only: bool, name: str, args: tuple, kwargs: dict):
+        return getattr(self._thread_db(read_only), name)(*args, **kwargs)
+
+    def __getattr__(self, name: str):
+        if name.startswith('_') or not callable(getattr(FDataBase, name, None)):
+            raise AttributeError(name)
+        read_only = name.startswith(READ_PREFIXES)
+        executor = self._readers if read_only else self._writer
+
+        async def call(*args, **kwargs):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, functools.partial(self._call, read_only, name, args, kwargs))
+
+        call.__name__ = name
+        setattr(self, name, call)
+        return call
+
+    async def update_user_activity(self, telegram_id: int):
+        self._pending_activity[telegram_id] = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+    def _take_pending_writes(self) -> List[tuple]:
+        pending, self._pending_activity = self._pending_activity, {}
+        return [(stamp, telegram_id) for telegram_id, stamp in pending.items()]
+
+    async def flush_writes(self):
+        activity = self._take_pending_writes()
+        if activity:
+            await self.update_users_activity_bulk(activity)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush_writes()
+            except Exception as e:
+                logger.error(f"Write-behind flush error: {e}")
+
+    def add_invalidation_listener(self, cache: str, callback: Callable):
+        self._invalidation_listeners.setdefault(cache, []).append(callback)
+
+    def _apply_invalidation(self, cache: str, key):
+        records = self._record_caches.get(cache)
+        if records is not None:
+            if key is None: records.clear()
+            else:
+                try: records.invalidate(int(key))
+                except ValueError: records.invalidate(key)
+        for callback in self._invalidation_listeners.get(cache, ()):
+            callback(key)
+
+    async def _invalidation_loop(self):
+        interval = DATABASE_CONFIG.get('invalidation_poll_interval', 1.0)
+        last_id = await self.get_last_invalidation_id()
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                for row in await self.get_cache_invalidations(last_id):
+                    self._apply_invalidation(row['cache'], row['key'])
+                    last_id = row['id']
+            except Exception as e:
+                logger.error(f"Cache invalidation poll error: {e}")
+
+    def start(self):
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_loop())
+        if self.shared_cache and self._invalidation_poller is None:
+            self._invalidation_poller = asyncio.create_task(self._invalidation_loop())
+
+    def page_cursor(self, kind: str, row: Dict) -> str:
+        return FDataBase.page_cursor(kind, row)
+
+    def _get_position_rank(self, position: str) -> int:
+        return FDataBase._get_position_rank(position)
+
+    def cache_stats(self) -> Dict[str, dict]:
+        return {name: cache.stats() for name, cache in self._record_caches.items()}
+
+    def query_stats(self, top: int = None) -> List[Dict]:
+        return self._query_stats.snapshot(top) if self._query_stats else []
+
+    def close(self):
+        if self._invalidation_poller:
+            self._invalidation_poller.cancel()
+            self._invalidation_poller = None
+        if self._flusher:
+            self._flusher.cancel()
+            self._flusher = None
+        activity = self._take_pending_writes()
+        if activity:
+            self._writer.submit(self._call, False, 'update_users_activity_bulk', (activity,), {}).result()
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        with self._connections_lock:
+            for conn in self._connections:
+                try: conn.close()
+                except Exception: pass
+            self._connections.clear()
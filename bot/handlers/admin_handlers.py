@@ -3,34 +3,31 @@ from aiogram.fsm.context import FSMContext
 from aiogram.types import BufferedInputFile, ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 import json
 import asyncio
+import html
 import csv
 import io
-from datetime import datetime, timedelta
-
-try:
-    import dateparser
-except ImportError:
-    dateparser = None
 
 from utils.keyboards import *
 from utils.states import AdminStates
 from utils.ics_generator import IcsGenerator
-from database import FDataBase
+from utils.dates import parse_date_safe
+from services.analysis_pipeline import AnalysisPipeline
+from database import AsyncFDataBase
 
 router = Router()
 
-def check_access(source, db: FDataBase):
+async def check_access(source, db: AsyncFDataBase):
     try:
         user_id = source.from_user.id
-        admin = db.get_admin(user_id)
+        admin = await db.get_admin(user_id)
         if admin and admin.get('is_active', True):
             return admin
         return None
     except Exception as e:
         return None
 
-def check_callback_access(callback: types.CallbackQuery, db: FDataBase):
-    admin = check_access(callback, db)
+async def check_callback_access(callback: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_access(callback, db)
     if not admin:
         try:
             asyncio.create_task(callback.answer("⛔ У вас нет прав администратора.", show_alert=True))
@@ -39,9 +36,9 @@ def check_callback_access(callback: types.CallbackQuery, db: FDataBase):
         return None
     return admin
 
-async def handle_cancel(message: types.Message, state: FSMContext, db: FDataBase, target_keyboard=None):
+async def handle_cancel(message: types.Message, state: FSMContext, db: AsyncFDataBase, target_keyboard=None):
     await state.clear()
-    admin = db.get_admin(message.from_user.id)
+    admin = await db.get_admin(message.from_user.id)
     if target_keyboard:
         await message.answer("❌ Действие отменено", reply_markup=target_keyboard)
     elif admin:
@@ -49,23 +46,9 @@ async def handle_cancel(message: types.Message, state: FSMContext, db: FDataBase
     else:
         await message.answer("❌ Действие отменено", reply_markup=get_main_keyboard(False))
 
-def parse_date_safe(date_str):
-    if not date_str:
-        return datetime.now()
-    if dateparser:
-        try:
-            dt = dateparser.parse(date_str, languages=['ru', 'en'], settings={'PREFER_DATES_FROM': 'future'})
-            if dt:
-                if dt < datetime.now() - timedelta(days=1):
-                     try: dt = dt.replace(year=datetime.now().year + 1)
-                     except: pass
-                return dt
-        except: pass
-    return datetime.now()
-
 @router.message(lambda msg: msg.text == "⚙️ Админ-панель")
-async def admin_panel(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def admin_panel(message: types.Message, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin:
         await message.answer("⛔ У вас нет доступа к системе управления.")
         return
@@ -81,24 +64,24 @@ async def admin_panel(message: types.Message, db: FDataBase):
     )
 
 @router.message(lambda msg: msg.text == "⬅️ Назад в админку")
-async def back_to_admin_handler_msg(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def back_to_admin_handler_msg(message: types.Message, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin:
         await message.answer("⛔ У вас нет доступа.")
         return
     await admin_panel(message, db)
 
 @router.callback_query(F.data == "back_to_admin")
-async def back_to_admin_handler_cb(callback: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(callback, db)
+async def back_to_admin_handler_cb(callback: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(callback, db)
     if not admin:
         return
     await callback.message.delete()
     await callback.message.answer("⚙️ Админ-панель", reply_markup=get_admin_main_kb(admin.get('role')))
 
 @router.message(lambda msg: msg.text == "⬅️ Главное меню")
-async def back_to_main_menu(message: types.Message, db: FDataBase):
-    admin = db.get_admin(message.from_user.id)
+async def back_to_main_menu(message: types.Message, db: AsyncFDataBase):
+    admin = await db.get_admin(message.from_user.id)
     is_admin = bool(admin)
     await message.answer(
         "🔙 <b>Главное меню</b>",
@@ -107,8 +90,8 @@ async def back_to_main_menu(message: types.Message, db: FDataBase):
     )
 
 @router.message(lambda msg: msg.text == "🔔 Настройка уведомлений")
-async def configure_notifications_start(message: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(message, db)
+async def configure_notifications_start(message: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin or admin.get('role') != 'Manager':
         await message.answer("⛔ Доступ только для Руководителей.")
         return
@@ -122,7 +105,7 @@ async def configure_notifications_start(message: types.Message, state: FSMContex
     )
 
 @router.message(AdminStates.waiting_for_notify_day)
-async def process_notify_day(message: types.Message, state: FSMContext, db: FDataBase):
+async def process_notify_day(message: types.Message, state: FSMContext, db: AsyncFDataBase):
     if message.text == "❌ Отменить":
         await handle_cancel(message, state, db)
         return
@@ -143,7 +126,7 @@ async def process_notify_day(message: types.Message, state: FSMContext, db: FDat
     await message.answer("🕒 Выберите время получения:", reply_markup=get_notification_time_keyboard())
 
 @router.message(AdminStates.waiting_for_notify_time)
-async def process_notify_time(message: types.Message, state: FSMContext, db: FDataBase):
+async def process_notify_time(message: types.Message, state: FSMContext, db: AsyncFDataBase, scheduler):
     if message.text == "❌ Отменить":
         await handle_cancel(message, state, db)
         return
@@ -155,7 +138,8 @@ async def process_notify_time(message: types.Message, state: FSMContext, db: FDa
     data = await state.get_data()
     day_val = data['notify_day']
     
-    db.update_admin_notification(message.from_user.id, day_val, message.text)
+    await db.update_admin_notification(message.from_user.id, day_val, message.text)
+    scheduler.reschedule()
     
     label = message.text
     if day_val == 'every_day': label = f"Каждый день в {message.text}"
@@ -172,13 +156,13 @@ async def process_notify_time(message: types.Message, state: FSMContext, db: FDa
     )
 
 @router.message(lambda msg: msg.text == "📊 Статистика")
-async def show_stats(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def show_stats(message: types.Message, db: AsyncFDataBase, gigachat):
+    admin = await check_access(message, db)
     if not admin:
         await message.answer("⛔ У вас нет доступа.")
         return
     
-    stats = await asyncio.to_thread(db.get_stats)
+    stats = await db.get_stats()
     text = (
         "📊 <b>Статистика системы</b>\n\n"
         f"👥 <b>Пользователи:</b>\n"
@@ -191,20 +175,45 @@ async def show_stats(message: types.Message, db: FDataBase):
         f"• Всего: <b>{stats.get('total_registrations', 0)}</b>\n"
         f"• Ожидают: <b>{stats.get('pending_registrations', 0)}</b>"
     )
+    cache_stats = gigachat.cache_stats()
+    if cache_stats:
+        text += (
+            f"\n\n🧠 <b>Кэш AI-анализа:</b>\n"
+            f"• Попаданий: <b>{cache_stats['hits']}</b> / промахов: <b>{cache_stats['misses']}</b> ({cache_stats['hit_rate']:.0%})\n"
+            f"• Записей: <b>{cache_stats['entries']}</b>"
+        )
+    record_labels = {'users': 'Пользователи', 'admins': 'Админы', 'ranks': 'Ранги'}
+    text += "\n\n🗄 <b>Кэш записей БД:</b>"
+    for name, record_stats in db.cache_stats().items():
+        text += (
+            f"\n• {record_labels.get(name, name)}: <b>{record_stats['hit_rate']:.0%}</b> "
+            f"({record_stats['hits']}/{record_stats['hits'] + record_stats['misses']}, записей {record_stats['entries']}/{record_stats['maxsize']})"
+        )
+    top_queries = db.query_stats(3)
+    if top_queries:
+        text += "\n\n🐢 <b>Самые нагружающие запросы:</b>"
+        for query in top_queries:
+            shape = query['shape'] if len(query['shape']) <= 80 else query['shape'][:77] + "..."
+            text += (
+                f"\n• <code>{html.escape(shape)}</code>\n"
+                f"  {query['calls']} выз., p95 <b>{query['p95_ms']:.1f}</b> мс, всего {query['total_ms']:.0f} мс"
+            )
+            if query['callers']:
+                text += f" ({html.escape(', '.join(query['callers']))})"
     await message.answer(text, parse_mode="HTML")
 
 @router.message(lambda msg: msg.text == "📋 Список мероприятий")
-async def list_events_manager(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def list_events_manager(message: types.Message, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin or admin.get('role') != 'Manager':
         await message.answer("⛔ Доступ только для Руководителей.")
         return
     
     await show_manager_events_list_page(message, db, 0)
 
-async def show_manager_events_list_page(message: types.Message, db: FDataBase, page: int):
-    events = await asyncio.to_thread(db.get_all_events_paginated, page, 1)
-    total = await asyncio.to_thread(db.get_total_events_count)
+async def show_manager_events_list_page(message: types.Message, db: AsyncFDataBase, page: int, cursor: str = None, backward: bool = False):
+    events = await db.get_all_events_paginated(page, 1, cursor, backward)
+    total = await db.get_total_events_count()
     
     if not events:
         await message.answer("📭 Мероприятий пока нет.")
@@ -231,19 +240,19 @@ async def show_manager_events_list_page(message: types.Message, db: FDataBase, p
         f"📝 <b>Описание:</b>\n{event['description'][:300]}..."
     )
     
-    await message.answer(text, parse_mode="HTML", reply_markup=get_manager_events_pagination_keyboard(events, page, max(1, total)))
+    await message.answer(text, parse_mode="HTML", reply_markup=get_manager_events_pagination_keyboard(events, page, max(1, total), db.page_cursor('all_events', event)))
 
-def get_manager_events_pagination_keyboard(events: list, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
+def get_manager_events_pagination_keyboard(events: list, current_page: int, total_pages: int, cursor: str = None) -> InlineKeyboardMarkup:
     buttons = []
     
     nav_buttons = []
     if current_page > 0:
-        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"manager_events_prev_{current_page - 1}"))
+        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=page_callback("manager_events_prev_", current_page - 1, cursor, True)))
     
     nav_buttons.append(InlineKeyboardButton(text=f"{current_page + 1}/{total_pages}", callback_data="ignore"))
     
     if current_page < total_pages - 1:
-        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"manager_events_next_{current_page + 1}"))
+        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=page_callback("manager_events_next_", current_page + 1, cursor)))
     
     if nav_buttons:
         buttons.append(nav_buttons)
@@ -259,29 +268,29 @@ def get_manager_events_pagination_keyboard(events: list, current_page: int, tota
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 @router.callback_query(F.data.startswith("manager_events_prev_"))
-async def manager_events_prev(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def manager_events_prev(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
-    page = int(c.data.split("_")[3])
+    page, cursor, backward = parse_page_callback(c.data, "manager_events_prev_")
     await c.message.delete()
-    await show_manager_events_list_page(c.message, db, page)
+    await show_manager_events_list_page(c.message, db, page, cursor, backward)
 
 @router.callback_query(F.data.startswith("manager_events_next_"))
-async def manager_events_next(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def manager_events_next(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
-    page = int(c.data.split("_")[3])
+    page, cursor, backward = parse_page_callback(c.data, "manager_events_next_")
     await c.message.delete()
-    await show_manager_events_list_page(c.message, db, page)
+    await show_manager_events_list_page(c.message, db, page, cursor, backward)
 
 @router.callback_query(F.data.startswith("manager_event_details_"))
-async def manager_event_details(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def manager_event_details(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     await show_manager_event_detail(c.message, db, int(c.data.split("_")[3]))
 
 async def show_manager_event_detail(message, db, eid):
-    e = db.get_event_by_id(eid)
+    e = await db.get_event_by_id(eid)
     if not e: return
     text = f"📝 <b>{e['title']}</b>\nID: {eid}\n📅 {e['date_str']}\n📍 {e['location']}\n🔗 {e['url']}"
     kb = get_manager_event_detail_keyboard(eid)
@@ -300,29 +309,29 @@ def get_manager_event_detail_keyboard(event_id: int) -> InlineKeyboardMarkup:
     ])
 
 @router.callback_query(F.data == "back_to_manager_events")
-async def back_to_manager_events(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def back_to_manager_events(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     await c.message.delete()
     await show_manager_events_list_page(c.message, db, 0)
 
 @router.message(lambda msg: msg.text == "✅ Утвердить записи")
-async def start_bulk_moderation(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def start_bulk_moderation(message: types.Message, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin:
         await message.answer("⛔ У вас нет доступа.")
         return
     await show_pending_registrations_list(message, db, 0, message.from_user.id)
 
-async def show_pending_registrations_list(message: types.Message, db: FDataBase, page: int, admin_id: int = None):
+async def show_pending_registrations_list(message: types.Message, db: AsyncFDataBase, page: int, admin_id: int = None, cursor: str = None, backward: bool = False):
     if admin_id is None:
         admin_id = message.from_user.id
 
-    events_data = await asyncio.to_thread(db.get_events_with_pending_registrations, page, 5)
-    total = await asyncio.to_thread(db.get_total_events_with_pending_regs)
+    events_data = await db.get_events_with_pending_registrations(page, 5, cursor, backward)
+    total = await db.get_total_events_with_pending_regs()
     
     if not events_data:
-        admin = db.get_admin(admin_id)
+        admin = await db.get_admin(admin_id)
         role = admin.get('role') if admin else 'Manager'
         
         await message.answer("✅ Нет мероприятий с ожидающими записями.", reply_markup=get_admin_main_kb(role))
@@ -341,10 +350,13 @@ async def show_pending_registrations_list(message: types.Message, db: FDataBase,
     await message.answer(
         text, 
         parse_mode="HTML", 
-        reply_markup=get_pending_registrations_list_keyboard(events_data, page, max(1, (total + 4) // 5))
+        reply_markup=get_pending_registrations_list_keyboard(
+            events_data, page, max(1, (total + 4) // 5),
+            db.page_cursor('pending_regs', events_data[0]), db.page_cursor('pending_regs', events_data[-1])
+        )
     )
 
-def get_pending_registrations_list_keyboard(events: list, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
+def get_pending_registrations_list_keyboard(events: list, current_page: int, total_pages: int, prev_cursor: str = None, next_cursor: str = None) -> InlineKeyboardMarkup:
     buttons = []
     
     for event in events:
@@ -357,12 +369,12 @@ def get_pending_registrations_list_keyboard(events: list, current_page: int, tot
     
     nav_buttons = []
     if current_page > 0:
-        nav_buttons.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=f"pending_list_prev_{current_page - 1}"))
+        nav_buttons.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=page_callback("pending_list_prev_", current_page - 1, prev_cursor, True)))
     
     nav_buttons.append(InlineKeyboardButton(text=f"{current_page + 1}/{total_pages}", callback_data="ignore"))
     
     if current_page < total_pages - 1:
-        nav_buttons.append(InlineKeyboardButton(text="➡️ Вперед", callback_data=f"pending_list_next_{current_page + 1}"))
+        nav_buttons.append(InlineKeyboardButton(text="➡️ Вперед", callback_data=page_callback("pending_list_next_", current_page + 1, next_cursor)))
     
     if nav_buttons:
         buttons.append(nav_buttons)
@@ -373,8 +385,8 @@ def get_pending_registrations_list_keyboard(events: list, current_page: int, tot
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 @router.callback_query(F.data.startswith("view_event_registrations_"))
-async def view_event_registrations(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def view_event_registrations(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     
     parts = c.data.split("_")
@@ -383,13 +395,13 @@ async def view_event_registrations(c: types.CallbackQuery, db: FDataBase):
     
     await show_event_registrations_page(c.message, db, event_id, user_page)
 
-async def show_event_registrations_page(message: types.Message, db: FDataBase, event_id: int, user_page: int):
-    event = db.get_event_by_id(event_id)
+async def show_event_registrations_page(message: types.Message, db: AsyncFDataBase, event_id: int, user_page: int):
+    event = await db.get_event_by_id(event_id)
     if not event:
         await message.answer("❌ Мероприятие не найдено.")
         return
     
-    pending_regs = await asyncio.to_thread(db.get_pending_registrations_for_event, event_id)
+    pending_regs = await db.get_pending_registrations_for_event(event_id)
     
     if not pending_regs:
         await message.answer("✅ На этом мероприятии нет ожидающих регистраций.")
@@ -449,13 +461,13 @@ def get_event_registrations_detail_keyboard(event_id: int, current_page: int, to
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 @router.callback_query(F.data.startswith("view_all_users_"))
-async def view_all_users_list(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def view_all_users_list(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     
     event_id = int(c.data.split("_")[3])
-    event = db.get_event_by_id(event_id)
-    pending_regs = await asyncio.to_thread(db.get_pending_registrations_for_event, event_id)
+    event = await db.get_event_by_id(event_id)
+    pending_regs = await db.get_pending_registrations_for_event(event_id)
     
     if not pending_regs:
         await c.answer("❌ Нет ожидающих регистраций")
@@ -501,40 +513,30 @@ async def view_all_users_list(c: types.CallbackQuery, db: FDataBase):
     )
 
 @router.callback_query(F.data.startswith("approve_single_"))
-async def approve_single_user(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def approve_single_user(c: types.CallbackQuery, db: AsyncFDataBase, ics_cache):
+    admin = await check_callback_access(c, db)
     if not admin: return
     
     parts = c.data.split("_")
     user_id = int(parts[2])
     event_id = int(parts[3])
     
-    if db.approve_registration(user_id, event_id):
-        user = db.get_user_by_id(user_id)
-        event = db.get_event_by_id(event_id)
+    if await db.approve_registration(user_id, event_id):
+        user = await db.get_user_by_id(user_id)
+        event = await db.get_event_by_id(event_id)
         
         if user and event:
             try:
-                ics_content = await asyncio.to_thread(
-                    IcsGenerator.generate_ics, 
-                    event['title'], 
-                    event['description'] or "Описание отсутствует",
-                    event['location'] or "Онлайн/Не указано",
-                    event['date_str']
-                )
-                file_name = f"invite_{event['id']}.ics"
-                file = BufferedInputFile(ics_content.encode('utf-8'), filename=file_name)
-                
-                await c.bot.send_document(
+                await ics_cache.send(
+                    c.bot,
                     user['telegram_id'],
-                    document=file,
+                    event,
                     caption=(
                         f"✅ <b>Ваша регистрация подтверждена администратором!</b>\n\n"
                         f"🎯 <b>{event['title']}</b>\n"
                         f"📅 {event['date_str']}\n\n"
                         f"Файл для календаря прикреплен 📎"
-                    ),
-                    parse_mode="HTML"
+                    )
                 )
             except Exception as e:
                 print(f"Ошибка отправки ICS пользователю {user['telegram_id']}: {e}")
@@ -545,17 +547,17 @@ async def approve_single_user(c: types.CallbackQuery, db: FDataBase):
         await c.answer("❌ Ошибка подтверждения")
 
 @router.callback_query(F.data.startswith("reject_single_"))
-async def reject_single_user(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def reject_single_user(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     
     parts = c.data.split("_")
     user_id = int(parts[2])
     event_id = int(parts[3])
     
-    if db.reject_registration(user_id, event_id):
-        user = db.get_user_by_id(user_id)
-        event = db.get_event_by_id(event_id)
+    if await db.reject_registration(user_id, event_id):
+        user = await db.get_user_by_id(user_id)
+        event = await db.get_event_by_id(event_id)
         
         if user and event:
             try:
@@ -572,8 +574,8 @@ async def reject_single_user(c: types.CallbackQuery, db: FDataBase):
     else:
         await c.answer("❌ Ошибка отклонения")
 
-async def update_registrations_view(c: types.CallbackQuery, db: FDataBase, event_id: int):
-    pending_regs = await asyncio.to_thread(db.get_pending_registrations_for_event, event_id)
+async def update_registrations_view(c: types.CallbackQuery, db: AsyncFDataBase, event_id: int):
+    pending_regs = await db.get_pending_registrations_for_event(event_id)
     
     if not pending_regs:
         await c.message.edit_text(
@@ -586,12 +588,12 @@ async def update_registrations_view(c: types.CallbackQuery, db: FDataBase, event
         )
         return
     
-    event = db.get_event_by_id(event_id)
+    event = await db.get_event_by_id(event_id)
     await show_event_registrations_page(c.message, db, event_id, 0)
 
 @router.callback_query(F.data.startswith("event_users_prev_"))
-async def event_users_prev(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def event_users_prev(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     
     parts = c.data.split("_")
@@ -601,8 +603,8 @@ async def event_users_prev(c: types.CallbackQuery, db: FDataBase):
     await show_event_registrations_page(c.message, db, event_id, page)
 
 @router.callback_query(F.data.startswith("event_users_next_"))
-async def event_users_next(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def event_users_next(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     
     parts = c.data.split("_")
@@ -612,34 +614,34 @@ async def event_users_next(c: types.CallbackQuery, db: FDataBase):
     await show_event_registrations_page(c.message, db, event_id, page)
 
 @router.callback_query(F.data.startswith("pending_list_prev_"))
-async def pending_list_prev(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def pending_list_prev(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     
-    page = int(c.data.split("_")[3])
+    page, cursor, backward = parse_page_callback(c.data, "pending_list_prev_")
     await c.message.delete()
-    await show_pending_registrations_list(c.message, db, page, c.from_user.id)
+    await show_pending_registrations_list(c.message, db, page, c.from_user.id, cursor, backward)
 
 @router.callback_query(F.data.startswith("pending_list_next_"))
-async def pending_list_next(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def pending_list_next(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     
-    page = int(c.data.split("_")[3])
+    page, cursor, backward = parse_page_callback(c.data, "pending_list_next_")
     await c.message.delete()
-    await show_pending_registrations_list(c.message, db, page, c.from_user.id)
+    await show_pending_registrations_list(c.message, db, page, c.from_user.id, cursor, backward)
 
 @router.callback_query(F.data == "refresh_pending_list")
-async def refresh_pending_list(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def refresh_pending_list(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     
     await c.message.delete()
     await show_pending_registrations_list(c.message, db, 0, c.from_user.id)
 
 @router.callback_query(F.data.startswith("back_to_pending_list_"))
-async def back_to_pending_list(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def back_to_pending_list(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     
     page = int(c.data.split("_")[3])
@@ -647,42 +649,30 @@ async def back_to_pending_list(c: types.CallbackQuery, db: FDataBase):
     await show_pending_registrations_list(c.message, db, page, c.from_user.id)
 
 @router.callback_query(F.data.startswith("bulk_approve_"))
-async def bulk_approve_handler(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def bulk_approve_handler(c: types.CallbackQuery, db: AsyncFDataBase, broadcast, ics_cache):
+    admin = await check_callback_access(c, db)
     if not admin: return
     
     event_id = int(c.data.split("_")[2])
 
-    approved_users = await asyncio.to_thread(db.approve_all_event_registrations, event_id)
+    approved_users = await db.approve_all_event_registrations(event_id)
     
     await c.answer(f"✅ Утверждено записей: {len(approved_users)}")
     
     if approved_users:
-        event = db.get_event_by_id(event_id)
+        event = await db.get_event_by_id(event_id)
         if event:
             try:
-                ics_content = await asyncio.to_thread(
-                    IcsGenerator.generate_ics, 
-                    event['title'], 
-                    event['description'] or "",
-                    event['location'] or "",
-                    event['date_str']
+                artifact = await ics_cache.get(event)
+                await broadcast.enqueue_document(
+                    [u['telegram_id'] for u in approved_users],
+                    artifact['content'],
+                    artifact['file_name'],
+                    caption=f"✅ <b>Ваша заявка подтверждена!</b>\n\n🎯 <b>{event['title']}</b>",
+                    dedupe_prefix=f"reg_approved:{event_id}",
+                    file_id=artifact['file_id'],
+                    artifact=(artifact['event_id'], artifact['version'])
                 )
-                file_name = f"invite_{event['id']}.ics"
-                
-                for u in approved_users:
-                    try:
-                        file = BufferedInputFile(ics_content.encode('utf-8'), filename=file_name)
-                        
-                        await c.bot.send_document(
-                            u['telegram_id'],
-                            document=file,
-                            caption=f"✅ <b>Ваша заявка подтверждена!</b>\n\n🎯 <b>{event['title']}</b>",
-                            parse_mode="HTML"
-                        )
-                        await asyncio.sleep(0.1) 
-                    except Exception as e:
-                        print(f"Не удалось отправить файл юзеру {u.get('telegram_id')}: {e}")
             except Exception as e:
                 print(f"Ошибка генерации ICS для рассылки: {e}")
         
@@ -690,46 +680,43 @@ async def bulk_approve_handler(c: types.CallbackQuery, db: FDataBase):
     await show_pending_registrations_list(c.message, db, 0, c.from_user.id)
 
 @router.callback_query(F.data.startswith("bulk_reject_"))
-async def bulk_reject_handler(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def bulk_reject_handler(c: types.CallbackQuery, db: AsyncFDataBase, broadcast):
+    admin = await check_callback_access(c, db)
     if not admin: return
     
     event_id = int(c.data.split("_")[2])
-    rejected_users = await asyncio.to_thread(db.reject_all_event_registrations, event_id)
+    rejected_users = await db.reject_all_event_registrations(event_id)
     await c.answer(f"❌ Отклонено записей: {len(rejected_users)}")
     
-    for u in rejected_users:
-        try:
-            event = db.get_event_by_id(event_id)
-            if event:
-                await c.bot.send_message(
-                    u['telegram_id'], 
-                    f"❌ <b>Ваша запись отклонена руководителем</b>\n\n🎯 <b>{event['title']}</b>", 
-                    parse_mode="HTML"
-                )
-        except: pass
+    event = await db.get_event_by_id(event_id) if rejected_users else None
+    if event:
+        await broadcast.enqueue_many([{
+            'chat_id': u['telegram_id'],
+            'text': f"❌ <b>Ваша запись отклонена руководителем</b>\n\n🎯 <b>{event['title']}</b>",
+            'dedupe_key': f"reg_rejected:{event_id}:{u['telegram_id']}"
+        } for u in rejected_users])
 
     await c.message.delete()
     await show_pending_registrations_list(c.message, db, 0, c.from_user.id)
 
 @router.message(lambda msg: msg.text == "🌐 Источники парсинга")
-async def manage_sources_menu(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def manage_sources_menu(message: types.Message, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin or admin.get('role') == 'Manager':
         await message.answer("⛔ Доступ запрещен.")
         return
     await message.answer("🌐 <b>Управление источниками</b>", reply_markup=get_sources_mgmt_kb(), parse_mode="HTML")
 
 @router.message(lambda msg: msg.text == "➕ Добавить источник")
-async def add_source_start(message: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(message, db)
+async def add_source_start(message: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
     await state.set_state(AdminStates.waiting_for_source_name)
     await message.answer("Введите название источника:", reply_markup=get_cancel_keyboard())
 
 @router.message(AdminStates.waiting_for_source_name)
-async def add_source_name(message: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(message, db)
+async def add_source_name(message: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
     if message.text == "❌ Отменить":
         await handle_cancel(message, state, db, get_sources_mgmt_kb())
@@ -739,8 +726,8 @@ async def add_source_name(message: types.Message, state: FSMContext, db: FDataBa
     await message.answer("Введите URL (страницу с событиями):")
 
 @router.message(AdminStates.waiting_for_source_url)
-async def add_source_url(message: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(message, db)
+async def add_source_url(message: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
     if message.text == "❌ Отменить":
         await handle_cancel(message, state, db, get_sources_mgmt_kb())
@@ -751,32 +738,35 @@ async def add_source_url(message: types.Message, state: FSMContext, db: FDataBas
     parsed = urlparse(message.text)
     base_url = f"{parsed.scheme}://{parsed.netloc}"
     
-    if db.add_source(data['source_name'], message.text, base_url):
+    if await db.add_source(data['source_name'], message.text, base_url):
         await message.answer("✅ Источник добавлен!", reply_markup=get_sources_mgmt_kb())
     else:
         await message.answer("❌ Ошибка (возможно, URL уже есть)", reply_markup=get_sources_mgmt_kb())
     await state.clear()
 
 @router.message(lambda msg: msg.text == "📋 Список источников")
-async def list_sources(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def list_sources(message: types.Message, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
-    sources = db.get_active_sources()
+    sources = await db.get_active_sources()
     text = "🌐 <b>Активные источники:</b>\n\n"
     for s in sources:
-        text += f"ID: {s['id']} | <b>{s['name']}</b>\n🔗 {s['url']}\n\n"
+        text += f"ID: {s['id']} | <b>{s['name']}</b>\n🔗 {s['url']}\n"
+        if s.get('item_selector'):
+            text += f"🧭 <code>{html.escape(s['item_selector'])}</code>\n"
+        text += "\n"
     await message.answer(text, parse_mode="HTML", reply_markup=get_sources_mgmt_kb())
 
 @router.message(lambda msg: msg.text == "➖ Удалить источник")
-async def delete_source_start(message: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(message, db)
+async def delete_source_start(message: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
     await state.set_state(AdminStates.waiting_for_delete_source_id)
     await message.answer("Введите ID источника для удаления:", reply_markup=get_cancel_keyboard())
 
 @router.message(AdminStates.waiting_for_delete_source_id)
-async def delete_source_process(message: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(message, db)
+async def delete_source_process(message: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
     if message.text == "❌ Отменить":
         await handle_cancel(message, state, db, get_sources_mgmt_kb())
@@ -785,15 +775,69 @@ async def delete_source_process(message: types.Message, state: FSMContext, db: F
         await message.answer("❌ ID должен быть числом")
         return
         
-    if db.delete_source(int(message.text)):
+    if await db.delete_source(int(message.text)):
         await message.answer("✅ Удалено", reply_markup=get_sources_mgmt_kb())
     else:
         await message.answer("❌ Не найдено", reply_markup=get_sources_mgmt_kb())
     await state.clear()
 
+def format_source_profile(profile: dict) -> str:
+    labels = (
+        ('item_selector', 'Карточка'), ('title_selector', 'Заголовок'), ('date_selector', 'Дата'),
+        ('link_selector', 'Ссылка'), ('next_selector', 'Пагинация')
+    )
+    return "\n".join(f"{label}: <code>{html.escape(profile[key])}</code>" for key, label in labels if profile.get(key))
+
+@router.message(lambda msg: msg.text == "🧭 Профиль источника")
+async def source_profile_start(message: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(message, db)
+    if not admin or admin.get('role') == 'Manager':
+        await message.answer("⛔ Доступ запрещен.")
+        return
+    await state.set_state(AdminStates.waiting_for_profile_source_id)
+    await message.answer(
+        "🧭 Введите ID источника — я загружу страницу и подберу CSS-селекторы для карточек мероприятий:",
+        reply_markup=get_cancel_keyboard()
+    )
+
+@router.message(AdminStates.waiting_for_profile_source_id)
+async def source_profile_process(message: types.Message, state: FSMContext, db: AsyncFDataBase, parser):
+    admin = await check_access(message, db)
+    if not admin: return
+    if message.text == "❌ Отменить":
+        await handle_cancel(message, state, db, get_sources_mgmt_kb())
+        return
+    if not message.text.isdigit():
+        await message.answer("❌ ID должен быть числом")
+        return
+
+    source = next((s for s in await db.get_active_sources() if s['id'] == int(message.text)), None)
+    await state.clear()
+    if not source:
+        await message.answer("❌ Не найдено", reply_markup=get_sources_mgmt_kb())
+        return
+
+    status_msg = await message.answer(f"⏳ Анализирую страницу <b>{html.escape(source['name'])}</b>...", parse_mode="HTML")
+    profile = await parser.suggest_source_profile(source)
+    if profile is None:
+        await status_msg.edit_text("❌ Не удалось загрузить страницу источника.")
+        return
+
+    await db.update_source_profile(source['id'], profile)
+    if profile:
+        await status_msg.edit_text(f"✅ <b>Профиль сохранен</b>\n\n{format_source_profile(profile)}", parse_mode="HTML")
+    else:
+        await status_msg.edit_text("⚠️ Повторяющиеся карточки не найдены — источник будет разбираться эвристикой.")
+
+async def save_crawl_results(db: AsyncFDataBase, crawl_states: list):
+    await db.save_crawl_states(crawl_states)
+    for crawl_state in crawl_states:
+        if crawl_state.get('profile') is not None:
+            await db.update_source_profile(crawl_state['source_id'], crawl_state['profile'])
+
 @router.message(lambda msg: msg.text == "🔄 Сканировать источники")
-async def scan_sources_start(message: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(message, db)
+async def scan_sources_start(message: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin or admin.get('role') == 'Manager':
         await message.answer("⛔ У вас нет прав на сканирование.")
         return
@@ -805,8 +849,8 @@ async def scan_sources_start(message: types.Message, state: FSMContext, db: FDat
     )
 
 @router.message(AdminStates.waiting_for_parsing_criteria)
-async def scan_sources_process(message: types.Message, state: FSMContext, db: FDataBase, parser, gigachat):
-    admin = check_access(message, db)
+async def scan_sources_process(message: types.Message, state: FSMContext, db: AsyncFDataBase, parser, gigachat):
+    admin = await check_access(message, db)
     if not admin: return
     
     if message.text == "❌ Отменить":
@@ -838,47 +882,60 @@ async def scan_sources_process(message: types.Message, state: FSMContext, db: FD
     status_msg = await message.answer(f"⏳ <b>Сканирование...</b>\nТема: {criteria_text}", parse_mode="HTML")
     
     try:
-        db_sources = await asyncio.to_thread(db.get_active_sources)
-        raw_events = await asyncio.to_thread(parser.get_events, db_sources, criteria)
+        db_sources = await db.get_active_sources()
+        raw_events, crawl_states = await parser.crawl(db_sources, criteria, db.get_existing_event_urls)
+        unchanged = sum(1 for s in crawl_states if s['unchanged'])
+        unchanged_text = f"\n💤 Без изменений: {unchanged} из {len(db_sources)} источников" if unchanged else ""
         
         if not raw_events:
-            await status_msg.edit_text("❌ Событий не найдено.")
+            await save_crawl_results(db, crawl_states)
+            await status_msg.edit_text(f"❌ Новых событий не найдено.{unchanged_text}")
             return
             
         await status_msg.edit_text(f"🔍 Найдено {len(raw_events)}. Анализ AI...", parse_mode="HTML")
         
-        added_count = 0
-        for raw_event in raw_events:
-            if db.check_event_exists_by_url(raw_event.get('url')): continue
-            
-            analysis = await asyncio.to_thread(gigachat.analyze_event, raw_event.get('text', ''), criteria)
+        known_urls = await db.get_existing_event_urls([e.get('url') for e in raw_events])
+        new_events, seen_urls = [], set()
+        for e in raw_events:
+            url = e.get('url')
+            if url and (url in known_urls or url in seen_urls): continue
+            seen_urls.add(url)
+            new_events.append(e)
+        pipeline = AnalysisPipeline(gigachat)
+        analyses, stats = await pipeline.run([e.get('text', '') for e in new_events], criteria)
+        
+        rows = []
+        for raw_event, analysis in zip(new_events, analyses):
             dt_obj = parse_date_safe(analysis.get('date', ''))
-            dt_str = dt_obj.strftime('%Y-%m-%d %H:%M:%S')
-            priority = analysis.get('priority', 'medium')
-
-            db.add_new_event(
-                title=analysis.get('title', 'Без названия'),
-                description=raw_event.get('text', ''),
-                location=analysis.get('location', 'СПб'),
-                date_str=analysis.get('date', 'Не указана'),
-                url=raw_event.get('url', ''),
-                analysis=json.dumps(analysis, ensure_ascii=False),
-                score=analysis.get('score', 0),
-                priority=priority,
-                required_rank=1,
-                event_datetime=dt_str,
-                status='new',
-                source='parser'
-            )
-            added_count += 1
+            rows.append({
+                'title': analysis.get('title', 'Без названия'),
+                'description': raw_event.get('text', ''),
+                'location': analysis.get('location', 'СПб'),
+                'date_str': analysis.get('date', 'Не указана'),
+                'url': raw_event.get('url', ''),
+                'analysis': json.dumps(analysis, ensure_ascii=False),
+                'score': analysis.get('score', 0),
+                'priority': analysis.get('priority', 'medium'),
+                'required_rank': 1,
+                'event_datetime': dt_obj.strftime('%Y-%m-%d %H:%M:%S'),
+                'status': 'new',
+                'source': 'parser'
+            })
+        added_count = len(await db.add_new_events_bulk(rows))
+        await save_crawl_results(db, crawl_states)
                 
-        await status_msg.edit_text(f"✅ <b>Готово!</b> Добавлено: {added_count}", parse_mode="HTML")
+        await status_msg.edit_text(
+            f"✅ <b>Готово!</b> Добавлено: {added_count}\n"
+            f"⚡ {stats['items_per_min']:.1f} событий/мин · p95 запроса: {stats['p95_latency']:.1f} с"
+            f"{unchanged_text}",
+            parse_mode="HTML"
+        )
     except Exception as e:
         await status_msg.edit_text(f"❌ Ошибка: {str(e)}")
 
 @router.message(lambda msg: msg.text == "📝 Управление мероприятиями")
-async def manage_events_menu(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def manage_events_menu(message: types.Message, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin:
         await message.answer("⛔ У вас нет доступа к системе управления.")
         return
@@ -886,11 +943,11 @@ async def manage_events_menu(message: types.Message, db: FDataBase):
     await message.answer("📝 <b>Меню мероприятий</b>", reply_markup=get_events_mgmt_kb(admin.get('role')), parse_mode="HTML")
 
 @router.message(F.text == "📂 Экспорт всех (CSV)")
-async def export_all_events_handler(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def export_all_events_handler(message: types.Message, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
     
-    events = await asyncio.to_thread(db.get_all_events_for_export)
+    events = await db.get_all_events_for_export()
     
     if not events:
         await message.answer("Нет событий для экспорта.")
@@ -918,40 +975,40 @@ async def export_all_events_handler(message: types.Message, db: FDataBase):
     await message.answer_document(file, caption=f"✅ Экспорт {len(events)} событий")
 
 @router.message(lambda msg: msg.text == "👥 Управление пользователями")
-async def manage_users_menu_tech(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def manage_users_menu_tech(message: types.Message, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin or admin.get('role') == 'Manager':
         await message.answer("⛔ Доступ запрещен.")
         return
     await message.answer("👥 <b>Меню пользователей</b>", reply_markup=get_users_mgmt_kb(), parse_mode="HTML")
 
 @router.message(lambda msg: msg.text == "👤 Управление админами")
-async def admin_admins_menu(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def admin_admins_menu(message: types.Message, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin or admin.get('role') == 'Manager':
         await message.answer("⛔ Доступ запрещен.")
         return
     await message.answer("👤 <b>Управление админами</b>", reply_markup=get_admin_management_keyboard(), parse_mode="HTML")
 
 @router.message(lambda msg: msg.text == "🤝 Добавить партнёрское")
-async def add_partner_event_start(message: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(message, db)
+async def add_partner_event_start(message: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
     await state.set_state(AdminStates.waiting_for_event_title)
     await state.update_data(event_source='partner')
     await message.answer("🤝 <b>Новое партнёрское событие</b>\nВведите название:", parse_mode="HTML", reply_markup=get_cancel_keyboard())
 
 @router.message(lambda msg: msg.text == "➕ Создать событие")
-async def create_event_manual_start(message: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(message, db)
+async def create_event_manual_start(message: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
     await state.set_state(AdminStates.waiting_for_event_title)
     await state.update_data(event_source='manual')
     await message.answer("📝 <b>Новое событие</b>\nВведите название:", parse_mode="HTML", reply_markup=get_cancel_keyboard())
 
 @router.message(AdminStates.waiting_for_event_title)
-async def process_event_title(message: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(message, db)
+async def process_event_title(message: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
     if message.text == "❌ Отменить":
         await handle_cancel(message, state, db, get_events_mgmt_kb())
@@ -961,8 +1018,8 @@ async def process_event_title(message: types.Message, state: FSMContext, db: FDa
     await message.answer("📝 Описание:")
 
 @router.message(AdminStates.waiting_for_event_description)
-async def process_event_desc(message: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(message, db)
+async def process_event_desc(message: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
     if message.text == "❌ Отменить":
         await handle_cancel(message, state, db, get_events_mgmt_kb())
@@ -972,8 +1029,8 @@ async def process_event_desc(message: types.Message, state: FSMContext, db: FDat
     await message.answer("📍 Место проведения:")
 
 @router.message(AdminStates.waiting_for_event_location)
-async def process_event_loc(message: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(message, db)
+async def process_event_loc(message: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
     if message.text == "❌ Отменить":
         await handle_cancel(message, state, db, get_events_mgmt_kb())
@@ -983,8 +1040,8 @@ async def process_event_loc(message: types.Message, state: FSMContext, db: FData
     await message.answer("📅 Дата (текстом, напр. '25 декабря'):")
 
 @router.message(AdminStates.waiting_for_event_date)
-async def process_event_date(message: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(message, db)
+async def process_event_date(message: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
     if message.text == "❌ Отменить":
         await handle_cancel(message, state, db, get_events_mgmt_kb())
@@ -994,8 +1051,8 @@ async def process_event_date(message: types.Message, state: FSMContext, db: FDat
     await message.answer("🔗 Ссылка (или '-'):")
 
 @router.message(AdminStates.waiting_for_event_url)
-async def process_event_url_finish(message: types.Message, state: FSMContext, db: FDataBase, gigachat):
-    admin = check_access(message, db)
+async def process_event_url_finish(message: types.Message, state: FSMContext, db: AsyncFDataBase, gigachat):
+    admin = await check_access(message, db)
     if not admin: return
 
     data = await state.get_data()
@@ -1005,12 +1062,12 @@ async def process_event_url_finish(message: types.Message, state: FSMContext, db
     wait_msg = await message.answer(f"⏳ <b>Сохранение ({source})...</b>\nАнализ через AI...", parse_mode="HTML")
     
     text_for_analysis = f"{data['event_title']}. {data['event_description']}"
-    analysis = await asyncio.to_thread(gigachat.analyze_event, text_for_analysis)
+    analysis = await gigachat.aanalyze_event(text_for_analysis)
     
     dt_obj = parse_date_safe(data['event_date'])
     dt_str = dt_obj.strftime('%Y-%m-%d %H:%M:%S')
     
-    db.add_new_event(
+    added = await db.add_new_event(
         title=data['event_title'],
         description=data['event_description'],
         location=data['event_location'],
@@ -1027,18 +1084,21 @@ async def process_event_url_finish(message: types.Message, state: FSMContext, db
     
     await state.clear()
     await wait_msg.delete()
+    if not added:
+        await message.answer("⚠️ Событие с такой ссылкой уже есть в базе.", reply_markup=get_events_mgmt_kb())
+        return
     await message.answer(f"✅ Событие ({source}) успешно добавлено и одобрено!", reply_markup=get_events_mgmt_kb())
 
 @router.message(lambda msg: msg.text == "📂 Загрузить из файла")
-async def upload_file_start(message: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(message, db)
+async def upload_file_start(message: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
     await state.set_state(AdminStates.waiting_for_file)
     await message.answer("📂 <b>Отправьте файл</b> (.txt, .json)", parse_mode="HTML", reply_markup=get_cancel_keyboard())
 
 @router.message(AdminStates.waiting_for_file)
-async def process_file_upload(message: types.Message, state: FSMContext, db: FDataBase, gigachat: any, bot: Bot):
-    admin = check_access(message, db)
+async def process_file_upload(message: types.Message, state: FSMContext, db: AsyncFDataBase, gigachat: any, bot: Bot):
+    admin = await check_access(message, db)
     if not admin: return
     if message.text == "❌ Отменить":
         await handle_cancel(message, state, db, get_events_mgmt_kb())
@@ -1052,26 +1112,26 @@ async def process_file_upload(message: types.Message, state: FSMContext, db: FDa
         file_info = await bot.get_file(message.document.file_id)
         downloaded = await bot.download_file(file_info.file_path)
         content = downloaded.read().decode('utf-8', errors='ignore')
-        events_data = await asyncio.to_thread(gigachat.analyze_file_content, content)
+        events_data = await gigachat.aanalyze_file_content(content)
         
-        count = 0
+        rows = []
         for ev in events_data:
             dt_obj = parse_date_safe(ev.get('date', ''))
-            db.add_new_event(
-                title=ev.get('title', 'Без названия'),
-                description=ev.get('description', ''),
-                location=ev.get('location', 'Не указано'),
-                date_str=ev.get('date', 'Не указана'),
-                url='',
-                analysis=json.dumps(ev, ensure_ascii=False),
-                score=50,
-                priority='medium',
-                required_rank=1,
-                event_datetime=dt_obj.strftime('%Y-%m-%d %H:%M:%S'),
-                status='pending',
-                source='file'
-            )
-            count += 1
+            rows.append({
+                'title': ev.get('title', 'Без названия'),
+                'description': ev.get('description', ''),
+                'location': ev.get('location', 'Не указано'),
+                'date_str': ev.get('date', 'Не указана'),
+                'url': '',
+                'analysis': json.dumps(ev, ensure_ascii=False),
+                'score': 50,
+                'priority': 'medium',
+                'required_rank': 1,
+                'event_datetime': dt_obj.strftime('%Y-%m-%d %H:%M:%S'),
+                'status': 'pending',
+                'source': 'file'
+            })
+        count = len(await db.add_new_events_bulk(rows))
         await state.clear()
         await wait_msg.delete()
         await message.answer(f"✅ Загружено черновиков: <b>{count}</b>", parse_mode="HTML", reply_markup=get_events_mgmt_kb())
@@ -1080,14 +1140,14 @@ async def process_file_upload(message: types.Message, state: FSMContext, db: FDa
         await message.answer(f"❌ Ошибка: {str(e)}", reply_markup=get_events_mgmt_kb())
 
 @router.message(F.text == "📋 Список всех мероприятий")
-async def list_all_events(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def list_all_events(message: types.Message, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
     await show_admin_events_list_page(message, db, 0)
 
-async def show_admin_events_list_page(message: types.Message, db: FDataBase, page: int):
-    events = await asyncio.to_thread(db.get_all_events_paginated, page, 1)
-    total = await asyncio.to_thread(db.get_total_events_count)
+async def show_admin_events_list_page(message: types.Message, db: AsyncFDataBase, page: int, cursor: str = None, backward: bool = False):
+    events = await db.get_all_events_paginated(page, 1, cursor, backward)
+    total = await db.get_total_events_count()
     
     if not events:
         await message.answer("📭 Мероприятий пока нет.")
@@ -1114,19 +1174,19 @@ async def show_admin_events_list_page(message: types.Message, db: FDataBase, pag
         f"📝 <b>Описание:</b>\n{event['description'][:300]}..."
     )
     
-    await message.answer(text, parse_mode="HTML", reply_markup=get_admin_events_pagination_keyboard(events, page, max(1, total)))
+    await message.answer(text, parse_mode="HTML", reply_markup=get_admin_events_pagination_keyboard(events, page, max(1, total), db.page_cursor('all_events', event)))
 
-def get_admin_events_pagination_keyboard(events: list, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
+def get_admin_events_pagination_keyboard(events: list, current_page: int, total_pages: int, cursor: str = None) -> InlineKeyboardMarkup:
     buttons = []
     
     nav_buttons = []
     if current_page > 0:
-        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"admin_events_prev_{current_page - 1}"))
+        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=page_callback("admin_events_prev_", current_page - 1, cursor, True)))
     
     nav_buttons.append(InlineKeyboardButton(text=f"{current_page + 1}/{total_pages}", callback_data="ignore"))
     
     if current_page < total_pages - 1:
-        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"admin_events_next_{current_page + 1}"))
+        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=page_callback("admin_events_next_", current_page + 1, cursor)))
     
     if nav_buttons:
         buttons.append(nav_buttons)
@@ -1142,24 +1202,24 @@ def get_admin_events_pagination_keyboard(events: list, current_page: int, total_
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 @router.callback_query(F.data.startswith("admin_events_prev_"))
-async def admin_events_prev(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def admin_events_prev(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
-    page = int(c.data.split("_")[3])
+    page, cursor, backward = parse_page_callback(c.data, "admin_events_prev_")
     await c.message.delete()
-    await show_admin_events_list_page(c.message, db, page)
+    await show_admin_events_list_page(c.message, db, page, cursor, backward)
 
 @router.callback_query(F.data.startswith("admin_events_next_"))
-async def admin_events_next(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def admin_events_next(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
-    page = int(c.data.split("_")[3])
+    page, cursor, backward = parse_page_callback(c.data, "admin_events_next_")
     await c.message.delete()
-    await show_admin_events_list_page(c.message, db, page)
+    await show_admin_events_list_page(c.message, db, page, cursor, backward)
 
 @router.message(lambda msg: msg.text == "🔍 Поиск (Админ)")
-async def admin_search_start(message: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(message, db)
+async def admin_search_start(message: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin:
         await message.answer("⛔ У вас нет доступа к системе управления.")
         return
@@ -1172,7 +1232,7 @@ async def admin_search_start(message: types.Message, state: FSMContext, db: FDat
     )
 
 @router.message(AdminStates.waiting_for_search_text)
-async def admin_search_process(message: types.Message, state: FSMContext, db: FDataBase):
+async def admin_search_process(message: types.Message, state: FSMContext, db: AsyncFDataBase):
     if message.text == "❌ Отменить поиск":
         await handle_cancel(message, state, db, get_events_mgmt_kb())
         return
@@ -1240,7 +1300,7 @@ async def admin_search_process(message: types.Message, state: FSMContext, db: FD
     if current_filters and message.text != "🔍 Все мероприятия":
         await perform_admin_smart_search(message, state, db, current_filters)
 
-async def perform_admin_smart_search(message: types.Message, state: FSMContext, db: FDataBase, filters: list):
+async def perform_admin_smart_search(message: types.Message, state: FSMContext, db: AsyncFDataBase, filters: list):
     wait_msg = await message.answer("⏳ <b>Ищу мероприятия...</b>", parse_mode="HTML")
     
     try:
@@ -1256,8 +1316,7 @@ async def perform_admin_smart_search(message: types.Message, state: FSMContext,
             else:
                 keywords.append(filter_type)
         
-        results = await asyncio.to_thread(db.search_admin_events_with_filters, 
-                                        keywords, 
+        results = await db.search_admin_events_with_filters(keywords, 
                                         status_filter, 
                                         source_filter,
                                         20)
@@ -1286,21 +1345,21 @@ async def perform_admin_smart_search(message: types.Message, state: FSMContext,
         await message.answer(f"❌ Ошибка при поиске: {str(e)}")
 
 @router.message(lambda msg: msg.text and msg.text.startswith("/admin_event_details_"))
-async def admin_det_cmd(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def admin_det_cmd(message: types.Message, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
     try: eid = int(message.text.split("_")[3])
     except: return
     await show_admin_detail(message, db, eid)
 
 @router.callback_query(F.data.startswith("admin_event_details_"))
-async def admin_det_cb(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def admin_det_cb(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     await show_admin_detail(c.message, db, int(c.data.split("_")[3]))
 
 async def show_admin_detail(message, db, eid):
-    e = db.get_event_by_id(eid)
+    e = await db.get_event_by_id(eid)
     if not e: return
     text = f"📝 <b>{e['title']}</b>\nID: {eid}\n📅 {e['date_str']}\n📍 {e['location']}\n🔗 {e['url']}"
     kb = get_event_edit_keyboard(eid)
@@ -1310,8 +1369,8 @@ async def show_admin_detail(message, db, eid):
         await message.edit_text(text, parse_mode="HTML", reply_markup=kb)
 
 @router.callback_query(F.data.startswith("edit_event_title_"))
-async def edit_t(c: types.CallbackQuery, state: FSMContext, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def edit_t(c: types.CallbackQuery, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     await state.update_data(editing_eid=int(c.data.split("_")[3]))
     await state.set_state(AdminStates.waiting_for_edit_event_title)
@@ -1319,19 +1378,19 @@ async def edit_t(c: types.CallbackQuery, state: FSMContext, db: FDataBase):
     await c.answer()
 
 @router.message(AdminStates.waiting_for_edit_event_title)
-async def edit_t_fin(m: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(m, db)
+async def edit_t_fin(m: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(m, db)
     if not admin:
         await m.answer("⛔ У вас нет доступа к системе управления.")
         return
     d = await state.get_data()
-    db.update_event(d['editing_eid'], title=m.text)
+    await db.update_event(d['editing_eid'], title=m.text)
     await m.answer("✅ Обновлено")
     await state.clear()
 
 @router.callback_query(F.data.startswith("edit_event_desc_"))
-async def edit_d(c: types.CallbackQuery, state: FSMContext, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def edit_d(c: types.CallbackQuery, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     await state.update_data(editing_eid=int(c.data.split("_")[3]))
     await state.set_state(AdminStates.waiting_for_edit_event_desc)
@@ -1339,19 +1398,19 @@ async def edit_d(c: types.CallbackQuery, state: FSMContext, db: FDataBase):
     await c.answer()
 
 @router.message(AdminStates.waiting_for_edit_event_desc)
-async def edit_d_fin(m: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(m, db)
+async def edit_d_fin(m: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(m, db)
     if not admin:
         await m.answer("⛔ У вас нет доступа к системе управления.")
         return
     d = await state.get_data()
-    db.update_event(d['editing_eid'], description=m.text)
+    await db.update_event(d['editing_eid'], description=m.text)
     await m.answer("✅ Обновлено")
     await state.clear()
 
 @router.callback_query(F.data.startswith("edit_event_location_"))
-async def edit_l(c: types.CallbackQuery, state: FSMContext, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def edit_l(c: types.CallbackQuery, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     await state.update_data(editing_eid=int(c.data.split("_")[3]))
     await state.set_state(AdminStates.waiting_for_edit_event_location)
@@ -1359,19 +1418,19 @@ async def edit_l(c: types.CallbackQuery, state: FSMContext, db: FDataBase):
     await c.answer()
 
 @router.message(AdminStates.waiting_for_edit_event_location)
-async def edit_l_fin(m: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(m, db)
+async def edit_l_fin(m: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(m, db)
     if not admin:
         await m.answer("⛔ У вас нет доступа к системе управления.")
         return
     d = await state.get_data()
-    db.update_event(d['editing_eid'], location=m.text)
+    await db.update_event(d['editing_eid'], location=m.text)
     await m.answer("✅ Обновлено")
     await state.clear()
 
 @router.callback_query(F.data.startswith("edit_event_date_"))
-async def edit_dt(c: types.CallbackQuery, state: FSMContext, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def edit_dt(c: types.CallbackQuery, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     await state.update_data(editing_eid=int(c.data.split("_")[3]))
     await state.set_state(AdminStates.waiting_for_edit_event_date)
@@ -1379,20 +1438,20 @@ async def edit_dt(c: types.CallbackQuery, state: FSMContext, db: FDataBase):
     await c.answer()
 
 @router.message(AdminStates.waiting_for_edit_event_date)
-async def edit_dt_fin(m: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(m, db)
+async def edit_dt_fin(m: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(m, db)
     if not admin:
         await m.answer("⛔ У вас нет доступа к системе управления.")
         return
     d = await state.get_data()
     dt_obj = parse_date_safe(m.text)
-    db.update_event(d['editing_eid'], date_str=m.text, event_datetime=dt_obj.strftime('%Y-%m-%d %H:%M:%S'))
+    await db.update_event(d['editing_eid'], date_str=m.text, event_datetime=dt_obj.strftime('%Y-%m-%d %H:%M:%S'))
     await m.answer("✅ Обновлено")
     await state.clear()
 
 @router.callback_query(F.data.startswith("edit_event_url_"))
-async def edit_u(c: types.CallbackQuery, state: FSMContext, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def edit_u(c: types.CallbackQuery, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     await state.update_data(editing_eid=int(c.data.split("_")[3]))
     await state.set_state(AdminStates.waiting_for_edit_event_url)
@@ -1400,41 +1459,41 @@ async def edit_u(c: types.CallbackQuery, state: FSMContext, db: FDataBase):
     await c.answer()
 
 @router.message(AdminStates.waiting_for_edit_event_url)
-async def edit_u_fin(m: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(m, db)
+async def edit_u_fin(m: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(m, db)
     if not admin:
         await m.answer("⛔ У вас нет доступа к системе управления.")
         return
     d = await state.get_data()
-    db.update_event(d['editing_eid'], url=m.text)
+    await db.update_event(d['editing_eid'], url=m.text)
     await m.answer("✅ Обновлено")
     await state.clear()
 
 @router.callback_query(F.data.startswith("delete_event_confirm_"))
-async def del_ev(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def del_ev(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
-    db.delete_event(int(c.data.split("_")[3]))
+    await db.delete_event(int(c.data.split("_")[3]))
     await c.answer("🗑 Удалено")
     await c.message.delete()
 
 @router.callback_query(F.data.startswith("back_to_event_"))
-async def back_to_event(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def back_to_event(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     await admin_det_cb(c, db)
 
 @router.callback_query(F.data.startswith("event_participants_"))
-async def show_participants(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def show_participants(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     eid = int(c.data.split("_")[2])
     await show_participants_page(c.message, db, eid, 0)
     await c.answer()
 
-async def show_participants_page(message: types.Message, db: FDataBase, eid: int, page: int):
-    regs = db.get_event_registrations(eid)
-    event = db.get_event_by_id(eid)
+async def show_participants_page(message: types.Message, db: AsyncFDataBase, eid: int, page: int):
+    regs = await db.get_event_registrations(eid)
+    event = await db.get_event_by_id(eid)
     chunk = regs[page*5:(page+1)*5]
     total_pages = max(1, (len(regs) + 4) // 5)
     text = f"👥 <b>Участники: {event['title']}</b>\nВсего: {len(regs)}\n\n"
@@ -1444,26 +1503,26 @@ async def show_participants_page(message: types.Message, db: FDataBase, eid: int
     await message.edit_text(text, parse_mode="HTML", reply_markup=get_participants_keyboard(eid, page, total_pages))
 
 @router.callback_query(F.data.startswith("part_prev_"))
-async def part_prev(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def part_prev(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     p = c.data.split("_")
     await show_participants_page(c.message, db, int(p[2]), int(p[3]))
 
 @router.callback_query(F.data.startswith("part_next_"))
-async def part_next(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def part_next(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     p = c.data.split("_")
     await show_participants_page(c.message, db, int(p[2]), int(p[3]))
 
 @router.callback_query(F.data.startswith("export_participants_"))
-async def export_participants_handler(callback: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(callback, db)
+async def export_participants_handler(callback: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(callback, db)
     if not admin: return
     eid = int(callback.data.split("_")[2])
-    regs = db.get_event_registrations(eid)
-    event = db.get_event_by_id(eid)
+    regs = await db.get_event_registrations(eid)
+    event = await db.get_event_by_id(eid)
     if not regs:
         await callback.answer("Нет участников для экспорта")
         return
@@ -1476,12 +1535,12 @@ async def export_participants_handler(callback: types.CallbackQuery, db: FDataBa
     await callback.answer()
 
 @router.message(lambda msg: msg.text == "📝 Управление ролями")
-async def manage_roles_start(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def manage_roles_start(message: types.Message, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin or admin.get('role') == 'Manager':
         await message.answer("⛔ Доступ запрещен.")
         return
-    users = await asyncio.to_thread(db.get_all_approved_users)
+    users = await db.get_all_approved_users()
     if not users:
         await message.answer("📭 Нет подтвержденных сотрудников.")
         return
@@ -1492,11 +1551,11 @@ async def manage_roles_start(message: types.Message, db: FDataBase):
     await message.answer(text, parse_mode="HTML", reply_markup=get_role_management_keyboard(users))
 
 @router.callback_query(F.data.startswith("change_user_role_"))
-async def change_user_role_handler(c: types.CallbackQuery, state: FSMContext, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def change_user_role_handler(c: types.CallbackQuery, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     user_id = int(c.data.split("_")[3])
-    user = db.get_user_by_id(user_id)
+    user = await db.get_user_by_id(user_id)
     if not user:
         await c.answer("❌ Пользователь не найден")
         return
@@ -1512,8 +1571,8 @@ async def change_user_role_handler(c: types.CallbackQuery, state: FSMContext, db
     await c.answer()
 
 @router.message(AdminStates.waiting_for_new_user_role)
-async def process_new_user_role(message: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(message, db)
+async def process_new_user_role(message: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin:
         await message.answer("⛔ У вас нет доступа к системе управления.")
         return
@@ -1522,23 +1581,23 @@ async def process_new_user_role(message: types.Message, state: FSMContext, db: F
         return
     data = await state.get_data()
     user_id = data['editing_user_id']
-    if db.update_user_profile(user_id, position=message.text):
+    if await db.update_user_profile(user_id, position=message.text):
         await message.answer(f"✅ Должность обновлена на: {message.text}", reply_markup=get_users_mgmt_kb())
     else:
         await message.answer("❌ Ошибка обновления должности", reply_markup=get_users_mgmt_kb())
     await state.clear()
 
 @router.message(lambda msg: msg.text == "✅ Подтверждение (Модерация)")
-async def show_user_approvals(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def show_user_approvals(message: types.Message, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin or admin.get('role') == 'Manager':
         await message.answer("⛔ Доступ запрещен.")
         return
     await show_user_approval_page(message, db, 0)
 
-async def show_user_approval_page(message: types.Message, db: FDataBase, page: int):
-    users = await asyncio.to_thread(db.get_pending_users_paginated, page, 1)
-    total = await asyncio.to_thread(db.get_total_pending_users_count)
+async def show_user_approval_page(message: types.Message, db: AsyncFDataBase, page: int, cursor: str = None, backward: bool = False):
+    users = await db.get_pending_users_paginated(page, 1, cursor, backward)
+    total = await db.get_total_pending_users_count()
     if not users:
         await message.answer("✅ Нет активных заявок на регистрацию.", reply_markup=get_users_mgmt_kb())
         return
@@ -1551,16 +1610,16 @@ async def show_user_approval_page(message: types.Message, db: FDataBase, page: i
         f"📞 Тел: {user.get('phone')}\n"
         f"📅 Дата: {user.get('registered_at')}\n"
     )
-    kb = get_user_approval_pagination_keyboard(users, page, max(1, total))
+    kb = get_user_approval_pagination_keyboard(users, page, max(1, total), db.page_cursor('pending_users', user))
     await message.answer(text, parse_mode="HTML", reply_markup=kb)
 
 @router.callback_query(F.data.startswith("approve_user_"))
-async def approve_user_handler(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def approve_user_handler(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
     uid = int(c.data.split("_")[2])
-    user = db.get_user_by_id(uid)
-    if db.approve_user(uid):
+    user = await db.get_user_by_id(uid)
+    if await db.approve_user(uid):
         await c.answer("✅ Пользователь подтвержден")
         if user:
             try:
@@ -1577,40 +1636,40 @@ async def approve_user_handler(c: types.CallbackQuery, db: FDataBase):
     await show_user_approval_page(c.message, db, 0)
 
 @router.callback_query(F.data.startswith("reject_user_"))
-async def reject_user_handler(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def reject_user_handler(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
-    db.reject_user(int(c.data.split("_")[2]))
+    await db.reject_user(int(c.data.split("_")[2]))
     await c.answer("❌ Заявка отклонена")
     await c.message.delete()
     await show_user_approval_page(c.message, db, 0)
 
 @router.callback_query(F.data.startswith("user_approval_next_"))
-async def user_approval_next(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def user_approval_next(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
-    page = int(c.data.split("_")[3])
+    page, cursor, backward = parse_page_callback(c.data, "user_approval_next_")
     await c.message.delete()
-    await show_user_approval_page(c.message, db, page)
+    await show_user_approval_page(c.message, db, page, cursor, backward)
 
 @router.callback_query(F.data.startswith("user_approval_prev_"))
-async def user_approval_prev(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def user_approval_prev(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
-    page = int(c.data.split("_")[3])
+    page, cursor, backward = parse_page_callback(c.data, "user_approval_prev_")
     await c.message.delete()
-    await show_user_approval_page(c.message, db, page)
+    await show_user_approval_page(c.message, db, page, cursor, backward)
 
 @router.message(lambda msg: msg.text == "📝 Модерация регистраций")
-async def show_registration_moderation(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def show_registration_moderation(message: types.Message, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin or admin.get('role') == 'Manager':
         await message.answer("⛔ Доступ запрещен.")
         return
     await show_reg_moderation_page(message, db, 0)
 
-async def show_reg_moderation_page(message: types.Message, db: FDataBase, page: int):
-    registrations = await asyncio.to_thread(db.get_pending_registrations)
+async def show_reg_moderation_page(message: types.Message, db: AsyncFDataBase, page: int):
+    registrations = await db.get_pending_registrations()
     if not registrations:
         await message.answer("✅ Нет заявок на регистрацию для модерации.", reply_markup=get_users_mgmt_kb())
         return
@@ -1628,40 +1687,30 @@ async def show_reg_moderation_page(message: types.Message, db: FDataBase, page:
     await message.answer(text, parse_mode="HTML", reply_markup=get_reg_moderation_keyboard(reg['user_id'], reg['event_id'], page, total))
 
 @router.callback_query(F.data.startswith("reg_approve_"))
-async def reg_approve_handler(callback: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(callback, db)
+async def reg_approve_handler(callback: types.CallbackQuery, db: AsyncFDataBase, ics_cache):
+    admin = await check_callback_access(callback, db)
     if not admin: return
     
     parts = callback.data.split("_")
     user_id = int(parts[2])
     event_id = int(parts[3])
     
-    if db.approve_registration(user_id, event_id):
-        user = db.get_user_by_id(user_id)
-        event = db.get_event_by_id(event_id)
+    if await db.approve_registration(user_id, event_id):
+        user = await db.get_user_by_id(user_id)
+        event = await db.get_event_by_id(event_id)
         
         if user and event:
             try:
-                ics_content = await asyncio.to_thread(
-                    IcsGenerator.generate_ics, 
-                    event['title'], 
-                    event['description'] or "Описание отсутствует",
-                    event['location'] or "Онлайн/Не указано",
-                    event['date_str']
-                )
-                file_name = f"invite_{event['id']}.ics"
-                file = BufferedInputFile(ics_content.encode('utf-8'), filename=file_name)
-                
-                await callback.bot.send_document(
+                await ics_cache.send(
+                    callback.bot,
                     user.get('telegram_id'),
-                    document=file,
+                    event,
                     caption=(
                         f"✅ <b>Руководитель подтвердил вашу заявку!</b>\n\n"
                         f"🎯 <b>{event.get('title')}</b>\n"
                         f"📅 {event.get('date_str')}\n\n"
                         f"Добавьте событие в календарь 👇"
-                    ),
-                    parse_mode="HTML"
+                    )
                 )
             except Exception as e:
                 print(f"Ошибка отправки ICS: {e}")
@@ -1674,15 +1723,15 @@ async def reg_approve_handler(callback: types.CallbackQuery, db: FDataBase):
     await show_reg_moderation_page(callback.message, db, 0)
 
 @router.callback_query(F.data.startswith("reg_reject_"))
-async def reg_reject_handler(callback: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(callback, db)
+async def reg_reject_handler(callback: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(callback, db)
     if not admin: return
     parts = callback.data.split("_")
     user_id = int(parts[2])
     event_id = int(parts[3])
-    if db.reject_registration(user_id, event_id):
-        user = db.get_user_by_id(user_id)
-        event = db.get_event_by_id(event_id)
+    if await db.reject_registration(user_id, event_id):
+        user = await db.get_user_by_id(user_id)
+        event = await db.get_event_by_id(event_id)
         if user and event:
             try:
                 await callback.bot.send_message(
@@ -1698,28 +1747,28 @@ async def reg_reject_handler(callback: types.CallbackQuery, db: FDataBase):
     await show_reg_moderation_page(callback.message, db, 0)
 
 @router.callback_query(F.data.startswith("reg_next_"))
-async def reg_next_handler(callback: types.CallbackQuery, db: FDataBase):
-    if check_callback_access(callback, db):
+async def reg_next_handler(callback: types.CallbackQuery, db: AsyncFDataBase):
+    if await check_callback_access(callback, db):
         await callback.message.delete()
         await show_reg_moderation_page(callback.message, db, int(callback.data.split("_")[2]))
 
 @router.callback_query(F.data.startswith("reg_prev_"))
-async def reg_prev_handler(callback: types.CallbackQuery, db: FDataBase):
-    if check_callback_access(callback, db):
+async def reg_prev_handler(callback: types.CallbackQuery, db: AsyncFDataBase):
+    if await check_callback_access(callback, db):
         await callback.message.delete()
         await show_reg_moderation_page(callback.message, db, int(callback.data.split("_")[2]))
 
 @router.message(lambda msg: msg.text == "📜 Модерация")
-async def start_moderation(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def start_moderation(message: types.Message, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin or admin.get('role') == 'Manager':
         await message.answer("⛔ Доступ запрещен.")
         return
     await show_moderation_page(message, db, 0)
 
-async def show_moderation_page(message: types.Message, db: FDataBase, page: int):
-    events = await asyncio.to_thread(db.get_pending_events_paginated, page, 1)
-    total = await asyncio.to_thread(db.get_total_pending_events_count)
+async def show_moderation_page(message: types.Message, db: AsyncFDataBase, page: int, cursor: str = None, backward: bool = False):
+    events = await db.get_pending_events_paginated(page, 1, cursor, backward)
+    total = await db.get_total_pending_events_count()
     if not events:
         await message.answer("🎉 <b>Все события проверены!</b>", parse_mode="HTML", reply_markup=get_events_mgmt_kb())
         return
@@ -1735,47 +1784,47 @@ async def show_moderation_page(message: types.Message, db: FDataBase, page: int)
         f"💡 AI Summary: {an.get('summary', '-')}\n\n"
         f"Источник: {e.get('source')}"
     )
-    await message.answer(text, parse_mode="HTML", reply_markup=get_moderation_keyboard(e['id'], page, max(1, total)))
+    await message.answer(text, parse_mode="HTML", reply_markup=get_moderation_keyboard(e['id'], page, max(1, total), db.page_cursor('pending_events', e)))
 
 @router.callback_query(F.data.startswith("approve_event_"))
-async def approve_event_handler(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def approve_event_handler(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
-    db.update_status(int(c.data.split("_")[2]), 'approved')
+    await db.update_status(int(c.data.split("_")[2]), 'approved')
     await c.answer("✅ Одобрено")
     await c.message.delete()
     await show_moderation_page(c.message, db, 0)
 
 @router.callback_query(F.data.startswith("reject_event_"))
-async def reject_event_handler(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def reject_event_handler(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
-    db.update_status(int(c.data.split("_")[2]), 'rejected')
+    await db.update_status(int(c.data.split("_")[2]), 'rejected')
     await c.answer("❌ Отклонено")
     await c.message.delete()
     await show_moderation_page(c.message, db, 0)
 
 @router.callback_query(F.data.startswith("mod_next_"))
-async def mod_next_handler(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def mod_next_handler(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
-    page = int(c.data.split("_")[2])
+    page, cursor, backward = parse_page_callback(c.data, "mod_next_")
     await c.message.delete()
-    await show_moderation_page(c.message, db, page)
+    await show_moderation_page(c.message, db, page, cursor, backward)
 
 @router.callback_query(F.data.startswith("mod_prev_"))
-async def mod_prev_handler(c: types.CallbackQuery, db: FDataBase):
-    admin = check_callback_access(c, db)
+async def mod_prev_handler(c: types.CallbackQuery, db: AsyncFDataBase):
+    admin = await check_callback_access(c, db)
     if not admin: return
-    page = int(c.data.split("_")[2])
+    page, cursor, backward = parse_page_callback(c.data, "mod_prev_")
     await c.message.delete()
-    await show_moderation_page(c.message, db, page)
+    await show_moderation_page(c.message, db, page, cursor, backward)
 
 @router.message(lambda msg: msg.text == "📋 Список админов")
-async def list_admins(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def list_admins(message: types.Message, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
-    admins = db.get_all_admins()
+    admins = await db.get_all_admins()
     text = "📋 <b>Администраторы:</b>\n\n"
     for a in admins:
         r = "👔 Руководитель" if a['role'] == 'Manager' else "👑 ТехПоддержка" if a['role'] == 'TechSupport' else a['role']
@@ -1783,14 +1832,14 @@ async def list_admins(message: types.Message, db: FDataBase):
     await message.answer(text, parse_mode="HTML")
 
 @router.message(lambda msg: msg.text == "➕ Добавить админа")
-async def add_adm(message: types.Message, state: FSMContext, db: FDataBase):
-    admin = check_access(message, db)
+async def add_adm(message: types.Message, state: FSMContext, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
     await state.set_state(AdminStates.waiting_for_new_admin_id)
     await message.answer("➕ ID нового админа:", reply_markup=get_cancel_keyboard())
 
 @router.message(AdminStates.waiting_for_new_admin_id)
-async def add_adm_id(m: types.Message, state: FSMContext, db: FDataBase):
+async def add_adm_id(m: types.Message, state: FSMContext, db: AsyncFDataBase):
     if m.text == "❌ Отменить": await handle_cancel(m, state, db, get_admin_management_keyboard()); return
     if not m.text.isdigit(): await m.answer("❌ Число!"); return
     await state.update_data(nid=int(m.text))
@@ -1798,38 +1847,40 @@ async def add_adm_id(m: types.Message, state: FSMContext, db: FDataBase):
     await m.answer("👤 Роль:", reply_markup=get_admin_role_keyboard())
 
 @router.message(AdminStates.waiting_for_new_admin_role)
-async def add_adm_role(m: types.Message, state: FSMContext, db: FDataBase):
+async def add_adm_role(m: types.Message, state: FSMContext, db: AsyncFDataBase, scheduler):
     if m.text == "❌ Отменить": await handle_cancel(m, state, db, get_admin_management_keyboard()); return
     d = await state.get_data()
     role = "Manager"
     if "ТехПоддержка" in m.text: role = "TechSupport"
     elif "Руководитель" in m.text: role = "Manager"
-    db.add_admin(d['nid'], "Unknown", role)
+    await db.add_admin(d['nid'], "Unknown", role)
+    scheduler.reschedule()
     await m.answer(f"✅ Админ {d['nid']} ({role}) добавлен.", reply_markup=get_admin_management_keyboard())
     await state.clear()
 
 @router.message(lambda msg: msg.text == "➖ Удалить админа")
-async def rm_adm(m: types.Message, state: FSMContext, db: FDataBase):
-    if check_access(m, db):
+async def rm_adm(m: types.Message, state: FSMContext, db: AsyncFDataBase):
+    if await check_access(m, db):
         await state.set_state(AdminStates.waiting_for_remove_admin)
         await m.answer("➖ ID:", reply_markup=get_cancel_keyboard())
 
 @router.message(AdminStates.waiting_for_remove_admin)
-async def rm_adm_fin(m: types.Message, state: FSMContext, db: FDataBase):
+async def rm_adm_fin(m: types.Message, state: FSMContext, db: AsyncFDataBase, scheduler):
     if m.text == "❌ Отменить": await handle_cancel(m, state, db, get_admin_management_keyboard()); return
     if not m.text.isdigit(): await m.answer("❌ Число!"); return
-    db.remove_admin(int(m.text))
+    await db.remove_admin(int(m.text))
+    scheduler.reschedule()
     await m.answer("🗑 Удален.", reply_markup=get_admin_management_keyboard())
     await state.clear()
 
 @router.message(lambda msg: msg.text == "📝 Изменить роль админа")
-async def change_role(m: types.Message, state: FSMContext, db: FDataBase):
-    if check_access(m, db):
+async def change_role(m: types.Message, state: FSMContext, db: AsyncFDataBase):
+    if await check_access(m, db):
         await state.set_state(AdminStates.waiting_for_change_role_id)
         await m.answer("📝 ID админа:", reply_markup=get_cancel_keyboard())
 
 @router.message(AdminStates.waiting_for_change_role_id)
-async def change_role_id(m: types.Message, state: FSMContext, db: FDataBase):
+async def change_role_id(m: types.Message, state: FSMContext, db: AsyncFDataBase):
     if m.text == "❌ Отменить": await handle_cancel(m, state, db, get_admin_management_keyboard()); return
     if not m.text.isdigit(): await m.answer("❌ Число!"); return
     await state.update_data(change_role_id=int(m.text))
@@ -1837,13 +1888,13 @@ async def change_role_id(m: types.Message, state: FSMContext, db: FDataBase):
     await m.answer("👤 Новая роль:", reply_markup=get_admin_role_keyboard())
 
 @router.message(AdminStates.waiting_for_change_role_new)
-async def change_role_fin(m: types.Message, state: FSMContext, db: FDataBase):
+async def change_role_fin(m: types.Message, state: FSMContext, db: AsyncFDataBase):
     if m.text == "❌ Отменить": await handle_cancel(m, state, db, get_admin_management_keyboard()); return
     role = "Manager"
     if "ТехПоддержка" in m.text: role = "TechSupport"
     elif "Руководитель" in m.text: role = "Manager"
     d = await state.get_data()
-    db.update_admin_role(d['change_role_id'], role)
+    await db.update_admin_role(d['change_role_id'], role)
     await m.answer("✅ Обновлено.", reply_markup=get_admin_management_keyboard())
     await state.clear()
 
@@ -1854,8 +1905,8 @@ async def admin_export_period(message: types.Message):
                         reply_markup=get_admin_export_period_keyboard())
 
 @router.message(F.text.in_(["📅 На неделю", "📅 На месяц", "📅 На 3 месяца", "📅 На год"]))
-async def admin_export_by_period(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def admin_export_by_period(message: types.Message, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
     
     if message.text == "📅 На неделю":
@@ -1873,7 +1924,7 @@ async def admin_export_by_period(message: types.Message, db: FDataBase):
     
     wait_msg = await message.answer(f"⏳ <b>Генерирую календарь на {period_name}...</b>", parse_mode="HTML")
     
-    events = await asyncio.to_thread(db.get_upcoming_events, message.from_user.id, days)
+    events = await db.get_upcoming_events(message.from_user.id, days)
     
     if not events:
         await wait_msg.delete()
@@ -1881,7 +1932,7 @@ async def admin_export_by_period(message: types.Message, db: FDataBase):
         return
         
     ics_content = await asyncio.to_thread(IcsGenerator.generate_bulk_ics, events)
-    file = BufferedInputFile(ics_content.encode('utf-8'), filename=f"events_{days}d.ics")
+    file = BufferedInputFile(ics_content, filename=f"events_{days}d.ics")
     
     await wait_msg.delete()
     await message.answer_document(
@@ -1891,13 +1942,13 @@ async def admin_export_by_period(message: types.Message, db: FDataBase):
     )
 
 @router.callback_query(F.data == "back_to_main_menu")
-async def back_to_main_menu_callback(callback: types.CallbackQuery, db: FDataBase):
+async def back_to_main_menu_callback(callback: types.CallbackQuery, db: AsyncFDataBase):
     try: 
         await callback.message.delete()
     except: 
         pass
     
-    admin = db.get_admin(callback.from_user.id)
+    admin = await db.get_admin(callback.from_user.id)
     is_admin = bool(admin)
     await callback.message.answer(
         "🔙 <b>Главное меню</b>",
@@ -1907,13 +1958,13 @@ async def back_to_main_menu_callback(callback: types.CallbackQuery, db: FDataBas
     await callback.answer()
 
 @router.callback_query(F.data == "close_message")
-async def close_msg(callback: types.CallbackQuery, db: FDataBase):
+async def close_msg(callback: types.CallbackQuery, db: AsyncFDataBase):
     try: 
         await callback.message.delete()
     except: 
         pass
     
-    admin = db.get_admin(callback.from_user.id)
+    admin = await db.get_admin(callback.from_user.id)
     is_admin = bool(admin)
     await callback.message.answer(
         "🔙 <b>Главное меню</b>",
@@ -1923,13 +1974,13 @@ async def close_msg(callback: types.CallbackQuery, db: FDataBase):
     await callback.answer()
 
 @router.callback_query(F.data == "close_profile")
-async def close_prof(callback: types.CallbackQuery, db: FDataBase):
+async def close_prof(callback: types.CallbackQuery, db: AsyncFDataBase):
     try: 
         await callback.message.delete()
     except: 
         pass
     
-    admin = db.get_admin(callback.from_user.id)
+    admin = await db.get_admin(callback.from_user.id)
     is_admin = bool(admin)
     await callback.message.answer(
         "🔙 <b>Главное меню</b>",
@@ -1941,16 +1992,16 @@ async def close_prof(callback: types.CallbackQuery, db: FDataBase):
 # --- УПРАВЛЕНИЕ СПИСКОМ СОТРУДНИКОВ ---
 
 @router.message(lambda msg: msg.text == "📋 Список сотрудников")
-async def list_employees_handler(message: types.Message, db: FDataBase):
-    admin = check_access(message, db)
+async def list_employees_handler(message: types.Message, db: AsyncFDataBase):
+    admin = await check_access(message, db)
     if not admin: return
     await show_employees_list(message, db, 0)
 
-async def show_employees_list(message: types.Message, db: FDataBase, page: int):
+async def show_employees_list(message: types.Message, db: AsyncFDataBase, page: int):
     # Получаем всех подтвержденных пользователей пагинацией
     # Примечание: нужно реализовать/использовать метод пагинации пользователей в БД.
     # Сейчас используем get_all_approved_users и режем список вручную (можно оптимизировать SQL позже)
-    all_users = await asyncio.to_thread(db.get_all_approved_users)
+    all_users = await db.get_all_approved_users()
     
     limit = 7
     total_pages = max(1, (len(all_users) + limit - 1) // limit)
@@ -1969,35 +2020,35 @@ async def show_employees_list(message: types.Message, db: FDataBase, page: int):
         await message.edit_text(text, parse_mode="HTML", reply_markup=kb)
 
 @router.callback_query(F.data.startswith("users_list_prev_"))
-async def users_list_prev(c: types.CallbackQuery, db: FDataBase):
-    if not check_callback_access(c, db): return
+async def users_list_prev(c: types.CallbackQuery, db: AsyncFDataBase):
+    if not await check_callback_access(c, db): return
     page = int(c.data.split("_")[3])
     await show_employees_list(c.message, db, page)
 
 @router.callback_query(F.data.startswith("users_list_next_"))
-async def users_list_next(c: types.CallbackQuery, db: FDataBase):
-    if not check_callback_access(c, db): return
+async def users_list_next(c: types.CallbackQuery, db: AsyncFDataBase):
+    if not await check_callback_access(c, db): return
     page = int(c.data.split("_")[3])
     await show_employees_list(c.message, db, page)
 
 @router.callback_query(F.data == "back_to_users_list_0")
-async def back_users_list(c: types.CallbackQuery, db: FDataBase):
-    if not check_callback_access(c, db): return
+async def back_users_list(c: types.CallbackQuery, db: AsyncFDataBase):
+    if not await check_callback_access(c, db): return
     await show_employees_list(c.message, db, 0)
 
 # --- КАРТОЧКА СОТРУДНИКА ---
 
 @router.callback_query(F.data.startswith("manage_user_"))
-async def manage_user_detail(c: types.CallbackQuery, db: FDataBase):
-    if not check_callback_access(c, db): return
+async def manage_user_detail(c: types.CallbackQuery, db: AsyncFDataBase):
+    if not await check_callback_access(c, db): return
     user_id = int(c.data.split("_")[2])
-    user = db.get_user_by_id(user_id)
+    user = await db.get_user_by_id(user_id)
     
     if not user:
         await c.answer("Пользователь не найден", show_alert=True)
         return
 
-    stats = await asyncio.to_thread(db.get_user_stats, user_id)
+    stats = await db.get_user_stats(user_id)
     
     text = (
         f"👤 <b>Профиль сотрудника</b>\n\n"
@@ -2015,8 +2066,8 @@ async def manage_user_detail(c: types.CallbackQuery, db: FDataBase):
 
 # 1. ФИО
 @router.callback_query(F.data.startswith("edit_usr_name_"))
-async def edit_usr_name_start(c: types.CallbackQuery, state: FSMContext, db: FDataBase):
-    if not check_callback_access(c, db): return
+async def edit_usr_name_start(c: types.CallbackQuery, state: FSMContext, db: AsyncFDataBase):
+    if not await check_callback_access(c, db): return
     user_id = int(c.data.split("_")[3])
     await state.update_data(edit_user_id=user_id)
     await state.set_state(AdminStates.waiting_for_edit_user_name)
@@ -2024,19 +2075,19 @@ async def edit_usr_name_start(c: types.CallbackQuery, state: FSMContext, db: FDa
     await c.answer()
 
 @router.message(AdminStates.waiting_for_edit_user_name)
-async def edit_usr_name_process(m: types.Message, state: FSMContext, db: FDataBase):
+async def edit_usr_name_process(m: types.Message, state: FSMContext, db: AsyncFDataBase):
     if m.text == "❌ Отменить": 
         await handle_cancel(m, state, db, get_users_mgmt_kb())
         return
     data = await state.get_data()
-    db.update_user_profile(data['edit_user_id'], full_name=m.text)
+    await db.update_user_profile(data['edit_user_id'], full_name=m.text)
     await m.answer("✅ ФИО обновлено!", reply_markup=get_users_mgmt_kb())
     await state.clear()
 
 # 2. Email
 @router.callback_query(F.data.startswith("edit_usr_email_"))
-async def edit_usr_email_start(c: types.CallbackQuery, state: FSMContext, db: FDataBase):
-    if not check_callback_access(c, db): return
+async def edit_usr_email_start(c: types.CallbackQuery, state: FSMContext, db: AsyncFDataBase):
+    if not await check_callback_access(c, db): return
     user_id = int(c.data.split("_")[3])
     await state.update_data(edit_user_id=user_id)
     await state.set_state(AdminStates.waiting_for_edit_user_email)
@@ -2044,19 +2095,19 @@ async def edit_usr_email_start(c: types.CallbackQuery, state: FSMContext, db: FD
     await c.answer()
 
 @router.message(AdminStates.waiting_for_edit_user_email)
-async def edit_usr_email_process(m: types.Message, state: FSMContext, db: FDataBase):
+async def edit_usr_email_process(m: types.Message, state: FSMContext, db: AsyncFDataBase):
     if m.text == "❌ Отменить": 
         await handle_cancel(m, state, db, get_users_mgmt_kb())
         return
     data = await state.get_data()
-    db.update_user_profile(data['edit_user_id'], email=m.text)
+    await db.update_user_profile(data['edit_user_id'], email=m.text)
     await m.answer("✅ Email обновлен!", reply_markup=get_users_mgmt_kb())
     await state.clear()
 
 # 3. Должность
 @router.callback_query(F.data.startswith("edit_usr_pos_"))
-async def edit_usr_pos_start(c: types.CallbackQuery, state: FSMContext, db: FDataBase):
-    if not check_callback_access(c, db): return
+async def edit_usr_pos_start(c: types.CallbackQuery, state: FSMContext, db: AsyncFDataBase):
+    if not await check_callback_access(c, db): return
     user_id = int(c.data.split("_")[3])
     await state.update_data(edit_user_id=user_id)
     await state.set_state(AdminStates.waiting_for_edit_user_pos)
@@ -2064,21 +2115,21 @@ async def edit_usr_pos_start(c: types.CallbackQuery, state: FSMContext, db: FDat
     await c.answer()
 
 @router.message(AdminStates.waiting_for_edit_user_pos)
-async def edit_usr_pos_process(m: types.Message, state: FSMContext, db: FDataBase):
+async def edit_usr_pos_process(m: types.Message, state: FSMContext, db: AsyncFDataBase):
     if m.text == "❌ Отменить": 
         await handle_cancel(m, state, db, get_users_mgmt_kb())
         return
     data = await state.get_data()
-    db.update_user_profile(data['edit_user_id'], position=m.text)
+    await db.update_user_profile(data['edit_user_id'], position=m.text)
     await m.answer("✅ Должность обновлена!", reply_markup=get_users_mgmt_kb())
     await state.clear()
 
 # 4. Удаление
 @router.callback_query(F.data.startswith("delete_usr_"))
-async def delete_usr_handler(c: types.CallbackQuery, db: FDataBase):
-    if not check_callback_access(c, db): return
+async def delete_usr_handler(c: types.CallbackQuery, db: AsyncFDataBase):
+    if not await check_callback_access(c, db): return
     user_id = int(c.data.split("_")[2])
     # Используем reject_user как удаление
-    db.reject_user(user_id) 
+    await db.reject_user(user_id) 
     await c.answer("🗑 Сотрудник удален из базы", show_alert=True)
     await show_employees_list(c.message, db, 0)
\ No newline at end of file
@@ -9,14 +9,14 @@ from datetime import datetime, timedelta
 from utils.keyboards import *
 from utils.states import UserStates
 from utils.ics_generator import IcsGenerator
-from database import FDataBase
+from database import AsyncFDataBase
 
 router = Router()
 
 @router.message(CommandStart())
-async def start(message: types.Message, db: FDataBase, state: FSMContext):
-    user = db.get_user(message.from_user.id)
-    admin = db.get_admin(message.from_user.id)
+async def start(message: types.Message, db: AsyncFDataBase, state: FSMContext):
+    user = await db.get_user(message.from_user.id)
+    admin = await db.get_admin(message.from_user.id)
     
     if user:
         if user.get('status') != 'approved' and not admin:
@@ -27,7 +27,7 @@ async def start(message: types.Message, db: FDataBase, state: FSMContext):
             )
             return
         
-        db.update_user_activity(message.from_user.id)
+        await db.update_user_activity(message.from_user.id)
         is_admin = bool(admin)
         await message.answer(
             "👋 <b>Добро пожаловать в ConfIQ!</b>\n\n"
@@ -112,17 +112,17 @@ async def process_position(message: types.Message, state: FSMContext):
     await message.answer(text, parse_mode="HTML", reply_markup=get_registration_confirm_keyboard())
 
 @router.callback_query(F.data == "confirm_registration")
-async def confirm_registration_handler(callback: types.CallbackQuery, state: FSMContext, db: FDataBase):
+async def confirm_registration_handler(callback: types.CallbackQuery, state: FSMContext, db: AsyncFDataBase, broadcast):
     data = await state.get_data()
     
-    success = db.add_user(
+    success = await db.add_user(
         callback.from_user.id,
         callback.from_user.username or "unknown",
         data['full_name']
     )
     
     if success:
-        db.update_user_profile(
+        await db.update_user_profile(
             callback.from_user.id,
             email=data['email'],
             phone=data['phone'],
@@ -130,9 +130,9 @@ async def confirm_registration_handler(callback: types.CallbackQuery, state: FSM
         )
         await state.clear()
         
-        admin = db.get_admin(callback.from_user.id)
+        admin = await db.get_admin(callback.from_user.id)
         if admin:
-            db.force_approve_user(callback.from_user.id)
+            await db.force_approve_user(callback.from_user.id)
             await callback.message.edit_text("✅ <b>Регистрация завершена!</b>\nВы администратор.", parse_mode="HTML")
             await callback.message.answer("Меню:", reply_markup=get_main_keyboard(True))
         else:
@@ -140,16 +140,12 @@ async def confirm_registration_handler(callback: types.CallbackQuery, state: FSM
                 "✅ <b>Заявка отправлена!</b>\nОжидайте подтверждения.", 
                 parse_mode="HTML"
             )
-            admins = db.get_all_admins()
-            for adm in admins:
-                if adm.get('is_active'):
-                    try:
-                        await callback.bot.send_message(
-                            adm['telegram_id'], 
-                            f"👤 <b>НОВАЯ ЗАЯВКА</b>\n{data['full_name']}\n{data['position']}", 
-                            parse_mode="HTML"
-                        )
-                    except: pass
+            admins = await db.get_all_admins()
+            await broadcast.enqueue_many([{
+                'chat_id': adm['telegram_id'],
+                'text': f"👤 <b>НОВАЯ ЗАЯВКА</b>\n{data['full_name']}\n{data['position']}",
+                'dedupe_key': f"new_user:{callback.from_user.id}:{adm['telegram_id']}"
+            } for adm in admins if adm.get('is_active')])
     else:
         await callback.answer("Ошибка регистрации")
 
@@ -165,31 +161,35 @@ async def show_events_menu(message: types.Message):
                         reply_markup=get_events_type_keyboard())
 
 @router.message(F.text == "📋 Основные мероприятия")
-async def show_main_events(message: types.Message, db: FDataBase):
-    user = db.get_user(message.from_user.id)
+async def show_main_events(message: types.Message, db: AsyncFDataBase):
+    user = await db.get_user(message.from_user.id)
     if not user or user.get('status') != 'approved':
         await message.answer("⏳ Аккаунт не подтвержден")
         return
     
     await show_events_page(message, db, 0, 'main')
 
-async def show_events_page(message: types.Message, db: FDataBase, page: int, event_type='main'):
+async def show_events_page(message: types.Message, db: AsyncFDataBase, page: int, event_type='main', cursor: str = None, backward: bool = False):
     if event_type == 'main':
-        events = await asyncio.to_thread(db.get_events_paginated, message.from_user.id, page, 1, None)
-        total = await asyncio.to_thread(db.get_total_approved_events, 'main')
+        events = await db.get_events_paginated(message.from_user.id, page, 1, None, cursor, backward)
+        total = await db.get_total_approved_events('main')
         title = "📅 Основные мероприятия"
+        cursor_kind = 'feed'
     elif event_type == 'priority':
-        events = await asyncio.to_thread(db.get_high_priority_events_paginated, message.from_user.id, page, 1)
-        total = await asyncio.to_thread(db.get_total_priority_events, message.from_user.id)
+        events = await db.get_high_priority_events_paginated(message.from_user.id, page, 1, cursor, backward)
+        total = await db.get_total_priority_events(message.from_user.id)
         title = "🔥 Приоритетные мероприятия"
+        cursor_kind = 'priority'
     elif event_type == 'partner':
-        events = await asyncio.to_thread(db.get_partner_events_paginated, message.from_user.id, page, 1)
-        total = await asyncio.to_thread(db.get_total_partner_events, message.from_user.id)
+        events = await db.get_partner_events_paginated(message.from_user.id, page, 1, cursor, backward)
+        total = await db.get_total_partner_events(message.from_user.id)
         title = "🤝 Партнёрские мероприятия"
+        cursor_kind = 'partner'
     elif event_type == 'my_events':
-        events = await asyncio.to_thread(db.get_user_events_paginated, message.from_user.id, page, 1)
-        total = await asyncio.to_thread(db.get_total_user_events, message.from_user.id)
+        events = await db.get_user_events_paginated(message.from_user.id, page, 1, cursor, backward)
+        total = await db.get_total_user_events(message.from_user.id)
         title = "📅 Мои мероприятия"
+        cursor_kind = 'my_events'
     
     if not events:
         await message.answer("📭 Мероприятий пока нет.")
@@ -225,21 +225,21 @@ async def show_events_page(message: types.Message, db: FDataBase, page: int, eve
             f"📝 <b>Описание:</b>\n{event['description'][:300]}..."
         )
     
-    kb = get_events_pagination_keyboard(events, page, max(1, total), event_type)
+    kb = get_events_pagination_keyboard(events, page, max(1, total), event_type, db.page_cursor(cursor_kind, event))
     
     await message.answer(text, parse_mode="HTML", reply_markup=kb)
 
-def get_events_pagination_keyboard(events: list, current_page: int, total_pages: int, event_type: str = 'main') -> InlineKeyboardMarkup:
+def get_events_pagination_keyboard(events: list, current_page: int, total_pages: int, event_type: str = 'main', cursor: str = None) -> InlineKeyboardMarkup:
     buttons = []
     
     nav_buttons = []
     if current_page > 0:
-        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"{event_type}_page_{current_page - 1}"))
+        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=page_callback(f"{event_type}_page_", current_page - 1, cursor, True)))
     
     nav_buttons.append(InlineKeyboardButton(text=f"{current_page + 1}/{total_pages}", callback_data="ignore"))
     
     if current_page < total_pages - 1:
-        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"{event_type}_page_{current_page + 1}"))
+        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=page_callback(f"{event_type}_page_", current_page + 1, cursor)))
     
     if nav_buttons:
         buttons.append(nav_buttons)
@@ -252,44 +252,44 @@ def get_events_pagination_keyboard(events: list, current_page: int, total_pages:
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
 @router.callback_query(F.data.startswith("main_page_"))
-async def main_pagination_handler(callback: types.CallbackQuery, db: FDataBase):
+async def main_pagination_handler(callback: types.CallbackQuery, db: AsyncFDataBase):
     try:
-        page = int(callback.data.split("_")[2])
+        page, cursor, backward = parse_page_callback(callback.data, "main_page_")
         await callback.message.delete()
-        await show_events_page(callback.message, db, page, 'main')
+        await show_events_page(callback.message, db, page, 'main', cursor, backward)
     except Exception as e:
         await callback.answer("❌ Ошибка навигации")
 
 @router.callback_query(F.data.startswith("priority_page_"))
-async def priority_pagination_handler(callback: types.CallbackQuery, db: FDataBase):
+async def priority_pagination_handler(callback: types.CallbackQuery, db: AsyncFDataBase):
     try:
-        page = int(callback.data.split("_")[2])
+        page, cursor, backward = parse_page_callback(callback.data, "priority_page_")
         await callback.message.delete()
-        await show_events_page(callback.message, db, page, 'priority')
+        await show_events_page(callback.message, db, page, 'priority', cursor, backward)
     except Exception as e:
         await callback.answer("❌ Ошибка навигации")
 
 @router.callback_query(F.data.startswith("partner_page_"))
-async def partner_pagination_handler(callback: types.CallbackQuery, db: FDataBase):
+async def partner_pagination_handler(callback: types.CallbackQuery, db: AsyncFDataBase):
     try:
-        page = int(callback.data.split("_")[2])
+        page, cursor, backward = parse_page_callback(callback.data, "partner_page_")
         await callback.message.delete()
-        await show_events_page(callback.message, db, page, 'partner')
+        await show_events_page(callback.message, db, page, 'partner', cursor, backward)
     except Exception as e:
         await callback.answer("❌ Ошибка навигации")
 
 @router.callback_query(F.data.startswith("my_events_page_"))
-async def my_events_pagination_handler(callback: types.CallbackQuery, db: FDataBase):
+async def my_events_pagination_handler(callback: types.CallbackQuery, db: AsyncFDataBase):
     try:
-        page = int(callback.data.split("_")[3])
+        page, cursor, backward = parse_page_callback(callback.data, "my_events_page_")
         await callback.message.delete()
-        await show_events_page(callback.message, db, page, 'my_events')
+        await show_events_page(callback.message, db, page, 'my_events', cursor, backward)
     except Exception as e:
         await callback.answer("❌ Ошибка навигации")
 
 @router.message(F.text == "🔥 Приоритетные")
-async def show_priority(message: types.Message, db: FDataBase):
-    user = db.get_user(message.from_user.id)
+async def show_priority(message: types.Message, db: AsyncFDataBase):
+    user = await db.get_user(message.from_user.id)
     if not user or user.get('status') != 'approved':
         await message.answer("⏳ Аккаунт не подтвержден")
         return
@@ -297,8 +297,8 @@ async def show_priority(message: types.Message, db: FDataBase):
     await show_events_page(message, db, 0, 'priority')
 
 @router.message(F.text == "🤝 Партнёрские мероприятия")
-async def show_partner_events(message: types.Message, db: FDataBase):
-    user = db.get_user(message.from_user.id)
+async def show_partner_events(message: types.Message, db: AsyncFDataBase):
+    user = await db.get_user(message.from_user.id)
     if not user or user.get('status') != 'approved':
         await message.answer("⏳ Аккаунт не подтвержден")
         return
@@ -306,8 +306,8 @@ async def show_partner_events(message: types.Message, db: FDataBase):
     await show_events_page(message, db, 0, 'partner')
 
 @router.message(F.text == "🔍 Поиск мероприятий")
-async def search_start(message: types.Message, state: FSMContext, db: FDataBase):
-    user = db.get_user(message.from_user.id)
+async def search_start(message: types.Message, state: FSMContext, db: AsyncFDataBase):
+    user = await db.get_user(message.from_user.id)
     if not user or user.get('status') != 'approved': return
     
     await state.set_state(UserStates.waiting_for_search_text)
@@ -319,10 +319,10 @@ async def search_start(message: types.Message, state: FSMContext, db: FDataBase)
     )
 
 @router.message(UserStates.waiting_for_search_text)
-async def search_process(message: types.Message, state: FSMContext, db: FDataBase):
+async def search_process(message: types.Message, state: FSMContext, db: AsyncFDataBase):
     if message.text == "❌ Отменить поиск":
         await state.clear()
-        is_admin = bool(db.get_admin(message.from_user.id))
+        is_admin = bool(await db.get_admin(message.from_user.id))
         await message.answer("🔍 Поиск отменен", reply_markup=get_main_keyboard(is_admin))
         return
     
@@ -389,7 +389,7 @@ async def search_process(message: types.Message, state: FSMContext, db: FDataBas
     if current_filters and message.text != "🔍 Все мероприятия":
         await perform_smart_search(message, state, db, current_filters)
 
-async def perform_smart_search(message: types.Message, state: FSMContext, db: FDataBase, filters: list):
+async def perform_smart_search(message: types.Message, state: FSMContext, db: AsyncFDataBase, filters: list):
     wait_msg = await message.answer("⏳ <b>Ищу мероприятия по выбранным фильтрам...</b>", parse_mode="HTML")
     
     try:
@@ -405,8 +405,7 @@ async def perform_smart_search(message: types.Message, state: FSMContext, db: FD
             else:
                 keywords.append(filter_type)
         
-        events = await asyncio.to_thread(db.search_events_with_filters, 
-                                       message.from_user.id, 
+        events = await db.search_events_with_filters(message.from_user.id, 
                                        keywords, 
                                        date_filter, 
                                        priority_filter)
@@ -432,7 +431,7 @@ async def perform_smart_search(message: types.Message, state: FSMContext, db: FD
         await wait_msg.delete()
         await message.answer(f"❌ Ошибка при поиске: {str(e)}")
 
-async def show_search_results(message: types.Message, events: list, db: FDataBase):
+async def show_search_results(message: types.Message, events: list, db: AsyncFDataBase):
     text = f"🔍 <b>Найдено мероприятий: {len(events)}</b>\n\n"
     
     for i, event in enumerate(events[:10], 1):
@@ -445,9 +444,9 @@ async def show_search_results(message: types.Message, events: list, db: FDataBas
         reply_markup=get_selection_keyboard(events[:10])
     )
 
-async def show_event_details(message: types.Message, event: dict, db: FDataBase):
-    user = db.get_user(message.from_user.id)
-    user_events = db.get_user_events(user['id'])
+async def show_event_details(message: types.Message, event: dict, db: AsyncFDataBase):
+    user = await db.get_user(message.from_user.id)
+    user_events = await db.get_user_events(user['id'])
     
     reg_status = 'none'
     for ue in user_events:
@@ -455,7 +454,7 @@ async def show_event_details(message: types.Message, event: dict, db: FDataBase)
             reg_status = ue['status']
             break
             
-    is_admin = bool(db.get_admin(message.from_user.id))
+    is_admin = bool(await db.get_admin(message.from_user.id))
     
     text = (
         f"🎯 <b>{event['title']}</b>\n\n"
@@ -473,11 +472,11 @@ async def show_event_details(message: types.Message, event: dict, db: FDataBase)
     )
 
 @router.message(F.text == "👤 Профиль")
-async def show_profile(message: types.Message, db: FDataBase):
-    user = db.get_user(message.from_user.id)
+async def show_profile(message: types.Message, db: AsyncFDataBase):
+    user = await db.get_user(message.from_user.id)
     if not user: return
     
-    stats = await asyncio.to_thread(db.get_user_stats, user['id'])
+    stats = await db.get_user_stats(user['id'])
     
     text = (
         f"👤 <b>Профиль сотрудника</b>\n\n"
@@ -489,8 +488,8 @@ async def show_profile(message: types.Message, db: FDataBase):
     await message.answer(text, parse_mode="HTML", reply_markup=get_profile_keyboard())
 
 @router.message(F.text == "📅 Мои мероприятия")
-async def show_my_events(message: types.Message, db: FDataBase):
-    user = db.get_user(message.from_user.id)
+async def show_my_events(message: types.Message, db: AsyncFDataBase):
+    user = await db.get_user(message.from_user.id)
     if not user: return
     
     await show_events_page(message, db, 0, 'my_events')
@@ -502,13 +501,13 @@ async def export_calendar_menu(message: types.Message):
                         reply_markup=get_export_calendar_keyboard())
 
 @router.message(F.text == "📅 Экспорт моих мероприятий")
-async def export_my_events(message: types.Message, db: FDataBase):
-    user = db.get_user(message.from_user.id)
+async def export_my_events(message: types.Message, db: AsyncFDataBase):
+    user = await db.get_user(message.from_user.id)
     if not user: return
     
     wait_msg = await message.answer("⏳ <b>Генерирую файл с вашими мероприятиями...</b>", parse_mode="HTML")
     
-    events = await asyncio.to_thread(db.get_user_events, user['id'])
+    events = await db.get_user_events(user['id'])
     
     if not events:
         await wait_msg.delete()
@@ -516,7 +515,7 @@ async def export_my_events(message: types.Message, db: FDataBase):
         return
         
     ics_content = await asyncio.to_thread(IcsGenerator.generate_bulk_ics, events)
-    file = BufferedInputFile(ics_content.encode('utf-8'), filename="my_events.ics")
+    file = BufferedInputFile(ics_content, filename="my_events.ics")
     
     await wait_msg.delete()
     await message.answer_document(
@@ -525,63 +524,75 @@ async def export_my_events(message: types.Message, db: FDataBase):
         parse_mode="HTML"
     )
 
+@router.message(F.text == "🔗 Подписка на календарь")
+async def subscribe_calendar(message: types.Message, db: AsyncFDataBase, feed):
+    user = await db.get_user(message.from_user.id)
+    if not user or user.get('status') != 'approved':
+        await message.answer("⛔ Подписка доступна только подтвержденным пользователям.")
+        return
+    if not feed:
+        await message.answer("❌ Календарная подписка сейчас недоступна.")
+        return
+
+    token = await db.ensure_feed_token(message.from_user.id)
+    if not token:
+        await message.answer("❌ Не удалось создать ссылку подписки.")
+        return
+    await message.answer(
+        f"🔗 <b>Подписка на ваши мероприятия</b>\n\n"
+        f"<code>{feed.url_for(token)}</code>\n\n"
+        f"Добавьте ссылку в Google Calendar или Outlook («Добавить календарь по URL»). "
+        f"Календарь будет обновляться сам при изменении ваших записей.\n"
+        f"⚠️ Не передавайте ссылку другим.",
+        parse_mode="HTML"
+    )
+
 @router.callback_query(F.data.startswith("export_single_event_"))
-async def export_single_event(callback: types.CallbackQuery, db: FDataBase):
+async def export_single_event(callback: types.CallbackQuery, db: AsyncFDataBase, ics_cache):
     try:
         eid = int(callback.data.split("_")[3])
     except: 
         await callback.answer("❌ Ошибка")
         return
     
-    event = db.get_event_by_id(eid)
+    event = await db.get_event_by_id(eid)
     if not event:
         await callback.answer("❌ Событие не найдено")
         return
     
-    user = db.get_user(callback.from_user.id)
+    user = await db.get_user(callback.from_user.id)
     if not user:
         await callback.answer("❌ Пользователь не найден")
         return
     
-    user_events = db.get_user_events(user['id'])
+    user_events = await db.get_user_events(user['id'])
     is_registered = any(ue['id'] == eid for ue in user_events)
     
     if not is_registered:
         await callback.answer("❌ Вы не записаны на это мероприятие")
         return
     
-    wait_msg = await callback.message.answer("⏳ <b>Генерирую файл мероприятия...</b>", parse_mode="HTML")
-    
-    ics_content = await asyncio.to_thread(IcsGenerator.generate_ics, 
-                                         event['title'], 
-                                         event['description'],
-                                         event['location'],
-                                         event['date_str'])
-    
-    file_name = f"{event['title'][:50]}.ics".replace('/', '-')
-    file = BufferedInputFile(ics_content.encode('utf-8'), filename=file_name)
-    
-    await wait_msg.delete()
-    await callback.message.answer_document(
-        file, 
-        caption=f"✅ <b>Готово!</b>\nФайл мероприятия '{event['title']}' создан.\nИмпортируйте его в календарь.",
-        parse_mode="HTML"
+    await ics_cache.send(
+        callback.bot,
+        callback.message.chat.id,
+        event,
+        caption=f"✅ <b>Готово!</b>\nФайл мероприятия '{event['title']}' создан.\nИмпортируйте его в календарь."
     )
     await callback.answer()
 
 @router.callback_query(F.data.startswith("event_details_"))
-async def event_details(callback: types.CallbackQuery, db: FDataBase):
+async def event_details(callback: types.CallbackQuery, db: AsyncFDataBase):
     try:
         eid = int(callback.data.split("_")[2])
     except: return
     
-    event = db.get_event_by_id(eid)
+    event = await db.get_event_by_id(eid)
     if not event:
         await callback.answer("Событие не найдено")
         return
     
-    user = db.get_user(callback.from_user.id)
-    user_events = db.get_user_events(user['id'])
+    user = await db.get_user(callback.from_user.id)
+    user_events = await db.get_user_events(user['id'])
     
     reg_status = 'none'
     for ue in user_events:
@@ -589,7 +600,7 @@ async def event_details(callback: types.CallbackQuery, db: FDataBase):
             reg_status = ue['status']
             break
             
-    is_admin = bool(db.get_admin(callback.from_user.id))
+    is_admin = bool(await db.get_admin(callback.from_user.id))
     
     try:
         analysis = json.loads(event['analysis'])
@@ -614,46 +625,38 @@ async def event_details(callback: types.CallbackQuery, db: FDataBase):
     await callback.answer()
 
 @router.callback_query(F.data.startswith("request_registration_"))
-async def request_reg(callback: types.CallbackQuery, db: FDataBase):
-    user = db.get_user(callback.from_user.id)
+async def request_reg(callback: types.CallbackQuery, db: AsyncFDataBase, ics_cache):
+    user = await db.get_user(callback.from_user.id)
     eid = int(callback.data.split("_")[2])
     
     user_rank = db._get_position_rank(user['position'])
     
-    if db.add_user_event(user['id'], eid):
+    if await db.add_user_event(user['id'], eid):
         if user_rank >= 3:
             await callback.answer("✅ Вы успешно записаны (Автоподтверждение)!")
-            db.approve_registration(user['id'], eid)
+            await db.approve_registration(user['id'], eid)
             
-            event = db.get_event_by_id(eid)
+            event = await db.get_event_by_id(eid)
             if event:
-                ics_content = await asyncio.to_thread(IcsGenerator.generate_ics, 
-                                                     event['title'], 
-                                                     event['description'],
-                                                     event['location'],
-                                                     event['date_str'])
-                file_name = f"{event['title'][:50]}.ics".replace('/', '-')
-                file = BufferedInputFile(ics_content.encode('utf-8'), filename=file_name)
-                
                 try:
-                    await callback.bot.send_document(
+                    await ics_cache.send(
+                        callback.bot,
                         user['telegram_id'],
-                        document=file,
-                        caption=f"✅ <b>Вы успешно записаны на мероприятие!</b>\n\n🎯 <b>{event['title']}</b>\n📅 {event['date_str']}",
-                        parse_mode="HTML"
+                        event,
+                        caption=f"✅ <b>Вы успешно записаны на мероприятие!</b>\n\n🎯 <b>{event['title']}</b>\n📅 {event['date_str']}"
                     )
                 except: pass
         else:
             await callback.answer("⏳ Заявка отправлена на подтверждение руководителю")
-            manager = db.get_user_manager(user['telegram_id'])
+            manager = await db.get_user_manager(user['telegram_id'])
 
             if not manager:
-                 admins = db.get_all_admins()
+                 admins = await db.get_all_admins()
                  if admins: manager = admins[0]
 
             if manager:
                 try:
-                    event = db.get_event_by_id(eid)
+                    event = await db.get_event_by_id(eid)
                     await callback.bot.send_message(
                         manager['telegram_id'],
                         f"📝 <b>ЗАПРОС НА РЕГИСТРАЦИЮ</b>\n\n"
@@ -669,8 +672,8 @@ async def request_reg(callback: types.CallbackQuery, db: FDataBase):
                     )
                 except: pass
         
-        event = db.get_event_by_id(eid)
-        is_admin = bool(db.get_admin(callback.from_user.id))
+        event = await db.get_event_by_id(eid)
+        is_admin = bool(await db.get_admin(callback.from_user.id))
         try:
             status_display = 'approved' if user_rank >= 3 else 'pending'
             await callback.message.edit_reply_markup(
@@ -681,15 +684,15 @@ async def request_reg(callback: types.CallbackQuery, db: FDataBase):
         await callback.answer("⚠️ Вы уже записаны или заявка на рассмотрении")
 
 @router.callback_query(F.data.startswith("remove_from_calendar_"))
-async def remove_reg(callback: types.CallbackQuery, db: FDataBase):
-    user = db.get_user(callback.from_user.id)
+async def remove_reg(callback: types.CallbackQuery, db: AsyncFDataBase):
+    user = await db.get_user(callback.from_user.id)
     eid = int(callback.data.split("_")[3])
     
-    if db.remove_user_event(user['id'], eid):
+    if await db.remove_user_event(user['id'], eid):
         await callback.answer("🗑 Запись отменена")
         
-        event = db.get_event_by_id(eid)
-        is_admin = bool(db.get_admin(callback.from_user.id))
+        event = await db.get_event_by_id(eid)
+        is_admin = bool(await db.get_admin(callback.from_user.id))
         try:
             await callback.message.edit_reply_markup(
                 reply_markup=get_event_detail_keyboard(eid, event['url'], 'none', is_admin)
@@ -703,13 +706,13 @@ async def pending_info(callback: types.CallbackQuery):
     await callback.answer("Ваша заявка находится на рассмотрении у руководителя.", show_alert=True)
 
 @router.callback_query(F.data == "close_message")
-async def close_msg(callback: types.CallbackQuery, db: FDataBase):
+async def close_msg(callback: types.CallbackQuery, db: AsyncFDataBase):
     try: 
         await callback.message.delete()
     except: 
         pass
     
-    admin = db.get_admin(callback.from_user.id)
+    admin = await db.get_admin(callback.from_user.id)
     is_admin = bool(admin)
     await callback.message.answer(
         "🔙 <b>Главное меню</b>",
@@ -719,13 +722,13 @@ async def close_msg(callback: types.CallbackQuery, db: FDataBase):
     await callback.answer()
 
 @router.callback_query(F.data == "close_profile")
-async def close_prof(callback: types.CallbackQuery, db: FDataBase):
+async def close_prof(callback: types.CallbackQuery, db: AsyncFDataBase):
     try: 
         await callback.message.delete()
     except: 
         pass
     
-    admin = db.get_admin(callback.from_user.id)
+    admin = await db.get_admin(callback.from_user.id)
     is_admin = bool(admin)
     await callback.message.answer(
         "🔙 <b>Главное меню</b>",
@@ -735,13 +738,13 @@ async def close_prof(callback: types.CallbackQuery, db: FDataBase):
     await callback.answer()
 
 @router.callback_query(F.data == "back_to_main_menu")
-async def back_to_main_menu_callback(callback: types.CallbackQuery, db: FDataBase):
+async def back_to_main_menu_callback(callback: types.CallbackQuery, db: AsyncFDataBase):
     try: 
         await callback.message.delete()
     except: 
         pass
     
-    admin = db.get_admin(callback.from_user.id)
+    admin = await db.get_admin(callback.from_user.id)
     is_admin = bool(admin)
     await callback.message.answer(
         "🔙 <b>Главное меню</b>",
@@ -751,8 +754,8 @@ async def back_to_main_menu_callback(callback: types.CallbackQuery, db: FDataBas
     await callback.answer()
 
 @router.message(F.text == "⬅️ Главное меню")
-async def back_to_main_menu(message: types.Message, db: FDataBase):
-    admin = db.get_admin(message.from_user.id)
+async def back_to_main_menu(message: types.Message, db: AsyncFDataBase):
+    admin = await db.get_admin(message.from_user.id)
     is_admin = bool(admin)
     await message.answer(
         "🔙 <b>Главное меню</b>",
@@ -1,11 +1,15 @@
+import time
+STARTED_AT = time.perf_counter()
+
+import argparse
 import asyncio
-import sqlite3
 import logging
+import multiprocessing
 from aiogram import Bot, Dispatcher, BaseMiddleware
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
 from typing import Callable, Dict, Any, Awaitable
 from aiogram.types import TelegramObject
-from datetime import datetime, timedelta, timezone
 
 try:
     from config import BOT_TOKEN, BOT_CONFIG
@@ -13,12 +17,33 @@ except ImportError:
     BOT_TOKEN = "YOUR_TOKEN_HERE"
     BOT_CONFIG = {'admin_ids': []}
 
-from database import FDataBase
+try:
+    from config import FEED_CONFIG
+except ImportError:
+    FEED_CONFIG = {}
+
+try:
+    from config import WEBHOOK_CONFIG
+except ImportError:
+    WEBHOOK_CONFIG = {}
+
+try:
+    from config import DATABASE_CONFIG
+except ImportError:
+    DATABASE_CONFIG = {}
+
+from database import AsyncFDataBase
 from services.gigachat_service import GigaChatService
+from services.analysis_cache import AnalysisCache
 from services.parser_service import ParserService
+from services.scheduler import NotificationScheduler
+from services.broadcast import BroadcastService
+from services.ics_cache import IcsArtifactCache
+from services.feed_server import CalendarFeedServer
+from services.leader import LeaderElector
+from utils.fsm_storage import SQLiteStorage
 from handlers.user_handlers import router as user_router
 from handlers.admin_handlers import router as admin_router
-from utils.keyboards import get_admin_main_kb
 
 logging.basicConfig(
     level=logging.INFO,
@@ -29,15 +54,27 @@ logging.basicConfig(
     ]
 )
 
+if DATABASE_CONFIG.get('slow_query_log', 'slow_queries.log'):
+    slow_query_handler = logging.FileHandler(DATABASE_CONFIG.get('slow_query_log', 'slow_queries.log'), encoding='utf-8')
+    slow_query_handler.setFormatter(logging.Formatter("%(asctime)s - %(process)d - %(message)s"))
+    logging.getLogger('slow_queries').addHandler(slow_query_handler)
+
 logger = logging.getLogger(__name__)
 
 OWNER_ID = BOT_CONFIG['admin_ids'][0] if BOT_CONFIG.get('admin_ids') else 0
+DB_PATH = 'sber_events.db'
 
 class DataMiddleware(BaseMiddleware):
-    def __init__(self, db: FDataBase, gigachat: GigaChatService, parser: ParserService):
+    def __init__(self, db: AsyncFDataBase, gigachat: GigaChatService, parser: ParserService,
+                 scheduler: NotificationScheduler, broadcast: BroadcastService, ics_cache: IcsArtifactCache,
+                 feed: CalendarFeedServer = None):
         self.db = db
         self.gigachat = gigachat
         self.parser = parser
+        self.scheduler = scheduler
+        self.broadcast = broadcast
+        self.ics_cache = ics_cache
+        self.feed = feed
 
     async def __call__(
         self,
@@ -48,86 +85,102 @@ class DataMiddleware(BaseMiddleware):
         data["db"] = self.db
         data["gigachat"] = self.gigachat
         data["parser"] = self.parser
+        data["scheduler"] = self.scheduler
+        data["broadcast"] = self.broadcast
+        data["ics_cache"] = self.ics_cache
+        data["feed"] = self.feed
         return await handler(event, data)
 
-async def notification_scheduler(bot: Bot, db: FDataBase):
-    logger.info("⏰ Notification scheduler started")
-    while True:
-        try:
-            now = datetime.now(timezone.utc).replace(tzinfo=None) + timedelta(hours=3)
-            
-            current_day = str(now.weekday())
-            current_time = now.strftime("%H:%M")
-            sleep_seconds = 60 - now.second + 1
-            admins_to_notify = {}
-            
-            daily_admins = await asyncio.to_thread(db.get_admins_by_notification, current_day, current_time)
-            for admin in daily_admins:
-                admins_to_notify[admin['telegram_id']] = admin
-
-            if now.day == 1:
-                monthly_admins = await asyncio.to_thread(db.get_admins_by_notification, 'every_month', current_time)
-                for admin in monthly_admins:
-                    admins_to_notify[admin['telegram_id']] = admin
-            if admins_to_notify:
-                pending_regs = await asyncio.to_thread(db.get_pending_registrations)
-                
-                if pending_regs:
-                    count = len(pending_regs)
-                    logger.info(f"⏰ Time {current_time}. Found pending regs: {count}. Notifying {len(admins_to_notify)} admins.")
-                    
-                    for admin_id, admin in admins_to_notify.items():
-                        try:
-                            await bot.send_message(
-                                admin_id,
-                                f"🔔 <b>Напоминание для Руководителя</b>\n\n"
-                                f"Сейчас <b>{count}</b> заявок на регистрацию ожидают вашего подтверждения.\n"
-                                f"Пожалуйста, проверьте раздел 'Утвердить записи'.",
-                                parse_mode="HTML",
-                                reply_markup=get_admin_main_kb(admin['role'])
-                            )
-                        except Exception as e:
-                            logger.error(f"Failed to send notification to {admin_id}: {e}")
-                else:
-                    pass
-            
-            await asyncio.sleep(sleep_seconds)
-            
-        except Exception as e:
-            logger.error(f"Scheduler error: {e}")
-            await asyncio.sleep(60)
-
-async def main():
-    logger.info("🚀 Starting AI Media Agent Sber...")
-    
-    try:
-        conn = sqlite3.connect('sber_events.db', check_same_thread=False)
-        conn.row_factory = sqlite3.Row
-        db = FDataBase(conn)
-        logger.info("✅ Database initialized successfully")
-    except Exception as e:
-        logger.error(f"❌ Database initialization failed: {e}")
-        return
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="AI Media Agent Sber")
+    parser.add_argument('--mode', choices=('polling', 'webhook'), default=WEBHOOK_CONFIG.get('mode', 'polling'))
+    parser.add_argument('--workers', type=int, default=WEBHOOK_CONFIG.get('workers', 1))
+    parser.add_argument('--host', default=WEBHOOK_CONFIG.get('host', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=WEBHOOK_CONFIG.get('port', 8443))
+    parser.add_argument('--token', default=BOT_TOKEN)
+    parser.add_argument('--api-server', default=WEBHOOK_CONFIG.get('api_server'))
+    parser.add_argument('--no-set-webhook', action='store_true')
+    parser.add_argument('--check-startup', action='store_true', help="initialize everything, report time until ready to poll or serve webhooks and exit")
+    return parser.parse_args(argv)
 
+def make_bot(args: argparse.Namespace) -> Bot:
+    session = AiohttpSession(api=TelegramAPIServer.from_base(args.api_server)) if args.api_server else None
+    return Bot(token=args.token, session=session)
+
+async def setup_owner(db: AsyncFDataBase):
     try:
         if OWNER_ID != 0:
-            admin_data = db.get_admin(OWNER_ID)
+            admin_data = await db.get_admin(OWNER_ID)
             if not admin_data:
-                db.add_admin(OWNER_ID, "Owner", "TechSupport")
+                await db.add_admin(OWNER_ID, "Owner", "TechSupport")
                 logger.info(f"✅ Owner {OWNER_ID} added as TechSupport")
                 
-            user_data = db.get_user(OWNER_ID)
+            user_data = await db.get_user(OWNER_ID)
             if not user_data:
-                db.add_user(OWNER_ID, "Owner", "Owner")
-                db.force_approve_user(OWNER_ID)
+                await db.add_user(OWNER_ID, "Owner", "Owner")
+                await db.force_approve_user(OWNER_ID)
             elif user_data.get('status') != 'approved':
-                db.force_approve_user(OWNER_ID)
+                await db.force_approve_user(OWNER_ID)
                 
     except Exception as e:
         logger.error(f"❌ Owner setup error: {e}")
 
+async def configure_webhook(args: argparse.Namespace):
+    bot = make_bot(args)
+    try:
+        await bot.set_webhook(
+            url=f"{WEBHOOK_CONFIG.get('url', '').rstrip('/')}{WEBHOOK_CONFIG.get('path', '/webhook')}",
+            secret_token=WEBHOOK_CONFIG.get('secret') or None,
+            max_connections=WEBHOOK_CONFIG.get('max_connections', 40)
+        )
+        logger.info("✅ Webhook registered")
+    finally:
+        await bot.session.close()
+
+async def serve_webhook(args: argparse.Namespace, dp: Dispatcher, bot: Bot, feed: CalendarFeedServer = None):
+    from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+    from aiohttp import web
+
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        handle_in_background=WEBHOOK_CONFIG.get('handle_in_background', True),
+        secret_token=WEBHOOK_CONFIG.get('secret') or None
+    ).register(app, path=WEBHOOK_CONFIG.get('path', '/webhook'))
+    if feed: feed.register(app)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
     try:
-        gigachat = GigaChatService()
+        await web.TCPSite(runner, args.host, args.port, reuse_port=args.workers > 1).start()
+        logger.info(f"🌐 Webhook worker listening on {args.host}:{args.port}")
+        if args.check_startup:
+            logger.info(f"⏱ Startup check: ready to serve webhooks in {(time.perf_counter() - STARTED_AT) * 1000:.0f} ms")
+            return
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+async def run(args: argparse.Namespace):
+    logger.info(f"🚀 Starting AI Media Agent Sber ({args.mode})...")
+    shared = args.mode == 'webhook' and args.workers > 1
+    
+    try:
+        db = AsyncFDataBase(DB_PATH, shared_cache=shared)
+        db.start()
+        logger.info("✅ Database initialized successfully")
+    except Exception as e:
+        logger.error(f"❌ Database initialization failed: {e}")
+        return
+
+    await setup_owner(db)
+
+    try:
+        analysis_cache = AnalysisCache()
+        gigachat = GigaChatService(cache=analysis_cache)
+        gigachat.start()
         parser = ParserService()
         logger.info("✅ Services initialized successfully")
     except Exception as e:
@@ -135,14 +188,18 @@ async def main():
         return
 
     try:
-        bot = Bot(token=BOT_TOKEN)
-        dp = Dispatcher(storage=MemoryStorage())
+        bot = make_bot(args)
+        dp = Dispatcher(storage=SQLiteStorage())
         logger.info("✅ Bot initialized successfully")
     except Exception as e:
         logger.error(f"❌ Bot initialization failed: {e}")
         return
 
-    middleware = DataMiddleware(db, gigachat, parser)
+    scheduler = NotificationScheduler(bot, db)
+    broadcast = BroadcastService(bot, db)
+    ics_cache = IcsArtifactCache(db)
+    feed = CalendarFeedServer(db) if FEED_CONFIG.get('enabled', True) else None
+    middleware = DataMiddleware(db, gigachat, parser, scheduler, broadcast, ics_cache, feed)
     user_router.message.middleware(middleware)
     user_router.callback_query.middleware(middleware)
     admin_router.message.middleware(middleware)
@@ -150,23 +207,81 @@ async def main():
 
     dp.include_router(admin_router)
     dp.include_router(user_router)
-    
-    asyncio.create_task(notification_scheduler(bot, db))
 
-    logger.info("🤖 AI Media Agent Sber is ready! Starting polling...")
-    
+    async def become_leader():
+        scheduler.start()
+        broadcast.start()
+
+    async def step_down():
+        scheduler.stop()
+        await broadcast.stop()
+
+    elector = LeaderElector(db, become_leader, step_down)
+    if shared:
+        db.add_invalidation_listener('admins', lambda key: scheduler.reschedule())
+    elector.start()
+
     try:
-        await dp.start_polling(bot)
+        if args.mode == 'webhook':
+            await serve_webhook(args, dp, bot, feed)
+        else:
+            if feed:
+                try:
+                    await feed.start()
+                except OSError as e:
+                    logger.error(f"❌ Calendar feed failed to start: {e}")
+                    feed = middleware.feed = None
+            if args.check_startup:
+                logger.info(f"⏱ Startup check: ready to poll in {(time.perf_counter() - STARTED_AT) * 1000:.0f} ms")
+                return
+            logger.info("🤖 AI Media Agent Sber is ready! Starting polling...")
+            await dp.start_polling(bot)
     except Exception as e:
-        logger.error(f"❌ Polling error: {e}")
+        logger.error(f"❌ {args.mode.capitalize()} error: {e}")
     finally:
+        await elector.stop()
+        if feed and args.mode == 'polling': await feed.stop()
         await bot.session.close()
-        conn.close()
+        await parser.close()
+        await gigachat.aclose()
+        analysis_cache.close()
+        db.close()
         logger.info("👋 Bot stopped")
 
+def run_worker(args: argparse.Namespace):
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.check_startup:
+        asyncio.run(run(args))
+        return
+
+    if args.mode == 'webhook' and not args.no_set_webhook:
+        asyncio.run(configure_webhook(args))
+
+    if args.mode == 'webhook' and args.workers > 1:
+        AsyncFDataBase(DB_PATH).close()
+        context = multiprocessing.get_context('spawn')
+        workers = [context.Process(target=run_worker, args=(args,), name=f"worker-{i}") for i in range(args.workers)]
+        for worker in workers:
+            worker.start()
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.join(timeout=15)
+                if worker.is_alive(): worker.terminate()
+    else:
+        asyncio.run(run(args))
+
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        main()
     except KeyboardInterrupt:
         print("\n👋 Bot stopped by user")
     except Exception as e:
@@ -0,0 +1,130 @@
+import asyncio
+import hashlib
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+try:
+    from config import ANALYSIS_CACHE_CONFIG
+except ImportError:
+    ANALYSIS_CACHE_CONFIG = {}
+
+logger = logging.getLogger(__name__)
+
+class AnalysisCache:
+    def __init__(self, path: str = None, ttl: int = None, max_entries: int = None):
+        self.path = path or ANALYSIS_CACHE_CONFIG.get('path', 'analysis_cache.db')
+        self.ttl = ttl or ANALYSIS_CACHE_CONFIG.get('ttl', 14 * 24 * 3600)
+        self.max_entries = max_entries or ANALYSIS_CACHE_CONFIG.get('max_entries', 20000)
+        self.evict_every = ANALYSIS_CACHE_CONFIG.get('evict_every', 100)
+        self.touch_batch = ANALYSIS_CACHE_CONFIG.get('touch_batch', 100)
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._touched = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_cache (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_analysis_cache_last_used ON analysis_cache(last_used)")
+        self._conn.commit()
+        self.evict()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return re.sub(r'\s+', ' ', text or '').strip().lower()
+
+    def make_key(self, kind: str, text: str, criteria: list = None, version: int = 1) -> str:
+        payload = json.dumps([kind, version, self.normalize(text), sorted(criteria or [])], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str):
+        now = time.time()
+        try:
+            with self._lock:
+                row = self._conn.execute("SELECT result, created_at FROM analysis_cache WHERE key = ?", (key,)).fetchone()
+                if row and now - row[1] < self.ttl:
+                    self._touched[key] = now
+                    if len(self._touched) >= self.touch_batch: self._flush_touches()
+                    self.hits += 1
+                    return json.loads(row[0])
+                if row:
+                    self._conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+        except Exception as e:
+            logger.error(f"Analysis cache read error: {e}")
+        return None
+
+    def set(self, key: str, value):
+        now = time.time()
+        try:
+            with self._lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO analysis_cache (key, result, created_at, last_used) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), now, now)
+                )
+                self._conn.commit()
+                self._writes += 1
+            if self._writes % self.evict_every == 0:
+                self.evict()
+        except Exception as e:
+            logger.error(f"Analysis cache write error: {e}")
+
+    def _flush_touches(self):
+        touched, self._touched = self._touched, {}
+        if not touched: return
+        self._conn.executemany("UPDATE analysis_cache SET last_used = ? WHERE key = ?", [(used, key) for key, used in touched.items()])
+        self._conn.commit()
+
+    async def aget(self, key: str):
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value):
+        await asyncio.to_thread(self.set, key, value)
+
+    def evict(self):
+        try:
+            with self._lock:
+                self._flush_touches()
+                self._conn.execute("DELETE FROM analysis_cache WHERE created_at < ?", (time.time() - self.ttl,))
+                self._conn.execute(
+                    "DELETE FROM analysis_cache WHERE key IN (SELECT key FROM analysis_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+                self._conn.commit()
+        except Exception as e:
+            logger.error(f"Analysis cache eviction error: {e}")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        try:
+            with self._lock:
+                entries = self._conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+        except Exception:
+            entries = 0
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": entries
+        }
+
+    def close(self):
+        with self._lock:
+            try:
+                self._flush_touches()
+            except Exception as e:
+                logger.error(f"Analysis cache flush error: {e}")
+            self._conn.close()
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import math
+import random
+import time
+
+try:
+    from config import ANALYSIS_CONFIG
+except ImportError:
+    ANALYSIS_CONFIG = {}
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, capacity: int = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1, int(rate_per_minute // 6))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+def percentile(values: list, pct: float) -> float:
+    if not values: return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+class AnalysisPipeline:
+    def __init__(self, gigachat, concurrency: int = None, rate_per_minute: float = None, batch_size: int = None):
+        self.gigachat = gigachat
+        self.concurrency = concurrency or ANALYSIS_CONFIG.get('concurrency', 4)
+        self.batch_size = batch_size or ANALYSIS_CONFIG.get('batch_size', 5)
+        self.batch_text_limit = ANALYSIS_CONFIG.get('batch_text_limit', 600)
+        self.max_retries = ANALYSIS_CONFIG.get('max_retries', 3)
+        self.retry_backoff = ANALYSIS_CONFIG.get('retry_backoff', 1.0)
+        self.bucket = TokenBucket(rate_per_minute or ANALYSIS_CONFIG.get('rate_per_minute', 60))
+
+    def _plan_jobs(self, texts: list) -> list:
+        jobs, short = [], []
+        for idx, text in enumerate(texts):
+            if self.batch_size > 1 and len(text) <= self.batch_text_limit:
+                short.append(idx)
+                if len(short) == self.batch_size:
+                    jobs.append(short)
+                    short = []
+            else:
+                jobs.append([idx])
+        if short: jobs.append(short)
+        return jobs
+
+    async def _call_with_retry(self, func, *args):
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await func(*args, raise_errors=True, throttle=self.bucket.acquire)
+            except Exception as e:
+                if attempt == self.max_retries: raise
+                delay = self.retry_backoff * (2 ** attempt) + random.uniform(0, self.retry_backoff)
+                logger.warning(f"GigaChat call failed ({e}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _run_job(self, job: list, texts: list, criteria: list, results: list, latencies: list, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            started = time.monotonic()
+            if len(job) > 1:
+                try:
+                    batch = await self._call_with_retry(self.gigachat.aanalyze_events_batch, [texts[i] for i in job], criteria)
+                    for idx, analysis in zip(job, batch):
+                        results[idx] = analysis
+                except Exception as e:
+                    logger.error(f"Batch analysis failed, falling back to single calls: {e}")
+
+            for idx in job:
+                if results[idx] is not None: continue
+                try:
+                    results[idx] = await self._call_with_retry(self.gigachat.aanalyze_event, texts[idx], criteria)
+                except Exception as e:
+                    logger.error(f"Event analysis failed: {e}")
+                    results[idx] = self.gigachat._get_default_analysis()
+            latencies.append(time.monotonic() - started)
+
+    async def run(self, texts: list, criteria: list = None):
+        results = [None] * len(texts)
+        latencies = []
+        semaphore = asyncio.Semaphore(self.concurrency)
+        jobs = self._plan_jobs(texts)
+
+        started = time.monotonic()
+        await asyncio.gather(*(self._run_job(job, texts, criteria, results, latencies, semaphore) for job in jobs))
+        elapsed = time.monotonic() - started
+
+        stats = {
+            "items": len(texts),
+            "batches": len(jobs),
+            "elapsed": elapsed,
+            "items_per_min": len(texts) / elapsed * 60 if elapsed > 0 else 0.0,
+            "p95_latency": percentile(latencies, 95),
+        }
+        return results, stats
@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import logging
+import time
+from typing import List, Dict
+
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+from aiogram.types import BufferedInputFile
+
+try:
+    from config import BROADCAST_CONFIG
+except ImportError:
+    BROADCAST_CONFIG = {}
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    def __init__(self, rate: float, per_chat_interval: float):
+        self.rate = rate
+        self.per_chat_interval = per_chat_interval
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._chat_next = {}
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    async def acquire(self, chat_id: int):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                wait = max(self._paused_until - now, (1 - self._tokens) / self.rate if self._tokens < 1 else 0)
+                if wait <= 0: break
+                await asyncio.sleep(wait)
+            self._tokens -= 1
+
+        chat_wait = self._chat_next.get(chat_id, 0) - time.monotonic()
+        self._chat_next[chat_id] = max(time.monotonic(), self._chat_next.get(chat_id, 0)) + self.per_chat_interval
+        if chat_wait > 0:
+            await asyncio.sleep(chat_wait)
+        if len(self._chat_next) > 10000:
+            now = time.monotonic()
+            self._chat_next = {chat: t for chat, t in self._chat_next.items() if t > now}
+
+class BroadcastService:
+    def __init__(self, bot, db):
+        self.bot = bot
+        self.db = db
+        self.workers = BROADCAST_CONFIG.get('workers', 4)
+        self.batch_size = BROADCAST_CONFIG.get('batch_size', 50)
+        self.poll_interval = BROADCAST_CONFIG.get('poll_interval', 5)
+        self.max_attempts = BROADCAST_CONFIG.get('max_attempts', 5)
+        self.limiter = RateLimiter(BROADCAST_CONFIG.get('global_rate', 25), BROADCAST_CONFIG.get('per_chat_interval', 1.0))
+        self._queue = asyncio.Queue()
+        self._wake = asyncio.Event()
+        self._sent = []
+        self._file_ids = {}
+        self._tasks = []
+
+    async def enqueue(self, chat_id: int, text: str, parse_mode: str = "HTML", dedupe_key: str = None) -> int:
+        return await self.enqueue_many([{'chat_id': chat_id, 'text': text, 'parse_mode': parse_mode, 'dedupe_key': dedupe_key}])
+
+    async def enqueue_many(self, messages: List[Dict]) -> int:
+        items = [{
+            'chat_id': m['chat_id'],
+            'payload': {'text': m['text'], 'parse_mode': m.get('parse_mode', "HTML")},
+            'dedupe_key': m.get('dedupe_key')
+        } for m in messages]
+        return await self._enqueue(items)
+
+    async def enqueue_document(self, chat_ids: List[int], content: bytes, file_name: str, caption: str = None,
+                               parse_mode: str = "HTML", dedupe_prefix: str = None, file_id: str = None,
+                               artifact: tuple = None) -> int:
+        payload = {'file_name': file_name, 'caption': caption, 'parse_mode': parse_mode, 'file_id': file_id, 'artifact': artifact}
+        items = [{
+            'chat_id': chat_id,
+            'kind': 'document',
+            'payload': payload,
+            'document': content,
+            'dedupe_key': f"{dedupe_prefix}:{chat_id}" if dedupe_prefix else None
+        } for chat_id in chat_ids]
+        return await self._enqueue(items)
+
+    async def _enqueue(self, items: List[Dict]) -> int:
+        added = await self.db.enqueue_messages(items)
+        if added: self._wake.set()
+        return added
+
+    async def _send(self, item: Dict):
+        payload = item['payload']
+        if item['kind'] == 'document':
+            key = item.get('document_key') or hashlib.sha1(item.get('document') or b'').hexdigest()
+            stored = None
+            file_id = self._file_ids.get(key) or payload.get('file_id')
+            if not file_id and item.get('document_key'):
+                stored = await self.db.get_outbox_document(key) or {}
+                file_id = stored.get('file_id')
+            if file_id:
+                try:
+                    await self.bot.send_document(item['chat_id'], document=file_id, caption=payload.get('caption'), parse_mode=payload.get('parse_mode'))
+                    return
+                except TelegramBadRequest:
+                    self._file_ids.pop(key, None)
+            content = item.get('document')
+            if content is None and item.get('document_key'):
+                if stored is None: stored = await self.db.get_outbox_document(key) or {}
+                content = stored.get('content')
+            if content is None:
+                raise ValueError(f"outbox document {key} is missing")
+            message = await self.bot.send_document(
+                item['chat_id'], document=BufferedInputFile(content, filename=payload['file_name']),
+                caption=payload.get('caption'), parse_mode=payload.get('parse_mode')
+            )
+            if message.document and key not in self._file_ids:
+                self._file_ids[key] = message.document.file_id
+                if item.get('document_key'):
+                    await self.db.set_outbox_document_file_id(key, message.document.file_id)
+                if payload.get('artifact'):
+                    await self.db.set_ics_file_id(*payload['artifact'], message.document.file_id)
+        else:
+            await self.bot.send_message(item['chat_id'], payload['text'], parse_mode=payload.get('parse_mode'))
+
+    async def _worker(self):
+        while True:
+            item = await self._queue.get()
+            try:
+                await self.limiter.acquire(item['chat_id'])
+                await self._send(item)
+                self._sent.append(item['id'])
+            except TelegramRetryAfter as e:
+                self.limiter.pause(e.retry_after)
+                await self.db.mark_outbox_retry(item['id'], e.retry_after, str(e), count_attempt=False)
+            except (TelegramForbiddenError, TelegramBadRequest) as e:
+                await self.db.mark_outbox_failed(item['id'], str(e))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if item['attempts'] + 1 >= self.max_attempts:
+                    await self.db.mark_outbox_failed(item['id'], str(e))
+                else:
+                    await self.db.mark_outbox_retry(item['id'], 2 ** item['attempts'] * 5, str(e))
+                logger.error(f"Broadcast send to {item['chat_id']} failed: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _flush_sent(self):
+        sent, self._sent = self._sent, []
+        if sent: await self.db.mark_outbox_sent(sent)
+
+    async def _dispatcher(self):
+        await self.db.reset_outbox()
+        while True:
+            try:
+                await self._flush_sent()
+                if self._queue.qsize() < self.batch_size:
+                    for item in await self.db.claim_outbox(self.batch_size):
+                        self._queue.put_nowait(item)
+                if self._queue.qsize():
+                    await asyncio.sleep(1)
+                    continue
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wake.clear()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Broadcast dispatcher error: {e}")
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self):
+        if self._tasks: return
+        self._tasks = [asyncio.create_task(self._dispatcher())]
+        self._tasks += [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._flush_sent()
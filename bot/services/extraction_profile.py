@@ -0,0 +1,133 @@
+import re
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Dict, Iterator, Optional
+
+try:
+    from lxml.cssselect import CSSSelector
+except ImportError:
+    CSSSelector = None
+
+DATE_RE = re.compile(
+    r'\d{1,2}[./]\d{1,2}([./]\d{2,4})?|\d{4}-\d{2}-\d{2}|'
+    r'\d{1,2}\s*(янв|фев|мар|апр|ма[йя]|июн|июл|авг|сен|окт|ноя|дек|jan|feb|mar|apr|may|jun|jul|aug|sep|oct|nov|dec)',
+    re.I
+)
+CLASS_TOKEN_RE = re.compile(r'^[A-Za-z_][\w-]*$')
+NEXT_RE = re.compile(r'next|след|далее|›|»|→', re.I)
+HEADINGS = ('h1', 'h2', 'h3', 'h4', 'h5')
+MIN_ITEMS = 3
+
+def has_profile(source: Dict) -> bool:
+    return CSSSelector is not None and bool(source.get('item_selector'))
+
+@lru_cache(maxsize=256)
+def compile_selector(selector: str):
+    return CSSSelector(selector)
+
+def select(root, selector: str) -> list:
+    return compile_selector(selector)(root) if selector else []
+
+def _text(element) -> str:
+    return " ".join(" ".join(element.itertext()).split())
+
+def _signature(element) -> Optional[str]:
+    if not isinstance(element.tag, str): return None
+    for token in (element.get('class') or '').split():
+        if CLASS_TOKEN_RE.match(token):
+            return f"{element.tag}.{token}"
+    return element.tag
+
+def _common_child(items: list, predicate, threshold: float) -> Optional[str]:
+    counts = Counter()
+    for item in items:
+        found = set()
+        for element in item.iterdescendants():
+            signature = _signature(element)
+            if signature and signature not in found and predicate(element):
+                found.add(signature)
+        counts.update(found)
+    for signature, count in counts.most_common():
+        if count >= threshold * len(items):
+            return signature
+    return None
+
+def _next_links(root) -> list:
+    links = root.xpath("//*[self::a or self::link][@rel='next'][@href]")
+    for link in root.xpath("//*[contains(@class, 'pagination') or contains(@class, 'pager')]//a[@href]"):
+        if NEXT_RE.search(_text(link) or link.get('aria-label', '')):
+            links.append(link)
+    return links
+
+def suggest_next_selector(root) -> Optional[str]:
+    for link in _next_links(root):
+        if link.get('rel') == 'next':
+            return f"{link.tag}[rel=next]"
+        signature = _signature(link)
+        if signature != 'a':
+            return signature
+    return None
+
+def find_next_href(root, selector: str = None) -> Optional[str]:
+    links = select(root, selector) if selector and CSSSelector is not None else _next_links(root)
+    for link in links:
+        if link.get('href'):
+            return link.get('href')
+    return None
+
+def suggest_profile(root) -> Optional[Dict]:
+    if CSSSelector is None: return None
+
+    groups = defaultdict(list)
+    for element in root.iter():
+        signature = _signature(element)
+        if not signature or '.' not in signature or element.getparent() is None: continue
+        if element.tag != 'a' and not element.xpath(".//a[@href]"): continue
+        groups[(element.getparent(), signature)].append(element)
+
+    best, best_score = None, 0
+    for (_, signature), items in groups.items():
+        if len(items) < MIN_ITEMS: continue
+        texts = [_text(item) for item in items]
+        dated = sum(1 for text in texts if DATE_RE.search(text))
+        score = len(items) * (1 + 2 * dated / len(items)) * min(sum(map(len, texts)) / len(items), 300)
+        if score > best_score:
+            best, best_score = (signature, items), score
+    if not best: return None
+
+    item_selector, items = best
+    if len(select(root, item_selector)) > 3 * len(items):
+        return None
+
+    title_selector = (
+        _common_child(items, lambda el: el.tag in HEADINGS, 0.6)
+        or _common_child(items, lambda el: re.search(r'title|name', el.get('class') or '', re.I), 0.6)
+    )
+    date_selector = (
+        _common_child(items, lambda el: el.tag == 'time', 0.5)
+        or _common_child(items, lambda el: len(_text(el)) < 80 and DATE_RE.search(_text(el)), 0.5)
+    )
+    link_selector = None
+    if items[0].tag != 'a':
+        link_selector = _common_child(items, lambda el: el.tag == 'a' and el.get('href'), 0.8) or 'a[href]'
+
+    return {
+        'item_selector': item_selector,
+        'title_selector': title_selector,
+        'date_selector': date_selector,
+        'link_selector': link_selector
+    }
+
+def extract_items(root, profile: Dict) -> Iterator[Dict]:
+    for item in select(root, profile['item_selector']):
+        links = [item] if item.tag == 'a' else select(item, profile.get('link_selector') or 'a[href]')
+        href = links[0].get('href') if links else None
+        if not href: continue
+        titles = select(item, profile.get('title_selector'))
+        dates = select(item, profile.get('date_selector'))
+        yield {
+            'href': href,
+            'title': _text(titles[0]) if titles else _text(links[0]),
+            'date': _text(dates[0]) if dates else '',
+            'text': _text(item)
+        }
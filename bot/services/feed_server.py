@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from utils.cache import MISSING, TTLCache
+from utils.ics_generator import IcsGenerator
+
+try:
+    from config import FEED_CONFIG
+except ImportError:
+    FEED_CONFIG = {}
+
+logger = logging.getLogger(__name__)
+
+class CalendarFeedServer:
+    def __init__(self, db, host: str = None, port: int = None, public_url: str = None):
+        self.db = db
+        self.host = host or FEED_CONFIG.get('host', '0.0.0.0')
+        self.port = port or FEED_CONFIG.get('port', 8080)
+        self.public_url = (public_url or FEED_CONFIG.get('public_url') or f"http://localhost:{self.port}").rstrip('/')
+        self.max_age = FEED_CONFIG.get('max_age', 300)
+        self._bodies = TTLCache(FEED_CONFIG.get('cache_size', 512), FEED_CONFIG.get('cache_ttl', 3600))
+        self._runner = None
+
+    def url_for(self, token: str) -> str:
+        return f"{self.public_url}/calendar/{token}.ics"
+
+    def register(self, app: 'web.Application'):
+        app.router.add_get('/calendar/{token}.ics', self.handle_feed)
+
+    def make_app(self) -> 'web.Application':
+        from aiohttp import web
+        app = web.Application()
+        self.register(app)
+        return app
+
+    @staticmethod
+    def _last_modified(state: dict) -> datetime:
+        try:
+            return datetime.strptime(state['feed_updated_at'], '%Y-%m-%d %H:%M:%S').replace(tzinfo=timezone.utc)
+        except (TypeError, ValueError):
+            return datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+    async def handle_feed(self, request: 'web.Request') -> 'web.StreamResponse':
+        from aiohttp import web
+        state = await self.db.get_feed_state(request.match_info['token'])
+        if not state:
+            raise web.HTTPNotFound()
+
+        etag = f'"{state["id"]}-{state["feed_version"] or 0}"'
+        last_modified = self._last_modified(state)
+        headers = {
+            'ETag': etag,
+            'Last-Modified': last_modified.strftime('%a, %d %b %Y %H:%M:%S GMT'),
+            'Cache-Control': f'private, max-age={self.max_age}'
+        }
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match is not None:
+            if if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]:
+                return web.Response(status=304, headers=headers)
+        elif request.if_modified_since and last_modified <= request.if_modified_since:
+            return web.Response(status=304, headers=headers)
+
+        key = (state['id'], state['feed_version'])
+        body = self._bodies.get(key)
+        if body is MISSING:
+            events = await self.db.get_user_events(state['id'])
+            body = await asyncio.to_thread(IcsGenerator.generate_bulk_ics, events)
+            self._bodies.set(key, body)
+        return web.Response(body=body, content_type='text/calendar', charset='utf-8', headers=headers)
+
+    async def start(self):
+        from aiohttp import web
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"📅 Calendar feed listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
@@ -1,24 +1,86 @@
-import gigachat
-from gigachat.models import Chat, Messages, MessagesRole
+import asyncio
 import json
+import logging
 import re
+import threading
+import time
+from typing import Awaitable, Callable
 
 try:
     from config import GIGACHAT_API_KEY
 except ImportError:
     GIGACHAT_API_KEY = "YOUR_KEY"
 
+try:
+    from config import GIGACHAT_CONFIG
+except ImportError:
+    GIGACHAT_CONFIG = {}
+
+logger = logging.getLogger(__name__)
+
+PROMPT_VERSION = 1
+
 class GigaChatService:
-    def __init__(self):
+    def __init__(self, cache=None):
         self.api_key = GIGACHAT_API_KEY
-        
-    def analyze_event(self, text: str, user_criteria: list = None) -> dict:
-        try:
-            client = gigachat.GigaChat(credentials=self.api_key, verify_ssl_certs=False)
-            
-            criteria_str = ", ".join(user_criteria) if user_criteria else "IT, Разработка, Менеджмент, AI, Data Science"
-            
-            prompt = f"""
+        self.cache = cache
+        self.max_connections = GIGACHAT_CONFIG.get('max_connections', 8)
+        self.token_refresh_margin = GIGACHAT_CONFIG.get('token_refresh_margin', 120)
+        self.warmup_delay = GIGACHAT_CONFIG.get('warmup_delay', 30)
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._token_expires_at = 0.0
+        self._refresher = None
+
+    def _get_client(self) -> 'gigachat.GigaChat':
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    import gigachat
+                    self._client = gigachat.GigaChat(
+                        credentials=self.api_key,
+                        verify_ssl_certs=False,
+                        max_connections=self.max_connections
+                    )
+        return self._client
+
+    def _remember_token(self, token):
+        if token and token.expires_at:
+            self._token_expires_at = token.expires_at / 1000
+
+    async def _token_refresher(self):
+        await asyncio.sleep(self.warmup_delay)
+        while True:
+            try:
+                client = self._client or await asyncio.to_thread(self._get_client)
+                if self._token_expires_at and time.time() >= self._token_expires_at - self.token_refresh_margin:
+                    # The SDK keeps its token until 60 s before expiry; drop it so aget_token() re-authenticates now.
+                    client._reset_token()
+                self._remember_token(await client.aget_token())
+                if self._token_expires_at:
+                    delay = max(30, self._token_expires_at - time.time() - self.token_refresh_margin + 1)
+                else:
+                    delay = 600
+            except Exception as e:
+                logger.error(f"GigaChat token refresh error: {e}")
+                delay = 300
+            await asyncio.sleep(delay)
+
+    def start(self):
+        if self._refresher is None:
+            self._refresher = asyncio.create_task(self._token_refresher())
+
+    async def aclose(self):
+        if self._refresher:
+            self._refresher.cancel()
+            self._refresher = None
+        if self._client:
+            await self._client.aclose()
+            self._client.close()
+            self._client = None
+
+    def _build_event_prompt(self, text: str, criteria_str: str) -> str:
+        return f"""
 Ты профессиональный аналитик IT-мероприятий. Твоя задача — извлечь факты из текста и оценить важность события.
 
 ТЕКСТ СОБЫТИЯ:
@@ -50,21 +112,172 @@ class GigaChatService:
     "key_themes": ["theme1", "theme2"]
 }}
 """
-            messages = [Messages(role=MessagesRole.USER, content=prompt)]
-            response = client.chat(Chat(messages=messages, temperature=0.1))
-            content = response.choices[0].message.content
-            
-            content = re.sub(r"```json|```", "", content).strip()
-            
-            result = json.loads(content)
-            
-            result = self._post_process_analysis(result, user_criteria)
+
+    def _build_batch_prompt(self, texts: list, criteria_str: str) -> str:
+        items = "\n\n".join(f"[{i}]\n{text[:800]}" for i, text in enumerate(texts))
+        return f"""
+Ты профессиональный аналитик IT-мероприятий. Ниже {len(texts)} независимых текстов событий, каждый начинается с номера в квадратных скобках.
+Для КАЖДОГО текста извлеки факты и оцени важность события.
+
+ТЕКСТЫ СОБЫТИЙ:
+{items}
+
+КРИТЕРИИ ПОЛЬЗОВАТЕЛЯ ДЛЯ ПОИСКА:
+[{criteria_str}]
+
+ИНСТРУКЦИЯ:
+1. Название: Если нет явного, придумай короткое и понятное.
+2. Дата: Приведи к формату "DD.MM.YYYY HH:MM" или напиши "Не указана".
+3. Место: Город и локация. Если онлайн — пиши "Онлайн".
+4. SCORE (0-100): > 80 точное совпадение с критериями, 50-79 IT с косвенной темой, < 40 мусор или не IT.
+5. Приоритет: "high" если score >= 80, иначе "medium" или "low".
+
+ВЕРНИ СТРОГО JSON-массив (без Markdown), по одному объекту на каждый текст, поле "index" — номер текста:
+[
+    {{
+        "index": int,
+        "title": "string",
+        "description": "string (кратко суть)",
+        "date": "string",
+        "location": "string",
+        "url": "string (если есть в тексте)",
+        "score": int,
+        "priority": "high/medium/low",
+        "target_audience": "string",
+        "key_themes": ["theme1", "theme2"]
+    }}
+]
+"""
+
+    def _criteria_str(self, user_criteria: list = None) -> str:
+        return ", ".join(user_criteria) if user_criteria else "IT, Разработка, Менеджмент, AI, Data Science"
+
+    def _parse_json(self, content: str):
+        content = re.sub(r"```json|```", "", content).strip()
+        return json.loads(content)
+
+    def _chat(self, prompt: str) -> str:
+        from gigachat.models import Chat, Messages, MessagesRole
+        messages = [Messages(role=MessagesRole.USER, content=prompt)]
+        response = self._get_client().chat(Chat(messages=messages, temperature=0.1))
+        return response.choices[0].message.content
+
+    async def _achat(self, prompt: str, throttle: Callable[[], Awaitable] = None) -> str:
+        from gigachat.models import Chat, Messages, MessagesRole
+        if throttle: await throttle()
+        messages = [Messages(role=MessagesRole.USER, content=prompt)]
+        response = await self._get_client().achat(Chat(messages=messages, temperature=0.1))
+        return response.choices[0].message.content
+
+    def _cache_key(self, kind: str, text: str, user_criteria: list = None):
+        if self.cache is None: return None
+        return self.cache.make_key(kind, text, user_criteria, PROMPT_VERSION)
+
+    def _cache_get(self, key):
+        return self.cache.get(key) if key else None
+
+    def _cache_set(self, key, value):
+        if key: self.cache.set(key, value)
+
+    async def _acache_get(self, key):
+        return await self.cache.aget(key) if key else None
+
+    async def _acache_set(self, key, value):
+        if key: await self.cache.aset(key, value)
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats() if self.cache else {}
+
+    def analyze_event(self, text: str, user_criteria: list = None, raise_errors: bool = False) -> dict:
+        key = self._cache_key('event', text, user_criteria)
+        cached = self._cache_get(key)
+        if cached is not None: return cached
+        try:
+            prompt = self._build_event_prompt(text, self._criteria_str(user_criteria))
+            result = self._event_result(self._chat(prompt), user_criteria)
+            self._cache_set(key, result)
+            return result
+        except Exception as e:
+            if raise_errors: raise
+            logger.error(f"GigaChat analysis error: {e}")
+            return self._get_default_analysis()
+
+    async def aanalyze_event(self, text: str, user_criteria: list = None, raise_errors: bool = False,
+                             throttle: Callable[[], Awaitable] = None) -> dict:
+        key = self._cache_key('event', text, user_criteria)
+        cached = await self._acache_get(key)
+        if cached is not None: return cached
+        try:
+            prompt = self._build_event_prompt(text, self._criteria_str(user_criteria))
+            result = self._event_result(await self._achat(prompt, throttle), user_criteria)
+            await self._acache_set(key, result)
             return result
-            
         except Exception as e:
-            print(f"GigaChat analysis error: {e}")
+            if raise_errors: raise
+            logger.error(f"GigaChat analysis error: {e}")
             return self._get_default_analysis()
 
+    def _event_result(self, content: str, user_criteria: list) -> dict:
+        result = self._parse_json(content)
+        return self._post_process_analysis(result, user_criteria)
+
+    def _batch_lookup(self, texts: list, user_criteria: list):
+        keys = [self._cache_key('event', text, user_criteria) for text in texts]
+        results = [self._cache_get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        return keys, results, missing
+
+    def _batch_store(self, keys: list, results: list, missing: list, fresh: list):
+        for idx, result in zip(missing, fresh):
+            if result is None: continue
+            result.pop('index', None)
+            results[idx] = result
+            self._cache_set(keys[idx], result)
+        return results
+
+    async def _abatch_lookup(self, texts: list, user_criteria: list):
+        if self.cache is None: return self._batch_lookup(texts, user_criteria)
+        return await asyncio.to_thread(self._batch_lookup, texts, user_criteria)
+
+    async def _abatch_store(self, keys: list, results: list, missing: list, fresh: list):
+        if self.cache is None: return self._batch_store(keys, results, missing, fresh)
+        return await asyncio.to_thread(self._batch_store, keys, results, missing, fresh)
+
+    def analyze_events_batch(self, texts: list, user_criteria: list = None, raise_errors: bool = False) -> list:
+        keys, results, missing = self._batch_lookup(texts, user_criteria)
+        if not missing: return results
+        try:
+            prompt = self._build_batch_prompt([texts[i] for i in missing], self._criteria_str(user_criteria))
+            fresh = self._batch_results(self._chat(prompt), len(missing), user_criteria)
+            return self._batch_store(keys, results, missing, fresh)
+        except Exception as e:
+            if raise_errors: raise
+            logger.error(f"GigaChat batch analysis error: {e}")
+            return results
+
+    async def aanalyze_events_batch(self, texts: list, user_criteria: list = None, raise_errors: bool = False,
+                                    throttle: Callable[[], Awaitable] = None) -> list:
+        keys, results, missing = await self._abatch_lookup(texts, user_criteria)
+        if not missing: return results
+        try:
+            prompt = self._build_batch_prompt([texts[i] for i in missing], self._criteria_str(user_criteria))
+            fresh = self._batch_results(await self._achat(prompt, throttle), len(missing), user_criteria)
+            return await self._abatch_store(keys, results, missing, fresh)
+        except Exception as e:
+            if raise_errors: raise
+            logger.error(f"GigaChat batch analysis error: {e}")
+            return results
+
+    def _batch_results(self, content: str, count: int, user_criteria: list) -> list:
+        results = [None] * count
+        items = self._parse_json(content)
+        if isinstance(items, dict): items = [items]
+        for item in items:
+            idx = item.get('index') if isinstance(item, dict) else None
+            if isinstance(idx, int) and 0 <= idx < count:
+                results[idx] = self._post_process_analysis(item, user_criteria)
+        return results
+
     def _post_process_analysis(self, result: dict, criteria: list) -> dict:
         score = result.get('score', 50)
         
@@ -77,17 +290,29 @@ class GigaChatService:
             
         return result
 
-    def analyze_file_content(self, text: str) -> list:
-        try:
-            client = gigachat.GigaChat(credentials=self.api_key, verify_ssl_certs=False)
-            prompt = f"""Найди все мероприятия в тексте и верни список JSON объектов.
+    def _file_prompt(self, text: str) -> str:
+        return f"""Найди все мероприятия в тексте и верни список JSON объектов.
 Текст: {text[:4000]}
 JSON Format: [{{ "title": "...", "date": "...", "location": "...", "description": "..." }}]"""
-            
-            messages = [Messages(role=MessagesRole.USER, content=prompt)]
-            response = client.chat(Chat(messages=messages, temperature=0.1))
-            content = re.sub(r"```json|```", "", response.choices[0].message.content).strip()
-            return json.loads(content)
+
+    def analyze_file_content(self, text: str) -> list:
+        key = self._cache_key('file', text)
+        cached = self._cache_get(key)
+        if cached is not None: return cached
+        try:
+            result = self._parse_json(self._chat(self._file_prompt(text)))
+            self._cache_set(key, result)
+            return result
+        except: return []
+
+    async def aanalyze_file_content(self, text: str) -> list:
+        key = self._cache_key('file', text)
+        cached = await self._acache_get(key)
+        if cached is not None: return cached
+        try:
+            result = self._parse_json(await self._achat(self._file_prompt(text)))
+            await self._acache_set(key, result)
+            return result
         except: return []
 
     def _get_default_analysis(self):
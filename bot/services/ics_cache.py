@@ -0,0 +1,48 @@
+import asyncio
+import logging
+from typing import Dict
+
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import BufferedInputFile
+
+from utils.ics_generator import IcsGenerator
+
+logger = logging.getLogger(__name__)
+
+class IcsArtifactCache:
+    def __init__(self, db):
+        self.db = db
+
+    async def get(self, event: Dict) -> Dict:
+        version = event.get('version') or 1
+        artifact = await self.db.get_ics_artifact(event['id'], version)
+        if artifact: return artifact
+
+        content = await asyncio.to_thread(IcsGenerator.generate_event_ics, event)
+        artifact = {
+            'event_id': event['id'],
+            'version': version,
+            'file_name': IcsGenerator.file_name(event),
+            'content': content,
+            'file_id': None
+        }
+        await self.db.save_ics_artifact(event['id'], version, artifact['file_name'], content)
+        return artifact
+
+    async def send(self, bot, chat_id: int, event: Dict, caption: str = None, parse_mode: str = "HTML"):
+        artifact = await self.get(event)
+        if artifact['file_id']:
+            try:
+                return await bot.send_document(chat_id, document=artifact['file_id'], caption=caption, parse_mode=parse_mode)
+            except TelegramBadRequest as e:
+                logger.warning(f"Cached ICS file_id rejected for event {event['id']}: {e}")
+
+        message = await bot.send_document(
+            chat_id,
+            document=BufferedInputFile(artifact['content'], filename=artifact['file_name']),
+            caption=caption,
+            parse_mode=parse_mode
+        )
+        if message.document:
+            await self.db.set_ics_file_id(artifact['event_id'], artifact['version'], message.document.file_id)
+        return message
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+from typing import Awaitable, Callable
+
+try:
+    from config import WEBHOOK_CONFIG
+except ImportError:
+    WEBHOOK_CONFIG = {}
+
+logger = logging.getLogger(__name__)
+
+class LeaderElector:
+    def __init__(self, db, on_acquire: Callable[[], Awaitable], on_release: Callable[[], Awaitable],
+                 name: str = 'background', ttl: float = None):
+        self.db = db
+        self.on_acquire = on_acquire
+        self.on_release = on_release
+        self.name = name
+        self.ttl = ttl or WEBHOOK_CONFIG.get('lease_ttl', 30)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self._task = None
+
+    async def _step_down(self):
+        if not self.is_leader: return
+        self.is_leader = False
+        logger.info(f"👑 {self.owner} lost the '{self.name}' lease")
+        await self.on_release()
+
+    async def _run(self):
+        while True:
+            try:
+                acquired = await self.db.try_acquire_lease(self.name, self.owner, self.ttl)
+                if acquired and not self.is_leader:
+                    self.is_leader = True
+                    logger.info(f"👑 {self.owner} is now the '{self.name}' leader")
+                    await self.on_acquire()
+                elif not acquired:
+                    await self._step_down()
+                if self.is_leader:
+                    await self.db.prune_cache_invalidations()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Leader election error: {e}")
+                await self._step_down()
+            await asyncio.sleep(self.ttl / 3)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._step_down()
+        await self.db.release_lease(self.name, self.owner)
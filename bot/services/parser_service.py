@@ -1,31 +1,149 @@
-import requests
+import asyncio
+import aiohttp
+import hashlib
 import re
-from bs4 import BeautifulSoup
 import time
 import logging
-from urllib.parse import urljoin
+from typing import Awaitable, Callable, Dict, List, Tuple
+from urllib.parse import urljoin, urlparse
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+from services.extraction_profile import (
+    CSSSelector, extract_items, find_next_href, has_profile, suggest_next_selector, suggest_profile
+)
+
+try:
+    from config import PARSER_CONFIG
+except ImportError:
+    PARSER_CONFIG = {}
 
 logger = logging.getLogger(__name__)
 
+EVENT_MARKERS = ('регистрац', 'участие', 'conf', 'meetup', 'хакатон', 'форум', 'спб', 'онлайн', '2024', '2025')
+
+PARSE_ERRORS = (ValueError, LookupError) if lxml is None else (etree.ParserError, ValueError, LookupError)
+
+if lxml is not None:
+    XPATH_NS = {'re': 'http://exslt.org/regular-expressions'}
+    BLOCKS_XPATH = etree.XPath(
+        "//*[self::div or self::article or self::li][re:test(@class, 'event|card|item|post', 'i')]", namespaces=XPATH_NS
+    )
+    LINKS_XPATH = etree.XPath("//a")
+    BLOCK_LINK_XPATH = etree.XPath(".//a[@href][1]")
+    BLOCK_TITLE_XPATH = etree.XPath(
+        "(.//*[self::h2 or self::h3 or self::h4 or self::div][re:test(@class, 'title|name', 'i')])[1]", namespaces=XPATH_NS
+    )
+    CHROME_XPATH = etree.XPath("//nav | //footer | //header | //script | //style")
+    CONTENT_XPATH = etree.XPath("(//main | //article | //*[@role='main'])[1]")
+
+class CrawlBudget:
+    def __init__(self, max_pages: int, max_bytes: int):
+        self.max_pages = max_pages
+        self.max_bytes = max_bytes
+        self.pages = 0
+        self.bytes = 0
+
+    @property
+    def remaining_bytes(self) -> int:
+        return max(0, self.max_bytes - self.bytes)
+
+    def take_page(self) -> bool:
+        if self.pages >= self.max_pages or self.bytes >= self.max_bytes: return False
+        self.pages += 1
+        return True
+
+    def spend(self, size: int):
+        self.bytes += size
+
 class ParserService:
     def __init__(self):
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Cache-Control': 'no-cache'
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8'
         }
+        self.timeout = PARSER_CONFIG.get('timeout', 20)
+        self.max_connections = PARSER_CONFIG.get('max_connections', 20)
+        self.per_host_limit = PARSER_CONFIG.get('per_host_limit', 1)
+        self.per_host_delay = PARSER_CONFIG.get('per_host_delay', 1.5)
+        self.incremental = PARSER_CONFIG.get('incremental', True)
+        self.max_items = PARSER_CONFIG.get('max_items', 10)
+        self.max_listing_pages = PARSER_CONFIG.get('max_listing_pages', 3)
+        self.max_depth = PARSER_CONFIG.get('max_depth', 1)
+        self.max_pages = PARSER_CONFIG.get('max_pages_per_source', 20)
+        self.max_bytes = PARSER_CONFIG.get('max_bytes_per_source', 4 * 1024 * 1024)
+        self.detail_chars = PARSER_CONFIG.get('detail_chars', 1500)
+        self.engine = PARSER_CONFIG.get('engine', 'lxml') if lxml is not None else 'html.parser'
+        self._html_parsers = {}
+        self._session = None
+        self._host_slots = {}
+        self._host_last_request = {}
 
-    def _get_soup(self, url):
-        try:
-            response = requests.get(url, headers=self.headers, timeout=20)
-            if response.status_code == 200:
-                if response.encoding == 'ISO-8859-1':
-                    response.encoding = response.apparent_encoding
-                return BeautifulSoup(response.text, 'html.parser')
-        except Exception as e:
-            logger.error(f"Ошибка доступа к {url}: {e}")
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.per_host_limit, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                headers=self.headers,
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+
+    def _host_slot(self, host: str) -> asyncio.Semaphore:
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+        return slot
+
+    @staticmethod
+    async def _read_limited(response, limit: int) -> bytes:
+        if limit is None: return await response.read()
+        chunks, size = [], 0
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= limit: break
+        return b"".join(chunks)[:limit]
+
+    async def _fetch(self, url, etag: str = None, last_modified: str = None, max_bytes: int = None):
+        host = urlparse(url).netloc
+        headers = {}
+        if etag: headers['If-None-Match'] = etag
+        if last_modified: headers['If-Modified-Since'] = last_modified
+        async with self._host_slot(host):
+            wait = self._host_last_request.get(host, 0) + self.per_host_delay - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                async with self._get_session().get(url, headers=headers) as response:
+                    if response.status == 304:
+                        return {'status': 304, 'etag': etag, 'last_modified': last_modified}
+                    if response.status == 200:
+                        return {
+                            'status': 200,
+                            'content': await self._read_limited(response, max_bytes),
+                            'charset': response.charset,
+                            'etag': response.headers.get('ETag'),
+                            'last_modified': response.headers.get('Last-Modified')
+                        }
+            except Exception as e:
+                logger.error(f"Ошибка доступа к {url}: {e}")
+            finally:
+                self._host_last_request[host] = time.monotonic()
         return None
 
+    def _make_soup(self, content: bytes, charset: str = None):
+        from bs4 import BeautifulSoup
+        return BeautifulSoup(content, 'html.parser', from_encoding=charset)
+
     def _clean_text(self, text):
         if not text: return ""
         return re.sub(r'\s+', ' ', text).strip()
@@ -37,6 +155,25 @@ class ParserService:
             if kw.lower() in text_lower: return True
         return False
 
+    @staticmethod
+    def _absolute(link: str, base_url: str) -> str:
+        return link if link.startswith('http') else urljoin(base_url, link)
+
+    def _make_event(self, link: str, title: str, raw_text: str, source_config, keywords, seen_links: set, require_marker: bool = True):
+        clean_text = self._clean_text(f"{title} {raw_text}")
+        if len(clean_text) < 15: return None
+        if not self._filter_by_keywords(clean_text, keywords): return None
+
+        text_lower = clean_text.lower()
+        if require_marker and not any(w in text_lower for w in EVENT_MARKERS): return None
+
+        seen_links.add(link)
+        return {
+            "text": clean_text[:1000],
+            "url": link,
+            "source": source_config['name']
+        }
+
     def _heuristic_parse(self, soup, source_config, keywords):
         events = []
         seen_links = set()
@@ -49,49 +186,256 @@ class ParserService:
             if block.find_parent(['nav', 'footer', 'header']): continue
 
             link_elem = block if block.name == 'a' else block.find('a', href=True)
-            if not link_elem: continue
-
-            link = link_elem['href']
-            if not link.startswith('http'): link = urljoin(base_url, link)
+            if not link_elem or not link_elem.get('href'): continue
+            link = self._absolute(link_elem['href'], base_url)
+            if link in seen_links: continue
 
             title_elem = block.find(['h2', 'h3', 'h4', 'div'], class_=re.compile(r'title|name', re.I))
             raw_text = block.get_text(" ", strip=True)
             title = title_elem.get_text(" ", strip=True) if title_elem else link_elem.get_text(" ", strip=True)
-            
-            full_text = f"{title} {raw_text}"
-            clean_text = self._clean_text(full_text)
 
-            if len(clean_text) < 15: continue
+            event = self._make_event(link, title, raw_text, source_config, keywords, seen_links)
+            if event: events.append(event)
+            if len(events) >= self.max_items: break
+
+        return events
+
+    def _load_tree(self, content: bytes, charset: str = None):
+        parser = self._html_parsers.get(charset)
+        if parser is None:
+            parser = self._html_parsers[charset] = lxml.html.HTMLParser(encoding=charset, remove_comments=True, remove_pis=True)
+        return lxml.html.document_fromstring(content, parser=parser)
+
+    @staticmethod
+    def _strip_chrome(root):
+        for chrome in CHROME_XPATH(root):
+            chrome.drop_tree()
+        return root
+
+    def _make_tree(self, content: bytes, charset: str = None):
+        return self._strip_chrome(self._load_tree(content, charset))
+
+    def _lxml_parse(self, root, source_config, keywords):
+        events = []
+        seen_links = set()
+        base_url = source_config.get('base_url', source_config['url'])
+
+        potential_blocks = BLOCKS_XPATH(root) or LINKS_XPATH(root)
+        for block in potential_blocks:
+            if block.tag == 'a':
+                link_elem = block
+            else:
+                found = BLOCK_LINK_XPATH(block)
+                link_elem = found[0] if found else None
+            href = link_elem.get('href') if link_elem is not None else None
+            if not href: continue
+            link = self._absolute(href, base_url)
             if link in seen_links: continue
-            if not self._filter_by_keywords(clean_text, keywords): continue
-
-            is_event = any(w in clean_text.lower() for w in ['регистрац', 'участие', 'conf', 'meetup', 'хакатон', 'форум', 'спб', 'онлайн', '2024', '2025'])
-            
-            if is_event:
-                events.append({
-                    "text": clean_text[:1000],
-                    "url": link,
-                    "source": source_config['name']
-                })
-                seen_links.add(link)
-
-        return events[:10]
-
-    def get_events(self, db_sources: list, keywords: list = None):
-        all_events = []
-        logger.info(f"🔄 Запуск парсера. Источников: {len(db_sources)}")
-        
-        for source in db_sources:
+
+            raw_text = " ".join(block.itertext())
+            title_elem = BLOCK_TITLE_XPATH(block)
+            if title_elem:
+                title = " ".join(title_elem[0].itertext())
+            else:
+                title = raw_text if link_elem is block else " ".join(link_elem.itertext())
+
+            event = self._make_event(link, title, raw_text, source_config, keywords, seen_links)
+            if event: events.append(event)
+            if len(events) >= self.max_items: break
+
+        return events
+
+    def _parse_page(self, content: bytes, charset: str, source_config, keywords):
+        if self.engine == 'lxml':
             try:
-                soup = self._get_soup(source['url'])
-                if soup:
-                    events = self._heuristic_parse(soup, source, keywords)
-                    logger.info(f"✅ {source['name']}: найдено {len(events)}")
-                    all_events.extend(events)
-                else:
-                    logger.warning(f"⚠️ {source['name']}: нет ответа")
-            except Exception as e:
-                logger.error(f"❌ Ошибка обработки {source['name']}: {e}")
-            time.sleep(1.5)
-            
-        return all_events
\ No newline at end of file
+                return self._lxml_parse(self._make_tree(content, charset), source_config, keywords)
+            except PARSE_ERRORS as e:
+                logger.warning(f"lxml не справился со страницей {source_config['name']}, используем html.parser: {e}")
+        soup = self._make_soup(content, charset)
+        return self._heuristic_parse(soup, source_config, keywords)
+
+    def _profile_parse(self, root, source_config, keywords):
+        events = []
+        seen_links = set()
+        found = False
+        base_url = source_config.get('base_url', source_config['url'])
+        for item in extract_items(root, source_config):
+            found = True
+            link = self._absolute(item['href'], base_url)
+            if link in seen_links: continue
+            event = self._make_event(link, f"{item['title']} {item['date']}", item['text'], source_config, keywords, seen_links, require_marker=False)
+            if event: events.append(event)
+            if len(events) >= self.max_items: break
+        return events if found else None
+
+    def _parse_source_page(self, content: bytes, charset: str, source_config, keywords, page_url: str = None, suggest: bool = True):
+        if self.engine != 'lxml':
+            return self._parse_page(content, charset, source_config, keywords), None, None
+        try:
+            root = self._load_tree(content, charset)
+        except PARSE_ERRORS:
+            return self._parse_page(content, charset, source_config, keywords), None, None
+
+        next_href = find_next_href(root, source_config.get('next_selector'))
+        next_url = urljoin(page_url or source_config['url'], next_href) if next_href else None
+        next_selector = suggest_next_selector(root) if suggest and CSSSelector is not None else None
+        self._strip_chrome(root)
+
+        if has_profile(source_config):
+            events = self._profile_parse(root, source_config, keywords)
+            if events is not None: return events, None, next_url
+            logger.warning(f"⚠️ {source_config['name']}: профиль извлечения устарел, подбираем заново")
+        if not suggest or CSSSelector is None or source_config.get('id') is None or (
+                source_config.get('profile_updated_at') and not has_profile(source_config)):
+            return self._lxml_parse(root, source_config, keywords), None, next_url
+
+        profile = suggest_profile(root) or {}
+        events = self._profile_parse(root, {**source_config, **profile}, keywords) if profile else None
+        if events is None:
+            events = self._lxml_parse(root, source_config, keywords)
+        if profile: profile['next_selector'] = next_selector
+        return events, profile, next_url
+
+    async def suggest_source_profile(self, source) -> Dict:
+        page = await self._fetch(source['url'])
+        if not page or CSSSelector is None or lxml is None: return None
+
+        def suggest(content, charset):
+            root = self._load_tree(content, charset)
+            next_selector = suggest_next_selector(root)
+            profile = suggest_profile(self._strip_chrome(root))
+            if profile: profile['next_selector'] = next_selector
+            return profile or {}
+
+        return await asyncio.to_thread(suggest, page['content'], page['charset'])
+
+    def _detail_text(self, content: bytes, charset: str) -> str:
+        if self.engine != 'lxml':
+            soup = self._make_soup(content, charset)
+            for chrome in soup(['nav', 'footer', 'header', 'script', 'style']):
+                chrome.decompose()
+            node = soup.find('main') or soup.find('article') or soup.find(attrs={'role': 'main'}) or soup.body
+            return self._clean_text(node.get_text(" "))[:self.detail_chars] if node else ""
+        root = self._make_tree(content, charset)
+        found = CONTENT_XPATH(root)
+        node = found[0] if found else root.find('body')
+        if node is None: return ""
+        return self._clean_text(" ".join(node.itertext()))[:self.detail_chars]
+
+    async def _enrich_event(self, event: Dict, budget: CrawlBudget):
+        if not budget.take_page(): return
+        page = await self._fetch(event['url'], max_bytes=budget.remaining_bytes)
+        if not page: return
+        budget.spend(len(page['content']))
+        try:
+            detail = await asyncio.to_thread(self._detail_text, page['content'], page['charset'])
+        except PARSE_ERRORS:
+            return
+        if detail:
+            event['text'] = f"{event['text']}\n\n{detail}"
+
+    @staticmethod
+    def _signature(keywords) -> str:
+        if not keywords: return ''
+        return hashlib.sha1('|'.join(sorted(kw.lower() for kw in keywords)).encode('utf-8')).hexdigest()[:16]
+
+    def _is_unchanged(self, source, page, content_hash: str, signature: str) -> bool:
+        if not self.incremental or not source.get('crawl_hash'): return False
+        if source.get('crawl_signature') not in ('', signature): return False
+        return page['status'] == 304 or content_hash == source['crawl_hash']
+
+    async def _scan_source(self, source, keywords, seen_urls: set, known_urls: Callable[[list], Awaitable[set]] = None) -> Tuple[List[Dict], Dict]:
+        try:
+            incremental = self.incremental and source.get('id') is not None
+            budget = CrawlBudget(self.max_pages, self.max_bytes)
+            budget.take_page()
+            page = await self._fetch(
+                source['url'],
+                source.get('crawl_etag') if incremental else None,
+                source.get('crawl_last_modified') if incremental else None,
+                max_bytes=self.max_bytes
+            )
+            if not page:
+                logger.warning(f"⚠️ {source['name']}: нет ответа")
+                return [], None
+
+            signature = self._signature(keywords)
+            content_hash = hashlib.sha1(page['content']).hexdigest() if page['status'] == 200 else source.get('crawl_hash')
+            state = {
+                'source_id': source.get('id'),
+                'etag': page['etag'],
+                'last_modified': page['last_modified'],
+                'content_hash': content_hash,
+                'signature': source.get('crawl_signature'),
+                'item_urls': source.get('crawl_item_urls') or [],
+                'unchanged': True
+            }
+            if self._is_unchanged(source, page, content_hash, signature):
+                logger.info(f"💤 {source['name']}: без изменений")
+                return [], state
+
+            if page['status'] == 304:
+                page = await self._fetch(source['url'], max_bytes=self.max_bytes)
+                if not page: return [], None
+                state.update(content_hash=hashlib.sha1(page['content']).hexdigest(), etag=page['etag'], last_modified=page['last_modified'])
+
+            budget.spend(len(page['content']))
+            seen_urls.add(source['url'])
+            events, profile, next_url = await asyncio.to_thread(
+                self._parse_source_page, page['content'], page['charset'], source, keywords, source['url']
+            )
+            listing = {**source, **profile} if profile else source
+            listing_pages = 1
+            while next_url and next_url not in seen_urls and listing_pages < self.max_listing_pages and budget.take_page():
+                seen_urls.add(next_url)
+                page = await self._fetch(next_url, max_bytes=budget.remaining_bytes)
+                if not page: break
+                budget.spend(len(page['content']))
+                listing_pages += 1
+                more, _, next_url = await asyncio.to_thread(
+                    self._parse_source_page, page['content'], page['charset'], listing, keywords, next_url, False
+                )
+                events.extend(more)
+
+            previous = set(state['item_urls']) if incremental else set()
+            state.update(signature=signature, item_urls=[e['url'] for e in events], unchanged=False, profile=profile)
+            if profile: logger.info(f"🧭 {source['name']}: подобран профиль {profile['item_selector']}")
+
+            fresh = []
+            for event in events:
+                if event['url'] in previous or event['url'] in seen_urls: continue
+                seen_urls.add(event['url'])
+                fresh.append(event)
+
+            if self.max_depth > 0 and fresh:
+                known = await known_urls([e['url'] for e in fresh]) if known_urls else set()
+                host = urlparse(source['url']).netloc
+                details = [e for e in fresh if e['url'] not in known and urlparse(e['url']).netloc == host]
+                await asyncio.gather(*(self._enrich_event(e, budget) for e in details))
+
+            logger.info(
+                f"✅ {source['name']}: найдено {len(events)}, новых {len(fresh)} "
+                f"({budget.pages} стр., {budget.bytes // 1024} КБ)"
+            )
+            return fresh, state
+        except Exception as e:
+            logger.error(f"❌ Ошибка обработки {source['name']}: {e}")
+        return [], None
+
+    async def crawl(self, db_sources: list, keywords: list = None,
+                    known_urls: Callable[[list], Awaitable[set]] = None) -> Tuple[List[Dict], List[Dict]]:
+        all_events, states = [], []
+        seen_urls = set()
+        logger.info(f"🔄 Запуск парсера. Источников: {len(db_sources)}")
+
+        results = await asyncio.gather(*(self._scan_source(source, keywords, seen_urls, known_urls) for source in db_sources))
+        for events, state in results:
+            all_events.extend(events)
+            if state and state['source_id'] is not None:
+                states.append(state)
+
+        return all_events, states
+
+    async def get_events(self, db_sources: list, keywords: list = None):
+        events, _ = await self.crawl(db_sources, keywords)
+        return events
@@ -0,0 +1,125 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timedelta, timezone
+
+from utils.keyboards import get_admin_main_kb
+
+logger = logging.getLogger(__name__)
+
+TZ_OFFSET = timedelta(hours=3)
+MAX_SLEEP = 3600
+
+def local_now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None) + TZ_OFFSET
+
+def next_fire(day: str, time_str: str, now: datetime):
+    try:
+        hour, minute = map(int, (time_str or '').split(':'))
+        fire = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    except ValueError:
+        return None
+
+    # A slot stays due for its whole minute, like the old per-minute poll.
+    grace = timedelta(minutes=1)
+    if day == 'every_day':
+        if fire + grace <= now: fire += timedelta(days=1)
+    elif day == 'every_month':
+        fire = fire.replace(day=1)
+        if fire + grace <= now:
+            fire = (fire + timedelta(days=32)).replace(day=1)
+    elif day and day.isdigit() and int(day) < 7:
+        fire += timedelta(days=(int(day) - now.weekday()) % 7)
+        if fire + grace <= now: fire += timedelta(days=7)
+    else:
+        return None
+    return fire
+
+class NotificationScheduler:
+    def __init__(self, bot, db):
+        self.bot = bot
+        self.db = db
+        self._heap = []
+        self._changed = asyncio.Event()
+        self._task = None
+
+    def reschedule(self):
+        self._changed.set()
+
+    async def rebuild(self):
+        now = local_now()
+        heap = []
+        for admin in await self.db.get_notification_schedule():
+            fire = next_fire(admin['notification_day'], admin['notification_time'], now)
+            if fire:
+                heap.append((fire, admin['telegram_id'], admin['notification_day'], admin['notification_time']))
+        heapq.heapify(heap)
+        self._heap = heap
+        logger.info(f"⏰ Notification schedule rebuilt: {len(heap)} admins")
+
+    async def _wait(self, timeout: float):
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _fire_due(self):
+        now = local_now()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap))
+
+        count = None
+        for fire, admin_id, day, time_str in due:
+            admin = await self.db.get_admin(admin_id)
+            if not admin or not admin.get('is_active'): continue
+            following = next_fire(day, time_str, fire + timedelta(minutes=1))
+            if following:
+                heapq.heappush(self._heap, (following, admin_id, day, time_str))
+            if (admin.get('notification_day'), admin.get('notification_time')) != (day, time_str): continue
+
+            if count is None:
+                count = await self.db.get_pending_registrations_count()
+                if count:
+                    logger.info(f"⏰ Time {time_str}. Found pending regs: {count}. Notifying {len(due)} admins.")
+            if not count: continue
+            try:
+                await self.bot.send_message(
+                    admin_id,
+                    f"🔔 <b>Напоминание для Руководителя</b>\n\n"
+                    f"Сейчас <b>{count}</b> заявок на регистрацию ожидают вашего подтверждения.\n"
+                    f"Пожалуйста, проверьте раздел 'Утвердить записи'.",
+                    parse_mode="HTML",
+                    reply_markup=get_admin_main_kb(admin['role'])
+                )
+            except Exception as e:
+                logger.error(f"Failed to send notification to {admin_id}: {e}")
+
+    async def run(self):
+        logger.info("⏰ Notification scheduler started")
+        self._changed.set()
+        while True:
+            try:
+                if self._changed.is_set():
+                    self._changed.clear()
+                    await self.rebuild()
+                await self._fire_due()
+                if self._heap:
+                    delay = (self._heap[0][0] - local_now()).total_seconds()
+                    await self._wait(min(max(delay, 0), MAX_SLEEP))
+                else:
+                    await self._wait(MAX_SLEEP)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Scheduler error: {e}")
+                await asyncio.sleep(60)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,106 @@
+import re
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Optional, Tuple
+
+MONTHS = {
+    'янв': 1, 'фев': 2, 'мар': 3, 'апр': 4, 'май': 5, 'мая': 5, 'июн': 6,
+    'июл': 7, 'авг': 8, 'сен': 9, 'окт': 10, 'ноя': 11, 'дек': 12,
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+EMPTY_VALUES = {'', 'не указана', 'не указано', 'tba', 'tbd', '-'}
+
+TIME = r'(?:,?\s*(?:в|с|at)?\s*(\d{1,2})[:.](\d{2}))?'
+ISO_RE = re.compile(r'(\d{4})-(\d{1,2})-(\d{1,2})(?:[ t](\d{1,2}):(\d{2}))?')
+NUMERIC_RE = re.compile(r'(?<!\d)(\d{1,2})[./](\d{1,2})(?:[./](\d{4}|\d{2}))?(?![\d./])' + TIME)
+TEXT_RE = re.compile(
+    r'(?<!\d)(\d{1,2})(?:\s*[-–—]\s*\d{1,2})?\s+([а-яёa-z]{3,})\.?(?:\s*[-–—]\s*\d{1,2}\s+[а-яёa-z]{3,}\.?)?'
+    r'(?:\s+(\d{4}))?(?:\s*(?:г\.?|года))?' + TIME,
+    re.I
+)
+LOOSE_TIME_RE = re.compile(r'(?<![\d.])(\d{1,2})[:.](\d{2})(?![\d.])')
+
+DateParts = Tuple[int, int, int, Optional[int], Optional[int]]
+
+_dateparser = None
+
+def _fallback(text: str) -> Optional[datetime]:
+    global _dateparser
+    if _dateparser is None:
+        try:
+            import dateparser
+            _dateparser = dateparser
+        except ImportError:
+            _dateparser = False
+    if not _dateparser:
+        return None
+    try:
+        return _dateparser.parse(text, languages=['ru', 'en'], settings={'PREFER_DATES_FROM': 'future'})
+    except Exception:
+        return None
+
+def _with_year(day: int, month: int, year: Optional[int], today: date) -> Optional[date]:
+    try:
+        if year is None:
+            value = date(today.year, month, day)
+            return value.replace(year=today.year + 1) if value < today - timedelta(days=1) else value
+        if year < 100: year += 2000
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+def _time(hour, minute) -> Tuple[Optional[int], Optional[int]]:
+    if hour is None: return None, None
+    hour, minute = int(hour), int(minute)
+    return (hour, minute) if hour < 24 and minute < 60 else (None, None)
+
+@lru_cache(maxsize=4096)
+def _parse(text: str, today_ordinal: int) -> Optional[DateParts]:
+    text = text.strip().lower()
+    if text in EMPTY_VALUES: return None
+    today = date.fromordinal(today_ordinal)
+
+    match = ISO_RE.search(text)
+    if match:
+        year, month, day, hour, minute = match.groups()
+        value = _with_year(int(day), int(month), int(year), today)
+        if value: return (value.year, value.month, value.day) + _time(hour, minute)
+
+    for match in TEXT_RE.finditer(text):
+        day, month_name, year, hour, minute = match.groups()
+        month = MONTHS.get(month_name[:3])
+        if not month: continue
+        value = _with_year(int(day), month, int(year) if year else None, today)
+        if not value: continue
+        if hour is None:
+            loose = LOOSE_TIME_RE.search(text[:match.start()] + ' ' + text[match.end():])
+            if loose: hour, minute = loose.groups()
+        return (value.year, value.month, value.day) + _time(hour, minute)
+
+    match = NUMERIC_RE.search(text)
+    if match:
+        day, month, year, hour, minute = match.groups()
+        value = _with_year(int(day), int(month), int(year) if year else None, today)
+        if value: return (value.year, value.month, value.day) + _time(hour, minute)
+
+    parsed = _fallback(text)
+    if not parsed: return None
+    if parsed.date() < today - timedelta(days=1):
+        try: parsed = parsed.replace(year=today.year + 1)
+        except ValueError: pass
+    return parsed.year, parsed.month, parsed.day, parsed.hour, parsed.minute
+
+def parse_event_date(text: str, default_time: Tuple[int, int] = (0, 0), today: date = None) -> Optional[datetime]:
+    if not text: return None
+    parts = _parse(text, (today or date.today()).toordinal())
+    if not parts: return None
+    year, month, day, hour, minute = parts
+    if hour is None: hour, minute = default_time
+    return datetime(year, month, day, hour, minute)
+
+def parse_date_safe(text: str) -> datetime:
+    return parse_event_date(text) or datetime.now()
+
+def cache_info():
+    return _parse.cache_info()
@@ -0,0 +1,105 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+try:
+    from config import FSM_CONFIG
+except ImportError:
+    FSM_CONFIG = {}
+
+logger = logging.getLogger(__name__)
+
+class SQLiteStorage(BaseStorage):
+    def __init__(self, path: str = None, ttl: int = None, key_builder: Optional[KeyBuilder] = None):
+        self.path = path or FSM_CONFIG.get('path', 'fsm_storage.db')
+        self.ttl = ttl or FSM_CONFIG.get('ttl', 2 * 24 * 3600)
+        self.purge_every = FSM_CONFIG.get('purge_every', 500)
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fsm-storage")
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS fsm_storage (
+                key TEXT PRIMARY KEY,
+                state TEXT,
+                data TEXT,
+                expires_at REAL NOT NULL
+            ) WITHOUT ROWID
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_fsm_storage_expires ON fsm_storage(expires_at)")
+        self._conn.commit()
+        self.purge()
+
+    @staticmethod
+    def _dump(data: Mapping[str, Any]) -> Optional[str]:
+        return json.dumps(dict(data), ensure_ascii=False, separators=(',', ':')) if data else None
+
+    def _read(self, key: StorageKey):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT state, data FROM fsm_storage WHERE key = ? AND expires_at > ?",
+                (self.key_builder.build(key), time.time())
+            ).fetchone()
+
+    def _write(self, key: StorageKey, column: str, value: Optional[str]):
+        storage_key = self.key_builder.build(key)
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            try:
+                self._conn.execute(
+                    f"INSERT INTO fsm_storage (key, {column}, expires_at) VALUES (?, ?, ?) "
+                    f"ON CONFLICT(key) DO UPDATE SET {column} = excluded.{column}, expires_at = excluded.expires_at",
+                    (storage_key, value, expires_at)
+                )
+                self._conn.execute("DELETE FROM fsm_storage WHERE key = ? AND state IS NULL AND data IS NULL", (storage_key,))
+                self._conn.commit()
+            except Exception as e:
+                self._conn.rollback()
+                logger.error(f"FSM storage write error: {e}")
+                raise
+            self._writes += 1
+        if self._writes % self.purge_every == 0:
+            self.purge()
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._run(self._write, key, 'state', state.state if isinstance(state, State) else state)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        row = await self._run(self._read, key)
+        return row[0] if row else None
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        await self._run(self._write, key, 'data', self._dump(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        row = await self._run(self._read, key)
+        return json.loads(row[1]) if row and row[1] else {}
+
+    def purge(self) -> int:
+        try:
+            with self._lock:
+                deleted = self._conn.execute("DELETE FROM fsm_storage WHERE expires_at <= ?", (time.time(),)).rowcount
+                self._conn.commit()
+            return deleted
+        except Exception as e:
+            logger.error(f"FSM storage purge error: {e}")
+            return 0
+
+    async def close(self) -> None:
+        await self._run(self._conn.close)
+        self._executor.shutdown(wait=True)
@@ -1,114 +1,111 @@
-from datetime import datetime, timedelta
-import re
-from typing import List, Dict
+from datetime import datetime, timedelta, timezone
+import hashlib
+import io
+from typing import Dict, Iterable, Iterator, List
+
+from utils.dates import parse_event_date
+
+CRLF = b"\r\n"
+LINE_LIMIT = 75
 
 class IcsGenerator:
     @staticmethod
     def _parse_russian_date(date_str):
-        months = {
-            'янв': 1, 'фев': 2, 'мар': 3, 'апр': 4, 'май': 5, 'июн': 6,
-            'июл': 7, 'авг': 8, 'сен': 9, 'окт': 10, 'ноя': 11, 'дек': 12
-        }
-        
-        try:
-            current_year = datetime.now().year
-            date_str = date_str.lower()
-            
-            day_match = re.search(r'\d{1,2}', date_str)
-            if not day_match:
-                return datetime.now() + timedelta(days=1)
-                
-            day = int(day_match.group(0))
-            
-            month = datetime.now().month
-            for m_name, m_num in months.items():
-                if m_name in date_str:
-                    month = m_num
-                    break
-            
-            event_date = datetime(current_year, month, day, 10, 0)
-            
-            if event_date < datetime.now():
-                event_date = event_date.replace(year=current_year + 1)
-                
-            return event_date
-        except:
-            return datetime.now() + timedelta(days=1)
+        return parse_event_date(date_str, default_time=(10, 0)) or datetime.now() + timedelta(days=1)
+
+    @staticmethod
+    def _escape(value) -> str:
+        text = str(value or '').replace('\r\n', '\n').replace('\r', '\n')
+        return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
 
     @staticmethod
-    def _create_vevent(event: Dict, now_str: str) -> str:
-        date_for_parsing = event.get('event_datetime') or event.get('date_str', 'не указана')
-        
+    def _fold(line: str) -> Iterator[bytes]:
+        data = line.encode('utf-8')
+        limit = LINE_LIMIT
+        while len(data) > limit:
+            cut = limit
+            while cut and (data[cut] & 0xC0) == 0x80:
+                cut -= 1
+            yield data[:cut] + CRLF
+            data = b" " + data[cut:]
+        yield data + CRLF
+
+    @staticmethod
+    def _uid(event: Dict) -> str:
+        source = hashlib.sha1((event.get('source') or 'manual').encode('utf-8')).hexdigest()[:10]
+        return f"{event.get('id')}-{source}@sber-ai-media-agent"
+
+    @staticmethod
+    def _event_start(event: Dict) -> datetime:
         try:
-            dt_start = datetime.strptime(date_for_parsing, '%Y-%m-%d %H:%M:%S')
-        except:
-            dt_start = IcsGenerator._parse_russian_date(event.get('date_str', ''))
-        
-        if any(word in event.get('title', '').lower() for word in ['конференция', 'форум', 'фестиваль']):
+            return datetime.strptime(event.get('event_datetime') or '', '%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            return IcsGenerator._parse_russian_date(event.get('date_str') or '')
+
+    @staticmethod
+    def _event_lines(event: Dict, now_str: str) -> Iterator[str]:
+        dt_start = IcsGenerator._event_start(event)
+        title = (event.get('title') or 'Мероприятие').lower()
+        if any(word in title for word in ['конференция', 'форум', 'фестиваль']):
             dt_end = dt_start + timedelta(hours=8)
-        elif any(word in event.get('title', '').lower() for word in ['митап', 'встреча', 'семинар']):
+        elif any(word in title for word in ['митап', 'встреча', 'семинар']):
             dt_end = dt_start + timedelta(hours=3)
         else:
             dt_end = dt_start + timedelta(hours=2)
-        
+
         dt_format = "%Y%m%dT%H%M%S"
-        start_str = dt_start.strftime(dt_format)
-        end_str = dt_end.strftime(dt_format)
-        
-        clean_desc = event.get('description', 'Подробности по ссылке.').replace('\n', '\\n')
-        clean_title = event.get('title', 'Мероприятие').replace('\n', ' ')
-        
-        vevent = (
-            "BEGIN:VEVENT\n"
-            f"DTSTAMP:{now_str}\n"
-            f"UID:{event['id']}-{abs(hash(event['title']+event['location']))}\n"
-            f"DTSTART:{start_str}\n"
-            f"DTEND:{end_str}\n"
-            f"SUMMARY:{clean_title}\n"
-            f"DESCRIPTION:{clean_desc}\n"
-            f"LOCATION:{event['location']}\n"
-        )
-        
+        yield "BEGIN:VEVENT"
+        yield f"DTSTAMP:{now_str}"
+        yield f"UID:{IcsGenerator._uid(event)}"
+        yield f"DTSTART:{dt_start.strftime(dt_format)}"
+        yield f"DTEND:{dt_end.strftime(dt_format)}"
+        yield f"SUMMARY:{IcsGenerator._escape((event.get('title') or 'Мероприятие').replace(chr(10), ' '))}"
+        yield f"DESCRIPTION:{IcsGenerator._escape(event.get('description') or 'Подробности по ссылке.')}"
+        yield f"LOCATION:{IcsGenerator._escape(event.get('location'))}"
         if event.get('url'):
-            vevent += f"URL:{event['url']}\n"
-            
-        vevent += "END:VEVENT\n"
-        return vevent
-        
+            yield f"URL:{event['url']}"
+        if event.get('version'):
+            yield f"SEQUENCE:{max(0, event['version'] - 1)}"
+        yield "END:VEVENT"
+
+    @staticmethod
+    def iter_ics(events: Iterable[Dict]) -> Iterator[bytes]:
+        now_str = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        for line in ("BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//Sber AI Media Agent//RU", "CALSCALE:GREGORIAN"):
+            yield line.encode('utf-8') + CRLF
+        for event in events:
+            for line in IcsGenerator._event_lines(event, now_str):
+                yield from IcsGenerator._fold(line)
+        yield b"END:VCALENDAR" + CRLF
+
+    @staticmethod
+    def write_ics(events: Iterable[Dict], buffer) -> int:
+        size = 0
+        for chunk in IcsGenerator.iter_ics(events):
+            size += buffer.write(chunk)
+        return size
+
+    @staticmethod
+    def generate_bulk_ics(events: Iterable[Dict]) -> bytes:
+        buffer = io.BytesIO()
+        IcsGenerator.write_ics(events, buffer)
+        return buffer.getvalue()
+
+    @staticmethod
+    def generate_event_ics(event: Dict) -> bytes:
+        return IcsGenerator.generate_bulk_ics([event])
+
     @staticmethod
-    def generate_ics(title, description, location, date_str):
+    def generate_ics(title, description, location, date_str) -> str:
         event = {
-            'id': abs(hash(title)),
+            'id': hashlib.sha1(f"{title}|{date_str}".encode('utf-8')).hexdigest()[:12],
             'title': title,
             'description': description,
             'location': location,
             'date_str': date_str,
         }
-        
-        now_str = datetime.now().strftime("%Y%m%dT%H%M%S")
-        vevent = IcsGenerator._create_vevent(event, now_str)
-        
-        ics_content = (
-            "BEGIN:VCALENDAR\n"
-            "VERSION:2.0\n"
-            "PRODID:-//Sber AI Media Agent//RU\n"
-            "CALSCALE:GREGORIAN\n"
-            f"{vevent}"
-            "END:VCALENDAR\n"
-        )
-        return ics_content
+        return IcsGenerator.generate_event_ics(event).decode('utf-8')
 
     @staticmethod
-    def generate_bulk_ics(events: List[Dict]) -> str:
-        now_str = datetime.now().strftime("%Y%m%dT%H%M%S")
-        vevents = [IcsGenerator._create_vevent(event, now_str) for event in events]
-        
-        ics_content = (
-            "BEGIN:VCALENDAR\n"
-            "VERSION:2.0\n"
-            "PRODID:-//Sber AI Media Agent//RU\n"
-            "CALSCALE:GREGORIAN\n"
-            f"{''.join(vevents)}"
-            "END:VCALENDAR\n"
-        )
-        return ics_content
\ No newline at end of file
+    def file_name(event: Dict) -> str:
+        return f"{(event.get('title') or 'event')[:50]}.ics".replace('/', '-')
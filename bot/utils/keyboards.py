@@ -1,5 +1,20 @@
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 
+CALLBACK_DATA_LIMIT = 64
+
+def page_callback(prefix: str, page: int, cursor: str = None, backward: bool = False) -> str:
+    data = f"{prefix}{page}"
+    if cursor:
+        with_cursor = f"{data}_{'p' if backward else 'n'}_{cursor}"
+        if len(with_cursor.encode('utf-8')) <= CALLBACK_DATA_LIMIT: return with_cursor
+    return data
+
+def parse_page_callback(data: str, prefix: str):
+    parts = data[len(prefix):].split("_", 2)
+    page = int(parts[0])
+    if len(parts) == 3: return page, parts[2], parts[1] == 'p'
+    return page, None, False
+
 def get_main_keyboard(is_admin=False) -> ReplyKeyboardMarkup:
     buttons = [
         [KeyboardButton(text="📅 Мероприятия"), KeyboardButton(text="🔍 Поиск мероприятий")],
@@ -20,6 +35,7 @@ def get_events_type_keyboard() -> ReplyKeyboardMarkup:
 def get_export_calendar_keyboard() -> ReplyKeyboardMarkup:
     return ReplyKeyboardMarkup(keyboard=[
         [KeyboardButton(text="📅 Экспорт моих мероприятий")],
+        [KeyboardButton(text="🔗 Подписка на календарь")],
         [KeyboardButton(text="⬅️ Главное меню")]
     ], resize_keyboard=True)
 
@@ -69,7 +85,8 @@ def get_events_mgmt_kb(role='TechSupport'):
 def get_sources_mgmt_kb():
     return ReplyKeyboardMarkup(keyboard=[
         [KeyboardButton(text="➕ Добавить источник"), KeyboardButton(text="➖ Удалить источник")],
-        [KeyboardButton(text="📋 Список источников"), KeyboardButton(text="⬅️ Назад в админку")]
+        [KeyboardButton(text="📋 Список источников"), KeyboardButton(text="🧭 Профиль источника")],
+        [KeyboardButton(text="⬅️ Назад в админку")]
     ], resize_keyboard=True)
 
 def get_users_mgmt_kb():
@@ -193,7 +210,7 @@ def get_event_detail_keyboard(event_id: int, url: str, registration_status: str,
     buttons.append([InlineKeyboardButton(text="⬅️ Главное меню", callback_data="back_to_main_menu")])
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
-def get_moderation_keyboard(event_id: int, current_index: int, total_count: int) -> InlineKeyboardMarkup:
+def get_moderation_keyboard(event_id: int, current_index: int, total_count: int, cursor: str = None) -> InlineKeyboardMarkup:
     buttons = [
         [
             InlineKeyboardButton(text="✅ Одобрить", callback_data=f"approve_event_{event_id}"),
@@ -201,15 +218,15 @@ def get_moderation_keyboard(event_id: int, current_index: int, total_count: int)
         ],
         [InlineKeyboardButton(text="✏️ Ред.", callback_data=f"admin_event_details_{event_id}")],
         [
-            InlineKeyboardButton(text="⬅️", callback_data=f"mod_prev_{current_index - 1}" if current_index > 0 else "ignore"),
+            InlineKeyboardButton(text="⬅️", callback_data=page_callback("mod_prev_", current_index - 1, cursor, True) if current_index > 0 else "ignore"),
             InlineKeyboardButton(text=f"{current_index + 1}/{total_count}", callback_data="ignore"),
-            InlineKeyboardButton(text="➡️", callback_data=f"mod_next_{current_index + 1}" if current_index < total_count - 1 else "ignore")
+            InlineKeyboardButton(text="➡️", callback_data=page_callback("mod_next_", current_index + 1, cursor) if current_index < total_count - 1 else "ignore")
         ],
         [InlineKeyboardButton(text="⬅️ Главное меню", callback_data="back_to_main_menu")]
     ]
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
-def get_user_approval_pagination_keyboard(users: list, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
+def get_user_approval_pagination_keyboard(users: list, current_page: int, total_pages: int, cursor: str = None) -> InlineKeyboardMarkup:
     if not users: return InlineKeyboardMarkup(inline_keyboard=[])
     user = users[0]
     
@@ -222,23 +239,23 @@ def get_user_approval_pagination_keyboard(users: list, current_page: int, total_
     
     nav = []
     if current_page > 0:
-        nav.append(InlineKeyboardButton(text="⬅️", callback_data=f"user_approval_prev_{current_page - 1}"))
+        nav.append(InlineKeyboardButton(text="⬅️", callback_data=page_callback("user_approval_prev_", current_page - 1, cursor, True)))
     nav.append(InlineKeyboardButton(text=f"{current_page + 1}/{total_pages}", callback_data="ignore"))
     if current_page < total_pages - 1:
-        nav.append(InlineKeyboardButton(text="➡️", callback_data=f"user_approval_next_{current_page + 1}"))
+        nav.append(InlineKeyboardButton(text="➡️", callback_data=page_callback("user_approval_next_", current_page + 1, cursor)))
     
     if nav: buttons.append(nav)
     buttons.append([InlineKeyboardButton(text="⬅️ Главное меню", callback_data="back_to_main_menu")])
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
-def get_events_list_keyboard(events: list, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
+def get_events_list_keyboard(events: list, current_page: int, total_pages: int, cursor: str = None) -> InlineKeyboardMarkup:
     buttons = []
     nav = []
     if current_page > 0:
-        nav.append(InlineKeyboardButton(text="⬅️", callback_data=f"admin_events_prev_{current_page - 1}"))
+        nav.append(InlineKeyboardButton(text="⬅️", callback_data=page_callback("admin_events_prev_", current_page - 1, cursor, True)))
     nav.append(InlineKeyboardButton(text=f"{current_page + 1}/{total_pages}", callback_data="ignore"))
     if current_page < total_pages - 1:
-        nav.append(InlineKeyboardButton(text="➡️", callback_data=f"admin_events_next_{current_page + 1}"))
+        nav.append(InlineKeyboardButton(text="➡️", callback_data=page_callback("admin_events_next_", current_page + 1, cursor)))
     if nav: buttons.append(nav)
     
     buttons.append([InlineKeyboardButton(text="⬅️ Главное меню", callback_data="back_to_main_menu")])
@@ -351,17 +368,17 @@ def get_bulk_moderation_keyboard(event_id: int, current_page: int, total_pages:
     
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
-def get_events_pagination_keyboard(events: list, current_page: int, total_pages: int, event_type: str = 'main') -> InlineKeyboardMarkup:
+def get_events_pagination_keyboard(events: list, current_page: int, total_pages: int, event_type: str = 'main', cursor: str = None) -> InlineKeyboardMarkup:
     buttons = []
     
     nav_buttons = []
     if current_page > 0:
-        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"{event_type}_page_{current_page - 1}"))
+        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=page_callback(f"{event_type}_page_", current_page - 1, cursor, True)))
     
     nav_buttons.append(InlineKeyboardButton(text=f"{current_page + 1}/{total_pages}", callback_data="ignore"))
     
     if current_page < total_pages - 1:
-        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"{event_type}_page_{current_page + 1}"))
+        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=page_callback(f"{event_type}_page_", current_page + 1, cursor)))
     
     if nav_buttons:
         buttons.append(nav_buttons)
@@ -373,17 +390,17 @@ def get_events_pagination_keyboard(events: list, current_page: int, total_pages:
     
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
-def get_admin_events_pagination_keyboard(events: list, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
+def get_admin_events_pagination_keyboard(events: list, current_page: int, total_pages: int, cursor: str = None) -> InlineKeyboardMarkup:
     buttons = []
     
     nav_buttons = []
     if current_page > 0:
-        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"admin_events_prev_{current_page - 1}"))
+        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=page_callback("admin_events_prev_", current_page - 1, cursor, True)))
     
     nav_buttons.append(InlineKeyboardButton(text=f"{current_page + 1}/{total_pages}", callback_data="ignore"))
     
     if current_page < total_pages - 1:
-        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"admin_events_next_{current_page + 1}"))
+        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=page_callback("admin_events_next_", current_page + 1, cursor)))
     
     if nav_buttons:
         buttons.append(nav_buttons)
@@ -398,17 +415,17 @@ def get_admin_events_pagination_keyboard(events: list, current_page: int, total_
     
     return InlineKeyboardMarkup(inline_keyboard=buttons)
 
-def get_manager_events_pagination_keyboard(events: list, current_page: int, total_pages: int) -> InlineKeyboardMarkup:
+def get_manager_events_pagination_keyboard(events: list, current_page: int, total_pages: int, cursor: str = None) -> InlineKeyboardMarkup:
     buttons = []
     
     nav_buttons = []
     if current_page > 0:
-        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=f"manager_events_prev_{current_page - 1}"))
+        nav_buttons.append(InlineKeyboardButton(text="⬅️", callback_data=page_callback("manager_events_prev_", current_page - 1, cursor, True)))
     
     nav_buttons.append(InlineKeyboardButton(text=f"{current_page + 1}/{total_pages}", callback_data="ignore"))
     
     if current_page < total_pages - 1:
-        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=f"manager_events_next_{current_page + 1}"))
+        nav_buttons.append(InlineKeyboardButton(text="➡️", callback_data=page_callback("manager_events_next_", current_page + 1, cursor)))
     
     if nav_buttons:
         buttons.append(nav_buttons)
@@ -0,0 +1,189 @@
+import logging
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger('slow_queries')
+
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+PLACEHOLDERS_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+VALUES_RE = re.compile(r'(\(\?, \.\.\.\)|\(\?\))(?:\s*,\s*\1)+')
+SPACE_RE = re.compile(r'\s+')
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql: str) -> str:
+    shape = STRING_RE.sub('?', sql)
+    shape = NUMBER_RE.sub('?', shape)
+    shape = SPACE_RE.sub(' ', shape).strip()
+    shape = PLACEHOLDERS_RE.sub('(?, ...)', shape)
+    return VALUES_RE.sub(r'\1, ...', shape)
+
+def _caller() -> str:
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_globals is globals():
+        frame = frame.f_back
+    if frame is None: return '?'
+    module, name = frame.f_globals, frame.f_code.co_name
+    while frame is not None and frame.f_globals is module:
+        if not frame.f_code.co_name.startswith(('_', '<')): name = frame.f_code.co_name
+        frame = frame.f_back
+    return name
+
+class QueryStats:
+    def __init__(self, window: int = 1000, slow_ms: float = 100, plan_ttl: float = 300):
+        self.window = window
+        self.slow_ms = slow_ms
+        self.plan_ttl = plan_ttl
+        self.slow_count = 0
+        self.error_count = 0
+        self._entries = {}
+        self._plans = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, shape: str) -> dict:
+        entry = self._entries.get(shape)
+        if entry is None:
+            entry = self._entries[shape] = {
+                'calls': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0,
+                'callers': set(), 'latencies': deque(maxlen=self.window)
+            }
+        return entry
+
+    def record(self, shape: str, elapsed_ms: float, rows: int, caller: str = None):
+        with self._lock:
+            entry = self._entry(shape)
+            entry['calls'] += 1
+            entry['total_ms'] += elapsed_ms
+            entry['rows'] += rows
+            entry['latencies'].append(elapsed_ms)
+            if elapsed_ms > entry['max_ms']: entry['max_ms'] = elapsed_ms
+            if caller and len(entry['callers']) < 8: entry['callers'].add(caller)
+
+    def record_error(self, shape: str, caller: str, error: Exception):
+        with self._lock:
+            entry = self._entry(shape)
+            entry['errors'] += 1
+            if len(entry['callers']) < 8: entry['callers'].add(caller)
+            self.error_count += 1
+        logger.error(f"SQL error in {caller}: {error} | {shape}")
+
+    def is_slow(self, elapsed_ms: float) -> bool:
+        return self.slow_ms is not None and elapsed_ms >= self.slow_ms
+
+    def log_slow(self, conn: sqlite3.Connection, sql: str, params, shape: str, elapsed_ms: float, rows: int, caller: str):
+        with self._lock:
+            self.slow_count += 1
+        slow_logger.warning(
+            f"🐢 {elapsed_ms:.1f} ms, {rows} rows, {caller}: {shape}\n    plan: {self._plan(conn, sql, params, shape)}"
+        )
+
+    def _plan(self, conn: sqlite3.Connection, sql: str, params, shape: str) -> str:
+        now = time.monotonic()
+        with self._lock:
+            cached = self._plans.get(shape)
+        if cached and cached[1] > now: return cached[0]
+        if params is None or not sql.lstrip().upper().startswith(EXPLAINABLE):
+            return '-'
+        try:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+            plan = ' | '.join(row[3] for row in rows) or '-'
+        except sqlite3.Error as e:
+            plan = f"unavailable ({e})"
+        with self._lock:
+            self._plans[shape] = (plan, now + self.plan_ttl)
+        return plan
+
+    def snapshot(self, top: int = None, order_by: str = 'total_ms') -> list:
+        with self._lock:
+            items = [(shape, dict(entry), sorted(entry['latencies'])) for shape, entry in self._entries.items()]
+        result = []
+        for shape, entry, latencies in items:
+            pick = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q))] if latencies else 0.0
+            result.append({
+                'shape': shape,
+                'calls': entry['calls'],
+                'errors': entry['errors'],
+                'total_ms': round(entry['total_ms'], 3),
+                'avg_rows': round(entry['rows'] / entry['calls'], 1) if entry['calls'] else 0.0,
+                'p50_ms': round(pick(0.5), 3),
+                'p95_ms': round(pick(0.95), 3),
+                'p99_ms': round(pick(0.99), 3),
+                'max_ms': round(entry['max_ms'], 3),
+                'callers': sorted(entry['callers'])
+            })
+        result.sort(key=lambda item: -item[order_by])
+        return result[:top] if top else result
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+            self.slow_count = 0
+            self.error_count = 0
+
+class InstrumentedCursor:
+    def __init__(self, cursor: sqlite3.Cursor, stats: QueryStats):
+        self._cursor = cursor
+        self._stats = stats
+        self._pending = None
+
+    def execute(self, sql: str, params=()):
+        if self._pending: self._finish(0, 0)
+        started = time.perf_counter()
+        try:
+            self._cursor.execute(sql, params)
+        except sqlite3.Error as e:
+            self._stats.record_error(normalize_sql(sql), _caller(), e)
+            raise
+        elapsed = (time.perf_counter() - started) * 1000
+        if self._cursor.description is None:
+            self._record(sql, params, elapsed, max(self._cursor.rowcount, 0))
+        else:
+            self._pending = (sql, params, elapsed)
+        return self
+
+    def executemany(self, sql: str, seq_of_params):
+        if self._pending: self._finish(0, 0)
+        started = time.perf_counter()
+        try:
+            self._cursor.executemany(sql, seq_of_params)
+        except sqlite3.Error as e:
+            self._stats.record_error(normalize_sql(sql), _caller(), e)
+            raise
+        self._record(sql, None, (time.perf_counter() - started) * 1000, max(self._cursor.rowcount, 0))
+        return self
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = self._cursor.fetchone()
+        if self._pending: self._finish((time.perf_counter() - started) * 1000, 1 if row is not None else 0)
+        return row
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = self._cursor.fetchall()
+        if self._pending: self._finish((time.perf_counter() - started) * 1000, len(rows))
+        return rows
+
+    def _finish(self, fetch_ms: float, rows: int):
+        sql, params, elapsed = self._pending
+        self._pending = None
+        self._record(sql, params, elapsed + fetch_ms, rows)
+
+    def _record(self, sql: str, params, elapsed_ms: float, rows: int):
+        shape = normalize_sql(sql)
+        if not self._stats.is_slow(elapsed_ms):
+            self._stats.record(shape, elapsed_ms, rows)
+            return
+        caller = _caller()
+        self._stats.record(shape, elapsed_ms, rows, caller)
+        self._stats.log_slow(self._cursor.connection, sql, params, shape, elapsed_ms, rows, caller)
+
+    def __getattr__(self, name: str):
+        return getattr(self._cursor, name)